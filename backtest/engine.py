@@ -0,0 +1,263 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backtest.signals import SIGNAL_FUNCTIONS, Signals
+from strategies.registry import get_strategy_class
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+
+
+@dataclass
+class Trade:
+    side: str  # 'LONG' или 'SHORT'
+    entry_index: int
+    exit_index: int
+    entry_time: int
+    exit_time: int
+    entry_price: float
+    exit_price: float
+    quantity: float
+    pnl: float
+    exit_reason: str  # 'stop_loss', 'take_profit', 'trailing_stop', 'partial', 'signal', 'end'
+
+
+@dataclass
+class BacktestResult:
+    trades: List[Trade]
+    equity: np.ndarray
+    timestamps: np.ndarray
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+
+def get_default_params(strategy_name: str) -> Dict:
+    """
+    Возвращает параметры стратегии по умолчанию из ее класса.
+
+    :raises ValueError: если стратегия не зарегистрирована
+    """
+    return dict(get_strategy_class(strategy_name).DEFAULT_PARAMS)
+
+
+class Backtester:
+    """
+    Векторизованный бэктестер скальпинговых стратегий.
+
+    Индикаторы и сигналы считаются по всей истории за один проход. Сделки
+    моделируются последовательно, но выход из каждой позиции ищется
+    векторно блоками баров, поэтому время работы определяется числом сделок,
+    а не числом свечей.
+
+    Правила выхода повторяют стратегии: стоп-лосс и тейк-профит от цены входа,
+    трейлинг-стоп по цене закрытия и частичное закрытие (ScalpingStrategy1),
+    выход по сигналу (ScalpingStrategy2 и ScalpingStrategy3). Одновременно
+    моделируется одна позиция; при касании стоп-лосса и тейк-профита в одном
+    баре считается, что первым сработал стоп-лосс. Если бар открылся за
+    уровнем стопа (гэп), стоп исполняется по цене открытия.
+    """
+
+    CHUNK_SIZE = 2048
+
+    def __init__(self, strategy_name: str, params: Optional[Dict] = None, initial_balance: float = 1000.0,
+                 fee_rate: float = 0.00055, position_size_pct: float = 0.1):
+        if strategy_name not in SIGNAL_FUNCTIONS:
+            raise ValueError(f"Неподдерживаемая стратегия: {strategy_name}")
+        self.strategy_name = strategy_name
+        self.params = {**get_default_params(strategy_name), **(params or {})}
+        self.initial_balance = initial_balance
+        self.fee_rate = fee_rate
+        self.position_size_pct = self.params.get('position_size_pct', position_size_pct)
+        self.trailing_stop_pct = self.params.get('trailing_stop_pct', 0.0)
+        self.partial_close_pct = self.params.get('partial_close_pct', 0.0)
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, candles: Dict[str, np.ndarray]) -> BacktestResult:
+        """
+        Запускает бэктест.
+
+        :param candles: словарь массивов 'timestamp', 'open', 'high', 'low', 'close', 'volume'
+        :return: результат бэктеста со списком сделок и кривой капитала
+        """
+        self._load(candles)
+        n = len(self.close)
+
+        signals = SIGNAL_FUNCTIONS[self.strategy_name](candles, self.params)
+        long_entries = np.flatnonzero(signals.long_entry)
+        short_entries = np.flatnonzero(signals.short_entry)
+
+        trades: List[Trade] = []
+        realized = np.zeros(n)
+        unrealized = np.zeros(n)
+        balance = self.initial_balance
+        index = 0
+
+        while True:
+            entry_index, side = self._next_entry(long_entries, short_entries, index)
+            if entry_index is None or entry_index >= n - 1:
+                break
+
+            entry_price = self.close[entry_index]
+            quantity = balance * self.position_size_pct / entry_price
+            position_trades = self._simulate_position(signals, entry_index, side, entry_price, quantity)
+
+            direction = 1 if side == 'LONG' else -1
+            remaining = quantity
+            segment_start = entry_index
+            for trade in position_trades:
+                # Нереализованная прибыль оставшегося объема до момента (частичного) закрытия
+                segment = slice(segment_start, trade.exit_index)
+                unrealized[segment] += (self.close[segment] - entry_price) * direction * remaining
+                realized[trade.exit_index] += trade.pnl
+                balance += trade.pnl
+                remaining -= trade.quantity
+                segment_start = trade.exit_index
+            trades.extend(position_trades)
+            index = position_trades[-1].exit_index + 1
+
+        equity = self.initial_balance + np.cumsum(realized) + unrealized
+        return BacktestResult(trades=trades, equity=equity, timestamps=self.timestamps,
+                              metrics=self._calculate_metrics(trades, equity))
+
+    def _load(self, candles: Dict[str, np.ndarray]):
+        self.timestamps = np.asarray(candles['timestamp'])
+        self.open = np.asarray(candles['open'], dtype=np.float64)
+        self.high = np.asarray(candles['high'], dtype=np.float64)
+        self.low = np.asarray(candles['low'], dtype=np.float64)
+        self.close = np.asarray(candles['close'], dtype=np.float64)
+
+    @staticmethod
+    def _next_entry(long_entries: np.ndarray, short_entries: np.ndarray, index: int) -> Tuple[Optional[int], Optional[str]]:
+        long_pos = np.searchsorted(long_entries, index)
+        short_pos = np.searchsorted(short_entries, index)
+        next_long = long_entries[long_pos] if long_pos < len(long_entries) else None
+        next_short = short_entries[short_pos] if short_pos < len(short_entries) else None
+
+        # Как и в стратегиях, при одновременных сигналах приоритет у длинной позиции
+        if next_long is not None and (next_short is None or next_long <= next_short):
+            return int(next_long), 'LONG'
+        if next_short is not None:
+            return int(next_short), 'SHORT'
+        return None, None
+
+    def _simulate_position(self, signals: Signals, entry_index: int, side: str,
+                           entry_price: float, quantity: float) -> List[Trade]:
+        n = len(self.close)
+        is_long = side == 'LONG'
+        direction = 1 if is_long else -1
+        stop_loss = entry_price * (1 - direction * self.params['stop_loss_pct'])
+        take_profit = entry_price * (1 + direction * self.params['take_profit_pct'])
+        partial_price = entry_price * (1 + direction * self.partial_close_pct) if self.partial_close_pct else None
+        exit_signal = signals.long_exit if is_long else signals.short_exit
+
+        trades = []
+        partial_done = partial_price is None
+        extreme_close = entry_price
+        start = entry_index + 1
+
+        while start < n:
+            end = min(n, start + self.CHUNK_SIZE)
+            high = self.high[start:end]
+            low = self.low[start:end]
+            close = self.close[start:end]
+
+            # Уровень стопа на бар j определяется закрытиями до бара j - 1 включительно
+            if is_long:
+                running = np.maximum.accumulate(np.concatenate(([extreme_close], close[:-1])))
+                trailing = running * (1 - self.trailing_stop_pct) if self.trailing_stop_pct else None
+                stop = np.maximum(stop_loss, trailing) if trailing is not None else np.full(len(close), stop_loss)
+                stop_hit = low <= stop
+                tp_hit = high >= take_profit
+                partial_hit = high >= partial_price if not partial_done else None
+            else:
+                running = np.minimum.accumulate(np.concatenate(([extreme_close], close[:-1])))
+                trailing = running * (1 + self.trailing_stop_pct) if self.trailing_stop_pct else None
+                stop = np.minimum(stop_loss, trailing) if trailing is not None else np.full(len(close), stop_loss)
+                stop_hit = high >= stop
+                tp_hit = low <= take_profit
+                partial_hit = low <= partial_price if not partial_done else None
+
+            candidates = [
+                (self._first(stop_hit), 0, 'stop'),
+                (self._first(tp_hit), 1, 'take_profit'),
+            ]
+            if exit_signal is not None:
+                candidates.append((self._first(exit_signal[start:end]), 2, 'signal'))
+            exit_offset, _, reason = min(candidates)
+
+            if not partial_done:
+                partial_offset = self._first(partial_hit)
+                if partial_offset < exit_offset:
+                    partial_quantity = quantity * self.partial_close_pct
+                    trades.append(self._make_trade(side, entry_index, start + partial_offset, entry_price,
+                                                   partial_price, partial_quantity, 'partial'))
+                    quantity -= partial_quantity
+                    partial_done = True
+
+            if exit_offset < len(close):
+                exit_index = start + exit_offset
+                if reason == 'stop':
+                    level = stop[exit_offset]
+                    reason = 'stop_loss' if level == stop_loss else 'trailing_stop'
+                    # При гэпе через стоп исполнение происходит по худшей цене открытия
+                    open_price = self.open[exit_index]
+                    exit_price = min(open_price, level) if is_long else max(open_price, level)
+                elif reason == 'take_profit':
+                    exit_price = take_profit
+                else:
+                    exit_price = self.close[exit_index]
+                trades.append(self._make_trade(side, entry_index, exit_index, entry_price, exit_price, quantity, reason))
+                return trades
+
+            extreme_close = running[-1]
+            extreme_close = max(extreme_close, close[-1]) if is_long else min(extreme_close, close[-1])
+            start = end
+
+        trades.append(self._make_trade(side, entry_index, n - 1, entry_price, self.close[-1], quantity, 'end'))
+        return trades
+
+    @staticmethod
+    def _first(mask: np.ndarray) -> int:
+        index = np.argmax(mask)
+        return int(index) if mask[index] else len(mask)
+
+    def _make_trade(self, side: str, entry_index: int, exit_index: int, entry_price: float,
+                    exit_price: float, quantity: float, reason: str) -> Trade:
+        direction = 1 if side == 'LONG' else -1
+        fees = (entry_price + exit_price) * quantity * self.fee_rate
+        pnl = (exit_price - entry_price) * direction * quantity - fees
+        return Trade(side=side, entry_index=entry_index, exit_index=exit_index,
+                     entry_time=int(self.timestamps[entry_index]), exit_time=int(self.timestamps[exit_index]),
+                     entry_price=float(entry_price), exit_price=float(exit_price), quantity=float(quantity),
+                     pnl=float(pnl), exit_reason=reason)
+
+    def _calculate_metrics(self, trades: List[Trade], equity: np.ndarray) -> Dict[str, float]:
+        pnl = np.array([trade.pnl for trade in trades])
+        peak = np.maximum.accumulate(equity)
+        drawdown = (peak - equity) / peak
+        returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+
+        if len(self.timestamps) > 1:
+            bar_minutes = max(float(np.median(np.diff(self.timestamps))) / 60_000, 1e-9)
+        else:
+            bar_minutes = 1.0
+        bars_per_year = MINUTES_PER_YEAR / bar_minutes
+        std = returns.std() if len(returns) else 0.0
+
+        gross_profit = pnl[pnl > 0].sum() if len(pnl) else 0.0
+        gross_loss = -pnl[pnl < 0].sum() if len(pnl) else 0.0
+        return {
+            'total_return': float(equity[-1] / self.initial_balance - 1) if len(equity) else 0.0,
+            'final_equity': float(equity[-1]) if len(equity) else self.initial_balance,
+            'max_drawdown': float(drawdown.max()) if len(drawdown) else 0.0,
+            'trades': len(trades),
+            'win_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+            'profit_factor': float(gross_profit / gross_loss) if gross_loss > 0 else float('inf') if gross_profit > 0 else 0.0,
+            'sharpe': float(returns.mean() / std * np.sqrt(bars_per_year)) if std > 0 else 0.0,
+        }
+
+
+def run_backtest(strategy_name: str, candles: Dict[str, np.ndarray], params: Optional[Dict] = None,
+                 **kwargs) -> BacktestResult:
+    return Backtester(strategy_name, params, **kwargs).run(candles)
@@ -0,0 +1,213 @@
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backtest.engine import Backtester
+
+CANDLE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+def grid_search_space(param_space: Dict[str, List]) -> Iterator[Dict]:
+    """
+    Перебирает все комбинации значений параметров.
+
+    :param param_space: словарь {параметр: список значений}
+    """
+    names = list(param_space)
+    for values in itertools.product(*(param_space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def random_search_space(param_space: Dict[str, object], samples: int, seed: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Случайная выборка комбинаций параметров.
+
+    Значение параметра может быть списком (выбор из списка) или кортежем
+    (low, high) - равномерное распределение; для целых границ выбирается целое.
+    """
+    rng = random.Random(seed)
+    for _ in range(samples):
+        params = {}
+        for name, space in param_space.items():
+            if isinstance(space, tuple):
+                low, high = space
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(space))
+        yield params
+
+
+class SharedCandles:
+    """
+    Свечи в разделяемой памяти для рабочих процессов.
+
+    Все колонки копируются в один блок SharedMemory; процессам передается
+    только короткое описание блока, а массивы восстанавливаются как
+    представления без копирования.
+    """
+
+    def __init__(self, candles: Dict[str, np.ndarray]):
+        self.length = len(candles['close'])
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, self.length * 8 * len(CANDLE_COLUMNS)))
+        for i, column in enumerate(CANDLE_COLUMNS):
+            dtype = np.int64 if column == 'timestamp' else np.float64
+            view = np.ndarray((self.length,), dtype=dtype, buffer=self.shm.buf, offset=i * self.length * 8)
+            view[:] = candles[column]
+
+    @property
+    def descriptor(self) -> Tuple[str, int]:
+        return self.shm.name, self.length
+
+    @staticmethod
+    def attach(descriptor: Tuple[str, int]) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+        name, length = descriptor
+        shm = shared_memory.SharedMemory(name=name)
+        candles = {}
+        for i, column in enumerate(CANDLE_COLUMNS):
+            dtype = np.int64 if column == 'timestamp' else np.float64
+            candles[column] = np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=i * length * 8)
+        return shm, candles
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Состояние рабочего процесса
+_worker_shm = None
+_worker_candles = None
+_worker_strategy = None
+_worker_kwargs = None
+
+
+def _init_worker(descriptor: Tuple[str, int], strategy_name: str, backtest_kwargs: Dict):
+    global _worker_shm, _worker_candles, _worker_strategy, _worker_kwargs
+    _worker_shm, _worker_candles = SharedCandles.attach(descriptor)
+    _worker_strategy = strategy_name
+    _worker_kwargs = backtest_kwargs
+
+
+def _run_backtest(params: Dict) -> Dict:
+    started = time.perf_counter()
+    try:
+        result = Backtester(_worker_strategy, params, **_worker_kwargs).run(_worker_candles)
+        return {'params': params, 'metrics': result.metrics, 'elapsed': time.perf_counter() - started}
+    except Exception as e:
+        return {'params': params, 'error': str(e), 'elapsed': time.perf_counter() - started}
+
+
+class ParameterOptimizer:
+    """
+    Перебор параметров стратегии с бэктестами в пуле процессов.
+
+    Результаты записываются в JSONL-файл по мере готовности, а по окончании
+    сортируются по выбранной метрике. Комбинации параметров читаются из
+    итератора постепенно: в пуле одновременно находится не больше max_pending
+    задач, поэтому перебор тысяч комбинаций не держит их все в памяти.
+    """
+
+    def __init__(self, strategy_name: str, candles: Dict[str, np.ndarray], metric: str = 'sharpe',
+                 processes: Optional[int] = None, results_path: str = os.path.join('results', 'optimization.jsonl'),
+                 backtest_kwargs: Optional[Dict] = None, max_pending: Optional[int] = None):
+        self.strategy_name = strategy_name
+        self.candles = candles
+        self.metric = metric
+        self.processes = processes or os.cpu_count()
+        self.results_path = results_path
+        self.backtest_kwargs = backtest_kwargs or {}
+        self.max_pending = max_pending or self.processes * 4
+        self.logger = logging.getLogger(__name__)
+
+    def _score(self, result: Dict) -> float:
+        value = result.get('metrics', {}).get(self.metric)
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return float('-inf')
+        return value
+
+    def run(self, param_sets: Iterable[Dict]) -> List[Dict]:
+        directory = os.path.dirname(self.results_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        shared = SharedCandles(self.candles)
+        results = []
+        started = time.monotonic()
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                     initargs=(shared.descriptor, self.strategy_name, self.backtest_kwargs)) as executor, \
+                    open(self.results_path, 'w', encoding='utf-8') as results_file:
+                param_iter = iter(param_sets)
+                pending = set()
+                done = 0
+                while True:
+                    for params in itertools.islice(param_iter, self.max_pending - len(pending)):
+                        pending.add(executor.submit(_run_backtest, params))
+                    if not pending:
+                        break
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        result = future.result()
+                        results.append(result)
+                        results_file.write(json.dumps(result, default=float) + '\n')
+                        done += 1
+                        if done % 100 == 0:
+                            self.logger.info(f"Выполнено {done} бэктестов за {time.monotonic() - started:.1f} с")
+                    results_file.flush()
+                self.logger.info(f"Выполнено {done} бэктестов за {time.monotonic() - started:.1f} с")
+        finally:
+            shared.close()
+
+        results.sort(key=self._score, reverse=True)
+        ranked_path = os.path.splitext(self.results_path)[0] + '_ranked.json'
+        with open(ranked_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, default=float, ensure_ascii=False, indent=2)
+        return results
+
+
+def _parse_space(items: List[str]) -> Dict[str, List]:
+    space = {}
+    for item in items:
+        name, values = item.split('=', 1)
+        space[name] = [json.loads(value) for value in values.split(',')]
+    return space
+
+
+def main():
+    from storage.candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="Оптимизация параметров стратегии на истории")
+    parser.add_argument('strategy')
+    parser.add_argument('symbol')
+    parser.add_argument('params', nargs='+', help="Значения параметров, например bb_period=10,20,30")
+    parser.add_argument('--timeframe', default='1m')
+    parser.add_argument('--random', type=int, default=0, help="Число случайных комбинаций вместо полного перебора")
+    parser.add_argument('--metric', default='sharpe')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--results', default=os.path.join('results', 'optimization.jsonl'))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    candles = CandleStore().read(args.symbol, args.timeframe)
+    space = _parse_space(args.params)
+    param_sets = random_search_space(space, args.random) if args.random else grid_search_space(space)
+
+    optimizer = ParameterOptimizer(args.strategy, candles, args.metric, args.processes, args.results)
+    for result in optimizer.run(param_sets)[:10]:
+        print(result['params'], result.get('metrics', {}).get(args.metric), result.get('error', ''))
+
+
+if __name__ == "__main__":
+    main()
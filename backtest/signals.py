@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from utils.indicators import EMA, MACD, RSI, BollingerBands, indicator_series
+
+
+@dataclass
+class Signals:
+    """
+    Сигналы стратегии по всей истории свечей.
+
+    Сигналы на вход рассчитываются по цене закрытия бара; сигналы на выход
+    (если стратегия их использует) закрывают позицию по цене закрытия бара.
+    """
+    long_entry: np.ndarray
+    short_entry: np.ndarray
+    long_exit: Optional[np.ndarray] = None
+    short_exit: Optional[np.ndarray] = None
+
+
+def strategy1_signals(candles: Dict[str, np.ndarray], params: Dict) -> Signals:
+    """
+    RSI + тренд (ScalpingStrategy1).
+    """
+    rsi, = indicator_series(RSI(params['rsi_period']), candles)
+
+    # Как и в _check_trend: сравнение close[-1] с close[-trend_period]
+    lag = params['trend_period'] - 1
+    close_values = np.asarray(candles['close'], dtype=np.float64)
+    trend = np.full(len(close_values), np.nan)
+    trend[lag:] = (close_values[lag:] - close_values[:len(close_values) - lag]) / close_values[:len(close_values) - lag]
+
+    return Signals(
+        long_entry=(rsi < params['rsi_oversold']) & (trend > params['trend_threshold']),
+        short_entry=(rsi > params['rsi_overbought']) & (trend < -params['trend_threshold'])
+    )
+
+
+def strategy2_signals(candles: Dict[str, np.ndarray], params: Dict) -> Signals:
+    """
+    Пробой полос Боллинджера с выходом по средней линии (ScalpingStrategy2).
+    """
+    lband, hband, mavg = indicator_series(BollingerBands(params['bb_period'], params['bb_std']), candles,
+                                          'lband', 'hband', 'mavg')
+    close_values = np.asarray(candles['close'], dtype=np.float64)
+
+    return Signals(
+        long_entry=close_values < lband,
+        short_entry=close_values > hband,
+        long_exit=close_values > mavg,
+        short_exit=close_values < mavg
+    )
+
+
+def strategy3_signals(candles: Dict[str, np.ndarray], params: Dict) -> Signals:
+    """
+    MACD + EMA с выходом по смене знака гистограммы MACD (ScalpingStrategy3).
+    """
+    macd_diff, = indicator_series(MACD(params['macd_fast'], params['macd_slow'], params['macd_signal']), candles,
+                                  'macd_diff')
+    ema, = indicator_series(EMA(params['ema_period']), candles)
+    close_values = np.asarray(candles['close'], dtype=np.float64)
+
+    return Signals(
+        long_entry=(macd_diff > 0) & (close_values > ema),
+        short_entry=(macd_diff < 0) & (close_values < ema),
+        long_exit=macd_diff < 0,
+        short_exit=macd_diff > 0
+    )
+
+
+SIGNAL_FUNCTIONS: Dict[str, Callable[[Dict[str, np.ndarray], Dict], Signals]] = {
+    'ScalpingStrategy1': strategy1_signals,
+    'ScalpingStrategy2': strategy2_signals,
+    'ScalpingStrategy3': strategy3_signals,
+}
@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.model_memory import legacy_model, sample_values
+from benchmarks.runner import benchmark
+from exchange.markets_cache import save_markets_cache
+from exchange.rate_limiter import ENDPOINT_MARKET, RateLimitScheduler
+from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles, run_simulation
+from models.codec import decode_batch, encode_batch
+from models.fill import Fill
+from models.order import Order
+from models.position import Position
+
+STRATEGIES = ('ScalpingStrategy1', 'ScalpingStrategy2', 'ScalpingStrategy3')
+TIMEFRAME_MS = 60_000
+
+
+class StubOHLCVExchange:
+    """
+    Заглушка ccxt-биржи для BybitClient: каждый вызов fetch_ohlcv сдвигает
+    часы на один бар и возвращает свечи начиная с since, как это делает биржа.
+    """
+
+    def __init__(self, bars: int = 10_000):
+        candles = generate_synthetic_candles(['STUB'], bars, seed=1)['STUB']
+        self.prices = np.column_stack([candles[column] for column in
+                                       ('open', 'high', 'low', 'close', 'volume')]).tolist()
+        self.index = 200
+
+    def _row(self, i: int) -> List[float]:
+        return [i * TIMEFRAME_MS] + self.prices[i % len(self.prices)]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since=None, limit: int = 100) -> List[List[float]]:
+        self.index += 1
+        end = self.index + 1
+        start = end - limit if since is None else max(end - limit, int(since) // TIMEFRAME_MS)
+        return [self._row(i) for i in range(start, end)]
+
+
+def _offline_bybit_client():
+    from exchange.bybit_client import BybitClient
+
+    # Пустой кэш рынков, чтобы клиент не обращался к бирже при создании
+    cache_path = os.path.join(tempfile.mkdtemp(prefix='bench-'), 'markets.json')
+    save_markets_cache({}, {}, cache_path)
+    # Бюджет запросов без ограничений: замеряется стоимость обработки, а не ожидание лимитов
+    unlimited = (1e12, 1e12)
+    rate_limiter = RateLimitScheduler({ENDPOINT_MARKET: unlimited}, global_budget=unlimited)
+    client = BybitClient('benchmark', 'benchmark', markets_cache_path=cache_path, rate_limiter=rate_limiter)
+    stub = StubOHLCVExchange()
+    client.exchange.fetch_ohlcv = stub.fetch_ohlcv
+    return client
+
+
+@benchmark('bybit_client.get_market_data.incremental')
+def bench_get_market_data(quick: bool):
+    client = _offline_bybit_client()
+    client.get_market_data('STUB')
+    return lambda: client.get_market_data('STUB'), 1
+
+
+@benchmark('bybit_client.get_market_data.full_window')
+def bench_get_market_data_full(quick: bool):
+    client = _offline_bybit_client()
+
+    def operation():
+        client.candle_buffers.clear()
+        client.get_market_data('STUB')
+    return operation, 1
+
+
+def _make_strategy_tick(strategy_name: str):
+    from exchange.data_fetcher import TradingRobot
+
+    exchange = SimulatedExchange(generate_synthetic_candles(['BTCUSDT'], 20_000, seed=2))
+    robot = TradingRobot('benchmark', 'benchmark', ['BTCUSDT'], None, 100, 1000, 0.5, strategy_name,
+                         client=exchange, enable_visualizer=False)
+    strategy = robot.strategies['BTCUSDT']
+
+    def operation():
+        if not exchange.advance():
+            exchange.index = 99
+            exchange.positions.clear()
+            exchange.open_orders.clear()
+        strategy.analyze_market(exchange.get_market_data('BTCUSDT'))
+        strategy.execute_strategy()
+    return operation, 1
+
+
+for _strategy_name in STRATEGIES:
+    benchmark(f'strategy.{_strategy_name}.tick')(
+        lambda quick, name=_strategy_name: _make_strategy_tick(name))
+
+
+def _make_robot_cycle(symbols_count: int, quick: bool):
+    from exchange.data_fetcher import TradingRobot
+
+    symbols = [f'SYM{i}USDT' for i in range(symbols_count)]
+    steps = 5 if quick else 20
+    exchange = SimulatedExchange(generate_synthetic_candles(symbols, 2_000, seed=3))
+    robot = TradingRobot('benchmark', 'benchmark', symbols, None, 100, 1000, 0.5, 'ScalpingStrategy2',
+                         client=exchange, enable_visualizer=False, max_concurrency=10)
+
+    def operation():
+        from concurrent.futures import ThreadPoolExecutor
+
+        if exchange.index + steps >= exchange.length:
+            exchange.index = 99
+        # run_simulation закрывает пул потоков движка по завершении
+        robot.engine.executor = ThreadPoolExecutor(max_workers=robot.engine.max_concurrency,
+                                                   thread_name_prefix="strategy")
+        run_simulation(robot, exchange, steps)
+    return operation, steps
+
+
+for _symbols_count in (10, 100, 500):
+    benchmark(f'trading_robot.cycle.{_symbols_count}_symbols')(
+        lambda quick, count=_symbols_count: _make_robot_cycle(count, quick))
+
+
+def _sample_orders(count: int) -> List[Order]:
+    return [Order('BTCUSDT', 'BUY' if i % 2 else 'SELL', 'LIMIT', 0.001 * (i + 1), 30000.0 + i,
+                  29900.0 + i, 30100.0 + i, str(i)) for i in range(count)]
+
+
+def _sample_positions(count: int) -> List[Position]:
+    return [Position('BTCUSDT', 'LONG' if i % 2 else 'SHORT', 0.001 * (i + 1), 30000.0 + i,
+                     25000.0, 1.5, 10) for i in range(count)]
+
+
+def _make_model_construct(model, legacy: bool):
+    values = sample_values(model, 1000)
+    cls = legacy_model(model) if legacy else model
+    return lambda: [cls(*row) for row in values], len(values)
+
+
+def _make_json_round_trip(model):
+    items = [model(*row) for row in sample_values(model, 1000)]
+    return lambda: [model.from_dict(item) for item in json.loads(json.dumps([item.to_dict() for item in items]))], len(items)
+
+
+def _make_codec_encode(model):
+    items = [model(*row) for row in sample_values(model, 1000)]
+    return lambda: encode_batch(items), len(items)
+
+
+def _make_codec_decode(model):
+    data = encode_batch([model(*row) for row in sample_values(model, 1000)])
+    return lambda: decode_batch(data), 1000
+
+
+# Модели со slots против прежних dataclass и бинарный формат против to_dict + JSON
+for _model in (Order, Position, Fill):
+    _model_name = _model.__name__.lower()
+    benchmark(f'models.{_model_name}.construct')(lambda quick, model=_model: _make_model_construct(model, False))
+    benchmark(f'models.{_model_name}.construct_legacy')(lambda quick, model=_model: _make_model_construct(model, True))
+    benchmark(f'models.{_model_name}.json_round_trip')(lambda quick, model=_model: _make_json_round_trip(model))
+    benchmark(f'models.codec.{_model_name}.encode_batch')(lambda quick, model=_model: _make_codec_encode(model))
+    benchmark(f'models.codec.{_model_name}.decode_batch')(lambda quick, model=_model: _make_codec_decode(model))
+
+
+@benchmark('models.order.round_trip')
+def bench_order_round_trip(quick: bool):
+    orders = _sample_orders(1000)
+    return lambda: [Order.from_dict(order.to_dict()) for order in orders], len(orders)
+
+
+@benchmark('models.position.round_trip')
+def bench_position_round_trip(quick: bool):
+    positions = _sample_positions(1000)
+    return lambda: [Position.from_dict(position.to_dict()) for position in positions], len(positions)
+
+
+@benchmark('models.order.to_dict')
+def bench_order_to_dict(quick: bool):
+    orders = _sample_orders(1000)
+    return lambda: [order.to_dict() for order in orders], len(orders)
+
+
+@benchmark('models.order.from_dict')
+def bench_order_from_dict(quick: bool):
+    data: List[Dict] = [order.to_dict() for order in _sample_orders(1000)]
+    return lambda: [Order.from_dict(item) for item in data], len(data)
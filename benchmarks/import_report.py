@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, NamedTuple, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Пакеты проекта: их собственное время импорта - наши накладные расходы при запуске
+PROJECT_PACKAGES = ('main', 'config', 'backtest', 'benchmarks', 'bot', 'exchange', 'models', 'storage',
+                    'strategies', 'utils')
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    depth: int  # уровень вложенности импорта, 0 - импорт из самой команды
+    self_time: float  # секунды без учета вложенных импортов
+    cumulative: float  # секунды с вложенными импортами
+
+
+def measure_imports(statement: str, python: Optional[str] = None) -> List[ImportTiming]:
+    """
+    Замеряет время импорта в новом процессе интерпретатора (холодный старт)
+    с помощью python -X importtime.
+
+    :param statement: код, например "import main" или "from strategies.registry import get_strategy_class"
+    :return: времена импорта всех загруженных модулей в порядке завершения
+    """
+    completed = subprocess.run([python or sys.executable, '-X', 'importtime', '-c', statement],
+                               cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Ошибка выполнения '{statement}':\n{completed.stderr.strip().splitlines()[-1]}")
+    timings = parse_importtime(completed.stderr)
+    # Импорты запуска самого интерпретатора (site и его зависимости) к команде не относятся
+    site = next((i for i, timing in enumerate(timings) if timing.module == 'site' and timing.depth == 0), -1)
+    return timings[site + 1:]
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        timings.append(ImportTiming(module.strip(), depth, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return timings
+
+
+def is_project_module(module: str) -> bool:
+    return module.split('.')[0] in PROJECT_PACKAGES
+
+
+def render_report(timings: List[ImportTiming], top: int = 15) -> str:
+    total = sum(timing.cumulative for timing in timings if timing.depth == 0)
+    project = [timing for timing in timings if is_project_module(timing.module)]
+    lines = [f"Всего: {total * 1000:.1f} мс, модулей: {len(timings)}, "
+             f"собственное время модулей проекта: {sum(t.self_time for t in project) * 1000:.1f} мс",
+             f"{'Модуль':<50} {'собств., мс':>12} {'всего, мс':>12}"]
+    for timing in sorted(timings, key=lambda t: t.cumulative, reverse=True)[:top]:
+        lines.append(f"{timing.module:<50} {timing.self_time * 1000:>12.1f} {timing.cumulative * 1000:>12.1f}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Отчет о времени импорта при холодном старте")
+    parser.add_argument('statement', nargs='?', default='import main',
+                        help="Код для замера, по умолчанию 'import main'")
+    parser.add_argument('--top', type=int, default=15, help="Количество самых долгих модулей в отчете")
+    args = parser.parse_args()
+    print(render_report(measure_imports(args.statement), args.top))
+
+
+if __name__ == '__main__':
+    main()
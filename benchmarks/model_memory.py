@@ -0,0 +1,87 @@
+import argparse
+import dataclasses
+import gc
+import tracemalloc
+from typing import Callable, Dict, List, Type
+
+from models.codec import encode_batch
+from models.fill import Fill
+from models.order import Order
+from models.position import Position
+
+
+def legacy_model(model: Type) -> Type:
+    """
+    Копия модели в виде обычного dataclass без __slots__ (атрибуты в __dict__
+    экземпляра), как модели были устроены до перехода на slots.
+    """
+    fields = []
+    for field in dataclasses.fields(model):
+        if field.default is dataclasses.MISSING:
+            fields.append((field.name, field.type))
+        else:
+            fields.append((field.name, field.type, dataclasses.field(default=field.default)))
+    return dataclasses.make_dataclass(f'Legacy{model.__name__}', fields)
+
+
+def sample_values(model: Type, count: int) -> List[tuple]:
+    """
+    Значения полей для count экземпляров модели в порядке ее полей.
+    """
+    if model is Order:
+        return [('BTCUSDT', 'BUY' if i % 2 else 'SELL', 'LIMIT', 0.001 * (i + 1), 30000.0 + i,
+                 29900.0 + i, 30100.0 + i, str(i), False) for i in range(count)]
+    if model is Position:
+        return [('BTCUSDT', 'LONG' if i % 2 else 'SHORT', 0.001 * (i + 1), 30000.0 + i, 25000.0, 1.5, 10,
+                 29900.0 + i, 30100.0 + i, str(i)) for i in range(count)]
+    if model is Fill:
+        return [('BTCUSDT', 'BUY' if i % 2 else 'SELL', 0.001 * (i + 1), 30000.0 + i, 0.02, 1.5,
+                 1_700_000_000_000 + i, str(i)) for i in range(count)]
+    raise ValueError(f"Нет тестовых данных для {model}")
+
+
+def allocated_bytes(factory: Callable[[], object]) -> int:
+    """
+    Объем памяти, занятой результатом factory (по tracemalloc).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = factory()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def measure_models(count: int = 10_000) -> Dict[str, Dict[str, float]]:
+    """
+    Сравнивает память на экземпляр: модель без slots, модель со slots и бинарный пакет.
+
+    :return: словарь {модель: {'legacy': байт, 'slots': байт, 'binary': байт}}
+    """
+    report = {}
+    for model in (Order, Position, Fill):
+        values = sample_values(model, count)
+        legacy = legacy_model(model)
+        slotted = [model(*row) for row in values]
+        report[model.__name__] = {
+            'legacy': allocated_bytes(lambda: [legacy(*row) for row in values]) / count,
+            'slots': allocated_bytes(lambda: [model(*row) for row in values]) / count,
+            'binary': len(encode_batch(slotted)) / count
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память на экземпляр моделей Order, Position и Fill")
+    parser.add_argument('--count', type=int, default=10_000)
+    args = parser.parse_args()
+    print(f"{'Модель':<10} {'dataclass, Б':>14} {'slots, Б':>10} {'бинарный, Б':>13}")
+    for name, sizes in measure_models(args.count).items():
+        print(f"{name:<10} {sizes['legacy']:>14.1f} {sizes['slots']:>10.1f} {sizes['binary']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_RESULTS_DIR = os.path.join('results', 'benchmarks')
+
+# Зарегистрированные бенчмарки: имя -> функция-фабрика
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """
+    Регистрирует бенчмарк.
+
+    Функция-фабрика принимает признак быстрого режима и возвращает кортеж
+    (операция без аргументов, количество единиц работы за один вызов).
+    Подготовка данных выполняется в фабрике и в замер не попадает.
+    """
+    def decorator(factory: Callable) -> Callable:
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+def measure(operation: Callable, units: int = 1, repeat: int = 5, min_time: float = 0.2) -> Dict:
+    """
+    Замеряет время выполнения операции.
+
+    Количество вызовов в серии подбирается так, чтобы серия длилась не меньше
+    min_time; из repeat серий берутся медиана и минимум времени на единицу работы.
+
+    :param units: количество единиц работы (тиков, символов, объектов) за один вызов
+    :return: словарь со статистикой в секундах на единицу работы
+    """
+    operation()  # прогрев
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+
+    timings = [elapsed / (number * units)]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        timings.append((time.perf_counter() - started) / (number * units))
+
+    median = statistics.median(timings)
+    return {
+        'median': median,
+        'min': min(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'ops_per_sec': 1.0 / median if median else float('inf'),
+        'calls': number * repeat,
+        'units': units
+    }
+
+
+def run_benchmarks(names: Optional[List[str]] = None, quick: bool = False, repeat: int = 5) -> Dict[str, Dict]:
+    logger = logging.getLogger(__name__)
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        operation, units = factory(quick)
+        results[name] = measure(operation, units, repeat=3 if quick else repeat, min_time=0.05 if quick else 0.2)
+        logger.info(f"{name}: {results[name]['median'] * 1e6:.1f} мкс/ед. ({results[name]['ops_per_sec']:.0f} ед./с)")
+    return results
+
+
+def save_results(results: Dict[str, Dict], results_dir: str = DEFAULT_RESULTS_DIR) -> str:
+    """
+    Сохраняет результаты в JSON-файл с отметкой времени.
+
+    :return: путь к сохраненному файлу
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    report = {
+        'timestamp': time.time(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def latest_results(results_dir: str = DEFAULT_RESULTS_DIR, exclude: Optional[str] = None) -> Optional[str]:
+    paths = sorted(path for path in glob.glob(os.path.join(results_dir, '*.json')) if path != exclude)
+    return paths[-1] if paths else None
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float = 0.1) -> List[Dict]:
+    """
+    Сравнивает медианы с базовым запуском.
+
+    :param threshold: допустимое относительное замедление
+    :return: список сравнений; regression=True для замедлений больше threshold
+    """
+    comparisons = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base or not base.get('median'):
+            continue
+        change = result['median'] / base['median'] - 1.0
+        comparisons.append({'name': name, 'baseline': base['median'], 'current': result['median'],
+                            'change': change, 'regression': change > threshold})
+    return comparisons
+
+
+def main():
+    # Бенчмарки регистрируются в модуле benchmarks.runner при импорте benchmarks.cases;
+    # при запуске через python -m этот файл загружен как __main__, поэтому обращаемся к пакетному модулю
+    from benchmarks import cases, runner  # noqa: F401
+
+    parser = argparse.ArgumentParser(description="Бенчмарки торгового цикла и его компонентов")
+    parser.add_argument('names', nargs='*', help="Фильтр по подстроке имени бенчмарка")
+    parser.add_argument('--quick', action='store_true', help="Уменьшенные объемы данных и серии")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--results-dir', default=DEFAULT_RESULTS_DIR)
+    parser.add_argument('--baseline', default=None, help="Файл результатов для сравнения (по умолчанию предыдущий запуск)")
+    parser.add_argument('--threshold', type=float, default=0.1, help="Допустимое замедление, доля")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Логи стратегий и клиента в замерах не нужны
+    logging.getLogger('strategies').setLevel(logging.WARNING)
+    logging.getLogger('exchange').setLevel(logging.WARNING)
+
+    results = runner.run_benchmarks(args.names, args.quick, args.repeat)
+    path = save_results(results, args.results_dir)
+    print(f"Результаты сохранены в {path}")
+
+    baseline_path = args.baseline or latest_results(args.results_dir, exclude=path)
+    if baseline_path is None:
+        return
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = 0
+    print(f"Сравнение с {baseline_path}:")
+    for item in compare(results, baseline, args.threshold):
+        mark = 'РЕГРЕССИЯ' if item['regression'] else ''
+        regressions += item['regression']
+        print(f"  {item['name']:<45} {item['baseline'] * 1e6:>12.1f} -> {item['current'] * 1e6:>12.1f} мкс "
+              f"({item['change']:+.1%}) {mark}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
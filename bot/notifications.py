@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from exchange.rate_limiter import TokenBucket
+
+# Приоритеты уведомлений: меньшее значение важнее
+PRIORITY_CRITICAL = 0  # ошибки и остановка торговли
+PRIORITY_TRADE = 1  # открытие и закрытие позиций
+PRIORITY_INFO = 2  # перенос стопов и прочие события
+
+# Максимальная длина сообщения Telegram
+MESSAGE_LIMIT = 4096
+
+
+class NotificationQueue:
+    """
+    Асинхронная очередь уведомлений с объединением в сводки.
+
+    notify() можно вызывать из торговых потоков: событие только добавляется
+    в буфер. Цикл событий бота раз в window секунд отправляет накопленные
+    события одной сводкой (критические - сразу), соблюдая лимит сообщений
+    на чат. При переполнении буфера первыми отбрасываются события низкого
+    приоритета, а в сводке указывается число пропущенных.
+    """
+
+    def __init__(self, send: Callable[[int, str], Awaitable], chat_ids: List[int], window: float = 5.0,
+                 max_pending: int = 500, chat_rate: float = 1.0, chat_burst: int = 3, max_lines: int = 30):
+        """
+        :param send: корутина отправки (chat_id, текст)
+        :param window: интервал объединения событий в сводку, секунд
+        :param chat_rate: сообщений в секунду на чат
+        :param max_lines: максимальное число событий в сводке, остальные только подсчитываются
+        """
+        self.send = send
+        self.chat_ids = list(chat_ids)
+        self.window = window
+        self.max_pending = max_pending
+        self.max_lines = max_lines
+        self.logger = logging.getLogger(__name__)
+        self._buckets: Dict[int, TokenBucket] = {chat_id: TokenBucket(chat_rate, chat_burst) for chat_id in chat_ids}
+        self._pending: Dict[int, deque] = {priority: deque() for priority in
+                                           (PRIORITY_CRITICAL, PRIORITY_TRADE, PRIORITY_INFO)}
+        self._size = 0
+        self.dropped = 0
+        self.sent = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._urgent: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self, message: str, priority: int = PRIORITY_TRADE):
+        """
+        Добавляет событие; потокобезопасно и не блокирует вызывающий поток.
+        """
+        if not self.chat_ids:
+            return
+        with self._lock:
+            if self._size >= self.max_pending:
+                lowest = max(p for p, messages in self._pending.items() if messages)
+                if priority >= lowest:
+                    self.dropped += 1
+                    return
+                self._pending[lowest].pop()
+                self._size -= 1
+                self.dropped += 1
+            was_empty = self._size == 0
+            self._pending[priority].append(message)
+            self._size += 1
+        # Цикл событий будим только на первом событии окна и на критических
+        if self._loop is not None and (was_empty or priority == PRIORITY_CRITICAL):
+            try:
+                self._loop.call_soon_threadsafe(self._wake, priority == PRIORITY_CRITICAL)
+            except RuntimeError:
+                # Цикл событий бота уже закрыт
+                pass
+
+    def _wake(self, urgent: bool):
+        self._wakeup.set()
+        if urgent:
+            self._urgent.set()
+
+    def start(self):
+        """
+        Запускает отправку; вызывается внутри цикла событий бота.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._urgent = asyncio.Event()
+        if self._size:
+            self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Ждем окно объединения, критическое событие прерывает ожидание
+            try:
+                await asyncio.wait_for(self._urgent.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+            self._urgent.clear()
+            await self.flush()
+
+    def _drain(self):
+        with self._lock:
+            pending = {priority: list(messages) for priority, messages in self._pending.items()}
+            for messages in self._pending.values():
+                messages.clear()
+            dropped, self.dropped = self.dropped, 0
+            self._size = 0
+        return pending, dropped
+
+    def build_digest(self, pending: Dict[int, List[str]], dropped: int) -> List[str]:
+        """
+        Формирует сводку из накопленных событий.
+
+        :return: список сообщений не длиннее MESSAGE_LIMIT
+        """
+        total = sum(len(messages) for messages in pending.values())
+        if total == 1 and not dropped:
+            return [next(message for messages in pending.values() for message in messages)[:MESSAGE_LIMIT]]
+
+        lines = [f"Сводка событий ({total}):"]
+        shown = 0
+        for priority in sorted(pending):
+            for message in pending[priority]:
+                # Критические события показываются всегда
+                if priority != PRIORITY_CRITICAL and shown >= self.max_lines:
+                    break
+                lines.append(f"{'[!] ' if priority == PRIORITY_CRITICAL else '- '}{message}")
+                shown += 1
+        hidden = total - shown
+        if hidden:
+            lines.append(f"...и еще {hidden} событий")
+        if dropped:
+            lines.append(f"Пропущено при перегрузке: {dropped}")
+
+        chunks, current = [], ''
+        for line in lines:
+            line = line[:MESSAGE_LIMIT]
+            if current and len(current) + len(line) + 1 > MESSAGE_LIMIT:
+                chunks.append(current)
+                current = ''
+            current = f"{current}\n{line}" if current else line
+        chunks.append(current)
+        return chunks
+
+    async def flush(self):
+        pending, dropped = self._drain()
+        if not any(pending.values()) and not dropped:
+            return
+        for text in self.build_digest(pending, dropped):
+            for chat_id in self.chat_ids:
+                await self._send(chat_id, text)
+
+    async def _send(self, chat_id: int, text: str):
+        bucket = self._buckets[chat_id]
+        wait = bucket.wait_time(1, time.monotonic())
+        if wait > 0:
+            await asyncio.sleep(wait)
+            bucket.wait_time(1, time.monotonic())
+        bucket.take()
+        try:
+            await self.send(chat_id, text)
+            self.sent += 1
+        except Exception as e:
+            # Ответ Telegram о превышении лимита содержит retry_after
+            retry_after = getattr(e, 'retry_after', None)
+            if retry_after is None:
+                self.logger.error(f"Ошибка отправки уведомления в чат {chat_id}: {str(e)}")
+                return
+            if hasattr(retry_after, 'total_seconds'):
+                retry_after = retry_after.total_seconds()
+            self.logger.warning(f"Лимит сообщений Telegram, повтор через {retry_after} с")
+            await asyncio.sleep(float(retry_after))
+            try:
+                await self.send(chat_id, text)
+                self.sent += 1
+            except Exception as e:
+                self.logger.error(f"Ошибка отправки уведомления в чат {chat_id}: {str(e)}")
+
+    async def close(self):
+        """
+        Останавливает отправку и отправляет оставшиеся события.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._loop = None
+        await self.flush()
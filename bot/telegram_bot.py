@@ -1,12 +1,25 @@
 import asyncio
 import logging
+import time
+from typing import Dict, Optional
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
+from bot.notifications import PRIORITY_TRADE, NotificationQueue
+from strategies.registry import available_strategies
 
 class TelegramBot:
-    def __init__(self, token: str, trading_robot):
+    def __init__(self, token: str, trading_robot, refresh_timeout: float = 10.0, admin_chat_id: Optional[int] = None,
+                 notification_window: float = 5.0):
         self.application = Application.builder().token(token).build()
         self.trading_robot = trading_robot
+        # Уведомления объединяются в сводки и отправляются администратору с учетом лимитов Telegram
+        self.notifications = NotificationQueue(self._send_message, [admin_chat_id] if admin_chat_id else [],
+                                               window=notification_window)
+        # Максимальное время принудительного обновления статуса (/status refresh)
+        self.refresh_timeout = refresh_timeout
+        # Цикл событий бота (serve) и сигнал его остановки
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._shutdown = asyncio.Event()
 
         # Добавляем обработчики команд
         self.application.add_handler(CommandHandler("start", self.start))
@@ -14,18 +27,45 @@ class TelegramBot:
         self.application.add_handler(CommandHandler("enable", self.enable))
         self.application.add_handler(CommandHandler("disable", self.disable))
         self.application.add_handler(CommandHandler("profit", self.profit))
+        self.application.add_handler(CommandHandler("strategy", self.strategy))
 
-        logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                            level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text('Привет! Я бот для управления торговым роботом. '
-                                        'Используйте команды /status, /enable, /disable, /profit для управления.')
+                                        'Используйте команды /status, /status refresh, /enable, /disable, /profit, /strategy для управления.')
 
     async def status(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        # Статус читается из снимка, опубликованного после последнего цикла, без запросов к бирже
+        note = ''
+        if context.args and context.args[0] == 'refresh':
+            loop = asyncio.get_running_loop()
+            try:
+                await asyncio.wait_for(loop.run_in_executor(None, self.trading_robot.refresh_status),
+                                       self.refresh_timeout)
+            except asyncio.TimeoutError:
+                note = f'\nОбновление не завершилось за {self.refresh_timeout:.0f} с, показан последний снимок.'
+            except Exception as e:
+                self.logger.error(f"Ошибка при обновлении статуса: {str(e)}")
+                note = '\nОшибка обновления, показан последний снимок.'
         status = self.trading_robot.get_status()
-        await update.message.reply_text(f'Статус торгового робота: {status}')
+        await update.message.reply_text(self.format_status(status) + note)
+
+    @staticmethod
+    def format_status(status: Dict) -> str:
+        lines = [f"Статус торгового робота: {'работает' if status.get('is_running') else 'остановлен'}"]
+        if status.get('created_at'):
+            lines.append(f"Снимок №{status.get('version', 0)}, {time.time() - status['created_at']:.0f} с назад")
+        lines.append(f"Баланс: {status.get('account_balance', 0):.2f} USDT")
+        lines.append(f"Нереализованный PnL: {status.get('unrealized_pnl', 0):.2f} USDT")
+        lines.append(f"Последний цикл: {status.get('last_cycle_time', 0):.2f} с")
+        positions = status.get('open_positions', {})
+        lines.append(f"Открытые позиции: {sum(len(p) for p in positions.values())}")
+        for symbol, symbol_positions in sorted(positions.items()):
+            for position in symbol_positions:
+                lines.append(f"  {symbol} {position.side} {position.amount} @ {position.entry_price}, "
+                             f"PnL: {position.unrealized_pnl or 0:.2f}")
+        return '\n'.join(lines)
 
     async def enable(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         self.trading_robot.enable()
@@ -36,18 +76,80 @@ class TelegramBot:
         await update.message.reply_text('Торговый робот выключен.')
 
     async def profit(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        profit = self.trading_robot.get_total_profit()
-        await update.message.reply_text(f'Общая прибыль: {profit:.2f} USDT')
+        pnl = self.trading_robot.get_unrealized_pnl()
+        await update.message.reply_text(f'Нереализованный PnL открытых позиций: {pnl:.2f} USDT')
+
+    async def strategy(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        # Без аргументов показывает текущую стратегию, /strategy NAME запускает горячую замену
+        if not context.args:
+            await update.message.reply_text(f"Текущая стратегия: {self.trading_robot.active_strategy}\n"
+                                            f"Доступные: {', '.join(available_strategies())}\n"
+                                            f"Смена: /strategy NAME")
+            return
+        new_strategy = context.args[0]
+        try:
+            self.trading_robot.change_strategy(new_strategy)
+        except ValueError as e:
+            await update.message.reply_text(str(e))
+            return
+        await update.message.reply_text(f"Стратегия {new_strategy} готовится, замена произойдет между торговыми циклами.")
+
+    def notify(self, message: str, priority: int = PRIORITY_TRADE) -> None:
+        """
+        Ставит уведомление в очередь; можно вызывать из торговых потоков.
+        """
+        self.notifications.notify(message, priority)
+
+    async def send_notification(self, message: str, priority: int = PRIORITY_TRADE) -> None:
+        self.notifications.notify(message, priority)
 
-    async def send_notification(self, message: str) -> None:
-        # В реальном приложении здесь нужно реализовать логику хранения и управления подписками пользователей
-        await self.application.bot.send_message(chat_id=self.trading_robot.config.ADMIN_CHAT_ID, text=message)
+    async def _send_message(self, chat_id: int, text: str) -> None:
+        await self.application.bot.send_message(chat_id=chat_id, text=text)
 
     async def run(self):
         await self.application.initialize()
         await self.application.start()
         await self.application.updater.start_polling()
+        self.notifications.start()
 
     async def stop(self):
+        await self.notifications.close()
+        await self.application.updater.stop()
         await self.application.stop()
-        await self.application.shutdown()
\ No newline at end of file
+        await self.application.shutdown()
+
+    async def _serve(self):
+        await self.run()
+        try:
+            await self._shutdown.wait()
+        finally:
+            await self.stop()
+
+    def serve(self):
+        """
+        Запускает бота в собственном цикле событий текущего потока и блокирует
+        поток до shutdown(). Цикл продолжает работать после запуска опроса:
+        в нем выполняются обработчики команд и отправка сводок уведомлений.
+        """
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        try:
+            loop.run_until_complete(self._serve())
+        finally:
+            self.loop = None
+            loop.close()
+
+    def shutdown(self):
+        """
+        Останавливает serve(); можно вызывать из любого потока.
+        """
+        loop = self.loop
+        if loop is None:
+            self._shutdown.set()
+            return
+        try:
+            loop.call_soon_threadsafe(self._shutdown.set)
+        except RuntimeError:
+            # Цикл событий уже закрыт
+            pass
\ No newline at end of file
@@ -0,0 +1,209 @@
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from exchange.cycle_snapshot import CycleSnapshot
+from exchange.ws_market_stream import bybit_symbol
+from models.order import Order
+from models.position import Position
+
+# Статусы ордеров Bybit, при которых ордер остается активным
+OPEN_ORDER_STATUSES = ('New', 'PartiallyFilled', 'Untriggered')
+
+
+def _float(value) -> Optional[float]:
+    # Bybit передает числа строками, пустая строка означает отсутствие значения
+    if value in (None, ''):
+        return None
+    return float(value)
+
+
+class AccountStateStore(CycleSnapshot):
+    """
+    Локальное состояние позиций, ордеров и баланса аккаунта.
+
+    Обновляется событиями приватного потока Bybit (position, order, execution,
+    wallet) и периодически сверяется с биржей через REST. Предоставляет тот же
+    интерфейс, что и CycleSnapshot, поэтому стратегии и TradingRobot читают
+    позиции и баланс из памяти, а не из сети. Поиск позиций по символу и
+    ордеров по ID выполняется за O(1).
+
+    Пока приватный поток не подключен (или после разрыва), refresh выполняет
+    сверку каждый цикл; при работающем потоке - раз в reconcile_interval секунд.
+    """
+
+    def __init__(self, client, symbols: List[str], reconcile_interval: float = 60.0, max_executions: int = 1000):
+        super().__init__(client)
+        self.reconcile_interval = reconcile_interval
+        self.stream_connected = False
+        self.last_reconcile: Optional[float] = None
+        self.executions: Deque[Dict] = deque(maxlen=max_executions)
+        self.logger = logging.getLogger(__name__)
+
+        self._symbols_by_exchange_name = {bybit_symbol(symbol): symbol for symbol in symbols}
+        # Позиции по символу и стороне
+        self._positions_by_side: Dict[str, Dict[str, Position]] = {}
+        self._orders: Dict[str, Order] = {}
+        self._orders_by_symbol: Dict[str, Dict[str, Order]] = {}
+        # Время последнего события потока по символу, чтобы сверка не затерла более свежие данные
+        self._stream_updates: Dict[str, float] = {}
+
+    # Сверка с REST
+
+    def refresh(self, symbols: List[str]):
+        now = time.monotonic()
+        if (self.stream_connected and self.last_reconcile is not None
+                and now - self.last_reconcile < self.reconcile_interval):
+            return
+        self.reconcile(symbols)
+
+    def reconcile(self, symbols: List[str]):
+        """
+        Заменяет локальное состояние данными REST, кроме символов, по которым
+        во время запроса пришли события потока.
+        """
+        started = time.monotonic()
+        try:
+            positions = self.client.get_all_open_positions(symbols)
+            balance = self.client.get_balance_summary()
+            get_open_orders = getattr(self.client, 'get_open_orders', None)
+            orders = get_open_orders(symbols) if get_open_orders else None
+        except Exception as e:
+            self.logger.error(f"Ошибка при сверке состояния аккаунта: {str(e)}")
+            return
+
+        with self._lock:
+            for symbol in symbols:
+                if self._stream_updates.get(symbol, 0.0) > started:
+                    continue
+                self._positions_by_side[symbol] = {position.side: position for position in positions.get(symbol, [])}
+                self._positions[symbol] = list(positions.get(symbol, []))
+                if orders is not None:
+                    for order_id in list(self._orders_by_symbol.get(symbol, {})):
+                        del self._orders[order_id]
+                    self._orders_by_symbol[symbol] = {order.order_id: order for order in orders.get(symbol, [])}
+                    self._orders.update(self._orders_by_symbol[symbol])
+            self.balance = balance['total']
+            self.available_balance = balance['free']
+            self.timestamp = time.time()
+            self.last_reconcile = started
+
+    def mark_stale(self):
+        """
+        Поток разорван: до переподключения сверяемся с REST каждый цикл.
+        """
+        self.stream_connected = False
+
+    # События приватного потока
+
+    def apply_message(self, message: Dict):
+        topic = message.get('topic', '')
+        handler = {
+            'position': self._apply_position,
+            'order': self._apply_order,
+            'execution': self._apply_execution,
+            'wallet': self._apply_wallet
+        }.get(topic.split('.')[0])
+        if handler is None:
+            return
+        with self._lock:
+            for item in message.get('data', []):
+                handler(item)
+            self.timestamp = time.time()
+
+    def _symbol(self, item: Dict) -> Optional[str]:
+        return self._symbols_by_exchange_name.get(item.get('symbol'))
+
+    def _apply_position(self, item: Dict):
+        symbol = self._symbol(item)
+        if symbol is None:
+            return
+        positions = self._positions_by_side.setdefault(symbol, {})
+        size = _float(item.get('size')) or 0.0
+        # positionIdx: 0 - режим one-way (одна позиция на символ), 1/2 - длинная/короткая в hedge-режиме
+        idx = int(item.get('positionIdx', 0))
+        if idx == 0:
+            positions.clear()
+        else:
+            positions.pop('LONG' if idx == 1 else 'SHORT', None)
+        if size > 0:
+            position = Position(
+                symbol=symbol,
+                side='LONG' if item['side'] == 'Buy' else 'SHORT',
+                amount=size,
+                entry_price=_float(item.get('entryPrice')),
+                liquidation_price=_float(item.get('liqPrice')),
+                unrealized_pnl=_float(item.get('unrealisedPnl')),
+                leverage=_float(item.get('leverage'))
+            )
+            positions[position.side] = position
+        self._positions[symbol] = list(positions.values())
+        self._stream_updates[symbol] = time.monotonic()
+
+    def _apply_order(self, item: Dict):
+        symbol = self._symbol(item)
+        if symbol is None:
+            return
+        order_id = item['orderId']
+        by_symbol = self._orders_by_symbol.setdefault(symbol, {})
+        if item.get('orderStatus') in OPEN_ORDER_STATUSES:
+            trigger_price = _float(item.get('triggerPrice'))
+            order = Order(
+                symbol=symbol,
+                side=item['side'].upper(),
+                order_type='STOP' if trigger_price else item.get('orderType', 'Market').upper(),
+                quantity=_float(item.get('qty')),
+                price=trigger_price or _float(item.get('price')),
+                stop_loss=_float(item.get('stopLoss')),
+                take_profit=_float(item.get('takeProfit')),
+                order_id=order_id,
+                reduce_only=bool(item.get('reduceOnly', False))
+            )
+            self._orders[order_id] = order
+            by_symbol[order_id] = order
+        else:
+            self._orders.pop(order_id, None)
+            by_symbol.pop(order_id, None)
+        self._stream_updates[symbol] = time.monotonic()
+
+    def _apply_execution(self, item: Dict):
+        symbol = self._symbol(item)
+        if symbol is None:
+            return
+        self.executions.append({
+            'symbol': symbol,
+            'order_id': item.get('orderId'),
+            'side': item.get('side', '').upper(),
+            'price': _float(item.get('execPrice')),
+            'quantity': _float(item.get('execQty')),
+            'fee': _float(item.get('execFee')),
+            'timestamp': int(item.get('execTime') or 0)
+        })
+
+    def _apply_wallet(self, item: Dict):
+        for coin in item.get('coin', []):
+            if coin.get('coin') != 'USDT':
+                continue
+            # Баланс кошелька без нереализованного PnL - то же значение, что total в get_balance_summary;
+            # иначе каждая сверка меняла бы баланс на нереализованный PnL и искажала дневной убыток
+            wallet_balance = _float(coin.get('walletBalance'))
+            if wallet_balance is not None:
+                self.balance = wallet_balance
+            available = _float(coin.get('availableToWithdraw'))
+            if available is not None:
+                self.available_balance = available
+
+    # Чтение состояния
+
+    def get_order(self, order_id: str) -> Optional[Order]:
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def get_open_orders(self, symbol: str) -> List[Order]:
+        with self._lock:
+            return list(self._orders_by_symbol.get(symbol, {}).values())
+
+    def get_executions(self, symbol: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            return [execution for execution in self.executions if symbol is None or execution['symbol'] == symbol]
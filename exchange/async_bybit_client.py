@@ -0,0 +1,61 @@
+import ccxt.async_support as ccxt_async
+from typing import Dict, Optional, Tuple
+from exchange.candle_buffer import CandleBuffer, get_buffer, merge_fetched
+from exchange.markets_cache import DEFAULT_MARKETS_CACHE_PATH, load_markets_cache
+from exchange.rate_limiter import ENDPOINT_MARKET, PRIORITY_POLLING, RateLimitScheduler
+
+
+class AsyncBybitClient:
+    """
+    Асинхронный клиент Bybit для получения рыночных данных.
+
+    Используется движком AsyncTradingEngine, чтобы запрашивать свечи
+    по всем символам одновременно, не блокируя цикл событий. Частота
+    запросов ограничивается планировщиком, общим с синхронным BybitClient.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, markets_cache_path: str = DEFAULT_MARKETS_CACHE_PATH,
+                 rate_limiter: Optional[RateLimitScheduler] = None):
+        self.exchange = ccxt_async.bybit({
+            'apiKey': api_key,
+            'secret': api_secret,
+            'enableRateLimit': False,
+            'options': {
+                'defaultType': 'future'
+            }
+        })
+        self.candle_buffers: Dict[Tuple[str, str], CandleBuffer] = {}
+        self.rate_limiter = rate_limiter or RateLimitScheduler()
+
+        # Используем метаданные рынков, уже загруженные синхронным клиентом
+        cached = load_markets_cache(markets_cache_path)
+        if cached is not None:
+            markets, currencies = cached
+            self.exchange.set_markets(markets, currencies)
+
+    async def get_market_data(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> Dict:
+        buffer = get_buffer(self.candle_buffers, symbol, timeframe, limit)
+
+        # При нехватке бюджета запросов опрос отбрасывается и возвращаются уже загруженные свечи
+        timeout = self.rate_limiter.max_poll_wait if len(buffer) else None
+        if not await self.rate_limiter.acquire_async(ENDPOINT_MARKET, PRIORITY_POLLING, timeout):
+            return buffer.as_market_data()
+
+        ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, since=buffer.last_timestamp, limit=limit)
+        if not merge_fetched(buffer, ohlcv, limit):
+            await self.rate_limiter.acquire_async(ENDPOINT_MARKET, PRIORITY_POLLING)
+            buffer.update(await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit))
+        return buffer.as_market_data()
+
+    def warm_start(self, store, symbol: str, timeframe: str = '1m', limit: int = 100) -> int:
+        """
+        Заполняет буфер свечей из локального архива, чтобы после перезапуска
+        догружать с биржи только недостающие свечи.
+
+        :param store: архив свечей CandleStore
+        :return: количество загруженных свечей
+        """
+        return get_buffer(self.candle_buffers, symbol, timeframe, limit).load(store.tail(symbol, timeframe, limit))
+
+    async def close(self):
+        await self.exchange.close()
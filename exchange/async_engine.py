@@ -0,0 +1,130 @@
+import asyncio
+import inspect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from exchange.scheduler import BarCloseScheduler
+from utils.metrics import metrics
+
+
+class AsyncTradingEngine:
+    """
+    Движок конкурентного опроса символов.
+
+    Рыночные данные по всем символам запрашиваются одновременно через
+    ccxt.async_support, а синхронные стратегии (BaseTradingRobot) выполняются
+    в пуле потоков. Количество одновременно обрабатываемых символов
+    ограничивается параметром max_concurrency.
+
+    Циклы запускаются планировщиком сразу после закрытия бара. Если новая
+    свеча еще не появилась, запрос повторяется до new_bar_retries раз, а при
+    отсутствии новых данных анализ символа пропускается.
+
+    Фоновые сервисы (services, например приватный WebSocket-поток) запускаются
+    вместе с движком в его цикле событий и закрываются при остановке.
+    """
+
+    def __init__(self, robot, market_data_client, scheduler: BarCloseScheduler, max_concurrency: int = 10,
+                 new_bar_retries: int = 3, retry_delay: float = 0.5, services: Optional[List] = None):
+        self.robot = robot
+        self.market_data_client = market_data_client
+        self.scheduler = scheduler
+        self.max_concurrency = max_concurrency
+        self.new_bar_retries = new_bar_retries
+        self.retry_delay = retry_delay
+        self.services = services or []
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="strategy")
+        self.last_cycle_time = 0.0
+        self.skipped_symbols = 0
+        self._last_bar_timestamps: Dict[str, int] = {}
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self):
+        for service in self.services:
+            service.start()
+        try:
+            first_cycle = True
+            while self.robot.is_running:
+                # Первый цикл выполняется сразу, следующие - по закрытию бара
+                lateness = 0.0 if first_cycle else await self.scheduler.wait()
+                first_cycle = False
+                if not self.robot.is_running:
+                    break
+
+                started = time.monotonic()
+                self.skipped_symbols = 0
+                await self.run_cycle(self.robot.symbols)
+                self.last_cycle_time = time.monotonic() - started
+                metrics.observe('cycle', self.last_cycle_time)
+                self.robot.publish_status()
+                if self.robot.state_save_due():
+                    # Снимок собирается между циклами, а запись на диск идет в пуле потоков
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(self.executor, self.robot.save_state, self.robot.collect_state())
+                self.logger.info(f"Цикл обработки {len(self.robot.symbols)} символов занял {self.last_cycle_time:.2f} с "
+                                 f"(опоздание пробуждения {lateness:.3f} с, пропущено без новых данных: {self.skipped_symbols})")
+        finally:
+            await self.close()
+
+    async def run_cycle(self, symbols: List[str]):
+        # Подготовленная замена стратегии применяется только между циклами,
+        # весь цикл работает с одним набором стратегий
+        self.robot.apply_pending_strategies()
+        strategies = self.robot.strategies
+        loop = asyncio.get_running_loop()
+        # Один запрос позиций и один запрос баланса на весь цикл, параллельно с загрузкой свечей
+        snapshot_ready = loop.run_in_executor(self.executor, self.robot.refresh_snapshot)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*(self._process_symbol(strategies[symbol], symbol, semaphore, snapshot_ready)
+                               for symbol in symbols))
+
+    async def _process_symbol(self, strategy, symbol: str, semaphore: asyncio.Semaphore,
+                              snapshot_ready: asyncio.Future):
+        async with semaphore:
+            try:
+                self.logger.debug(f"Обработка символа: {symbol}", extra={'symbol': symbol})
+                market_data = await self._fetch_new_bar(symbol)
+                if market_data is None:
+                    self.skipped_symbols += 1
+                    return
+                await asyncio.shield(snapshot_ready)
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, self._run_strategy, strategy, symbol, market_data)
+            except Exception as e:
+                self.logger.error(f"Ошибка при обработке символа {symbol}: {str(e)}", exc_info=True,
+                                  extra={'symbol': symbol})
+
+    async def _fetch_new_bar(self, symbol: str) -> Optional[Dict]:
+        """
+        Загружает свечи и проверяет, что с прошлого цикла появился новый бар.
+
+        :return: рыночные данные или None, если новых данных нет
+        """
+        last_processed = self._last_bar_timestamps.get(symbol)
+        for attempt in range(self.new_bar_retries + 1):
+            with metrics.timer('candle_fetch', symbol):
+                market_data = self.market_data_client.get_market_data(symbol, self.scheduler.timeframe)
+                if inspect.isawaitable(market_data):
+                    market_data = await market_data
+            timestamps = market_data['timestamp']
+            if len(timestamps) and (last_processed is None or timestamps[-1] > last_processed):
+                self._last_bar_timestamps[symbol] = int(timestamps[-1])
+                return market_data
+            if attempt < self.new_bar_retries:
+                await asyncio.sleep(self.retry_delay)
+        return None
+
+    def _run_strategy(self, strategy, symbol: str, market_data: Dict):
+        self.logger.debug(f"Выполнение стратегии {type(strategy).__name__} для {symbol}", extra={'symbol': symbol})
+        with metrics.timer('indicators', symbol):
+            strategy.analyze_market(market_data)
+        with metrics.timer('signals', symbol):
+            strategy.execute_strategy()
+
+    async def close(self):
+        for service in self.services:
+            await service.close()
+        await self.market_data_client.close()
+        self.executor.shutdown(wait=False)
@@ -1,44 +1,131 @@
+import logging
+import threading
 import ccxt
-import pandas as pd
-from typing import Dict, List
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+from exchange.candle_buffer import CandleBuffer, get_buffer, merge_fetched
+from exchange.markets_cache import DEFAULT_MARKETS_CACHE_PATH, load_markets_cache, save_markets_cache
+from exchange.rate_limiter import (ENDPOINT_ACCOUNT, ENDPOINT_MARKET, ENDPOINT_ORDER, PRIORITY_ACCOUNT,
+                                   PRIORITY_ORDER, PRIORITY_POLLING, RateLimitScheduler)
 from models.order import Order
 from models.position import Position
+from utils.metrics import metrics
 
 class BybitClient:
-    def __init__(self, api_key: str, api_secret: str):
+    _shared_clients: Dict[str, 'BybitClient'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, api_key: str, api_secret: str, pool_size: int = 32,
+                 markets_cache_path: str = DEFAULT_MARKETS_CACHE_PATH,
+                 rate_limiter: Optional[RateLimitScheduler] = None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.logger = logging.getLogger(__name__)
         self.exchange = ccxt.bybit({
             'apiKey': api_key,
             'secret': api_secret,
-            'enableRateLimit': True,
+            # Частоту запросов ограничивает общий планировщик rate_limiter
+            'enableRateLimit': False,
             'options': {
                 'defaultType': 'future'
             }
         })
+        self.candle_buffers: Dict[Tuple[str, str], CandleBuffer] = {}
 
-    def get_market_data(self, symbol: str) -> Dict:
-        ohlcv = self.exchange.fetch_ohlcv(symbol, '1m', limit=100)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        return {
-            'open': df['open'].tolist(),
-            'high': df['high'].tolist(),
-            'low': df['low'].tolist(),
-            'close': df['close'].tolist(),
-            'volume': df['volume'].tolist()
-        }
+        # Пул keep-alive соединений, рассчитанный на одновременные запросы из нескольких потоков
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.exchange.session.mount('https://', adapter)
+
+        # Единый планировщик частоты запросов с приоритетом ордеров; его же использует AsyncBybitClient
+        self.rate_limiter = rate_limiter or RateLimitScheduler()
+
+        self.markets_cache_path = markets_cache_path
+        self._load_markets()
+
+    @classmethod
+    def shared(cls, api_key: str, api_secret: str, rate_limiter: Optional[RateLimitScheduler] = None) -> 'BybitClient':
+        """
+        Возвращает общий экземпляр клиента для указанного API-ключа.
+
+        Все стратегии и торговый робот используют один клиент, а значит одну
+        HTTP-сессию, один ограничитель частоты и одну загрузку метаданных рынков.
+        """
+        with cls._shared_lock:
+            client = cls._shared_clients.get(api_key)
+            if client is None:
+                client = cls(api_key, api_secret, rate_limiter=rate_limiter)
+                cls._shared_clients[api_key] = client
+            return client
+
+    def _load_markets(self):
+        cached = load_markets_cache(self.markets_cache_path)
+        if cached is not None:
+            markets, currencies = cached
+            self.exchange.set_markets(markets, currencies)
+            return
+
+        try:
+            self.rate_limiter.acquire(ENDPOINT_MARKET, PRIORITY_ACCOUNT)
+            self.exchange.load_markets()
+            save_markets_cache(self.exchange.markets, self.exchange.currencies, self.markets_cache_path)
+        except Exception as e:
+            self.logger.error(f"Ошибка при загрузке метаданных рынков: {str(e)}")
+
+    def get_market_data(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> Dict:
+        buffer = get_buffer(self.candle_buffers, symbol, timeframe, limit)
+
+        # При нехватке бюджета запросов опрос отбрасывается и возвращаются уже загруженные свечи
+        timeout = self.rate_limiter.max_poll_wait if len(buffer) else None
+        if not self.rate_limiter.acquire(ENDPOINT_MARKET, PRIORITY_POLLING, timeout):
+            return buffer.as_market_data()
+
+        ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=buffer.last_timestamp, limit=limit)
+        if not merge_fetched(buffer, ohlcv, limit):
+            self.rate_limiter.acquire(ENDPOINT_MARKET, PRIORITY_POLLING)
+            buffer.update(self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit))
+        return buffer.as_market_data()
+
+    def warm_start(self, store, symbol: str, timeframe: str = '1m', limit: int = 100) -> int:
+        """
+        Заполняет буфер свечей из локального архива, чтобы после перезапуска
+        догружать с биржи только недостающие свечи.
+
+        :param store: архив свечей CandleStore
+        :return: количество загруженных свечей
+        """
+        return get_buffer(self.candle_buffers, symbol, timeframe, limit).load(store.tail(symbol, timeframe, limit))
 
     def place_order(self, order: Order) -> bool:
         try:
-            result = self.exchange.create_order(
-                symbol=order.symbol,
-                type=order.order_type,
-                side=order.side,
-                amount=order.quantity,
-                price=order.price,
-                params={
-                    'stopLoss': order.stop_loss,
-                    'takeProfit': order.take_profit
-                }
-            )
+            params = {}
+            if order.stop_loss is not None:
+                params['stopLoss'] = order.stop_loss
+            if order.take_profit is not None:
+                params['takeProfit'] = order.take_profit
+            if order.reduce_only:
+                params['reduceOnly'] = True
+
+            order_type = order.order_type.lower()
+            price = order.price
+            if order_type == 'stop':
+                # Стоп-ордер - рыночный ордер, срабатывающий при достижении цены
+                order_type = 'market'
+                params['triggerPrice'] = order.price
+                params.pop('stopLoss', None)
+                params.pop('takeProfit', None)
+            if order_type == 'market':
+                price = None
+
+            self.rate_limiter.acquire(ENDPOINT_ORDER, PRIORITY_ORDER)
+            with metrics.timer('order_round_trip', order.symbol):
+                result = self.exchange.create_order(
+                    symbol=order.symbol,
+                    type=order_type,
+                    side=order.side.lower(),
+                    amount=order.quantity,
+                    price=price,
+                    params=params
+                )
             order.order_id = result['id']  # Сохраняем ID ордера
             return True
         except Exception as e:
@@ -47,7 +134,9 @@ class BybitClient:
         
     def cancel_order(self, symbol: str, order_id: str) -> bool:
         try:
-            self.exchange.cancel_order(order_id, symbol)
+            self.rate_limiter.acquire(ENDPOINT_ORDER, PRIORITY_ORDER)
+            with metrics.timer('order_round_trip', symbol):
+                self.exchange.cancel_order(order_id, symbol)
             return True
         except Exception as e:
             print(f"Ошибка при отмене ордера: {str(e)}")
@@ -55,27 +144,86 @@ class BybitClient:
 
     def get_open_positions(self, symbol: str) -> List[Position]:
         try:
+            self.rate_limiter.acquire(ENDPOINT_ACCOUNT, PRIORITY_ACCOUNT)
             positions = self.exchange.fetch_positions([symbol], {'category': 'linear'})
-            return [Position(
-                symbol=pos['symbol'],
-                side='LONG' if pos['side'] == 'buy' else 'SHORT',
-                amount=pos['contracts'],
-                entry_price=pos['entryPrice'],
-                liquidation_price=pos['liquidationPrice'],
-                unrealized_pnl=pos['unrealizedPnl'],
-                leverage=pos['leverage']
-            ) for pos in positions if pos['contracts'] > 0]
+            return [self._to_position(pos) for pos in positions if pos['contracts'] > 0]
         except Exception as e:
             print(f"Ошибка при получении открытых позиций: {str(e)}")
             return []
 
+    def get_all_open_positions(self, symbols: List[str]) -> Dict[str, List[Position]]:
+        """
+        Получает открытые позиции по всем символам одним запросом.
+
+        :param symbols: список символов
+        :return: словарь {символ: список позиций}
+        """
+        self.rate_limiter.acquire(ENDPOINT_ACCOUNT, PRIORITY_ACCOUNT)
+        positions = self.exchange.fetch_positions(symbols, {'category': 'linear'})
+        # Биржа возвращает унифицированные символы ccxt, сопоставляем их с запрошенными
+        requested = {self._unified_symbol(symbol): symbol for symbol in symbols}
+        result: Dict[str, List[Position]] = {symbol: [] for symbol in symbols}
+        for pos in positions:
+            symbol = requested.get(pos['symbol'])
+            if symbol is not None and pos['contracts'] and pos['contracts'] > 0:
+                result[symbol].append(self._to_position(pos))
+        return result
+
+    def get_open_orders(self, symbols: List[str]) -> Dict[str, List[Order]]:
+        """
+        Получает активные ордера по всем символам одним запросом.
+
+        :param symbols: список символов
+        :return: словарь {символ: список ордеров}
+        """
+        self.rate_limiter.acquire(ENDPOINT_ACCOUNT, PRIORITY_ACCOUNT)
+        orders = self.exchange.fetch_open_orders(params={'category': 'linear', 'settleCoin': 'USDT'})
+        requested = {self._unified_symbol(symbol): symbol for symbol in symbols}
+        result: Dict[str, List[Order]] = {symbol: [] for symbol in symbols}
+        for order in orders:
+            symbol = requested.get(order['symbol'])
+            if symbol is None:
+                continue
+            trigger_price = order.get('triggerPrice')
+            result[symbol].append(Order(
+                symbol=symbol,
+                side=order['side'].upper(),
+                order_type='STOP' if trigger_price else order['type'].upper(),
+                quantity=order['amount'],
+                price=trigger_price or order.get('price'),
+                stop_loss=order.get('stopLossPrice'),
+                take_profit=order.get('takeProfitPrice'),
+                order_id=order['id'],
+                reduce_only=bool(order.get('reduceOnly'))
+            ))
+        return result
+
+    def _unified_symbol(self, symbol: str) -> str:
+        try:
+            return self.exchange.market(symbol)['symbol']
+        except Exception:
+            return symbol
+
+    @staticmethod
+    def _to_position(pos: Dict) -> Position:
+        return Position(
+            symbol=pos['symbol'],
+            side='LONG' if pos['side'] in ('buy', 'long') else 'SHORT',
+            amount=pos['contracts'],
+            entry_price=pos['entryPrice'],
+            liquidation_price=pos['liquidationPrice'],
+            unrealized_pnl=pos['unrealizedPnl'],
+            leverage=pos['leverage']
+        )
+
     def close_position(self, position: Position) -> bool:
         try:
+            self.rate_limiter.acquire(ENDPOINT_ORDER, PRIORITY_ORDER)
             self.exchange.create_market_order(
                 symbol=position.symbol,
                 side='sell' if position.side == 'LONG' else 'buy',
                 amount=position.amount,
-                params={'reduce_only': True}
+                params={'reduceOnly': True}
             )
             return True
         except Exception as e:
@@ -84,8 +232,29 @@ class BybitClient:
 
     def get_account_balance(self) -> float:
         try:
+            self.rate_limiter.acquire(ENDPOINT_ACCOUNT, PRIORITY_ACCOUNT)
             balance = self.exchange.fetch_balance()
             return balance['total']['USDT']
         except Exception as e:
             print(f"Ошибка при получении баланса аккаунта: {str(e)}")
-            return 0.0
\ No newline at end of file
+            return 0.0
+
+    def get_available_balance(self) -> float:
+        try:
+            self.rate_limiter.acquire(ENDPOINT_ACCOUNT, PRIORITY_ACCOUNT)
+            balance = self.exchange.fetch_balance()
+            return balance['free']['USDT']
+        except Exception as e:
+            print(f"Ошибка при получении доступного баланса: {str(e)}")
+            return 0.0
+
+    def get_balance_summary(self) -> Dict[str, float]:
+        """
+        Получает общий и доступный баланс USDT одним запросом.
+        """
+        self.rate_limiter.acquire(ENDPOINT_ACCOUNT, PRIORITY_ACCOUNT)
+        balance = self.exchange.fetch_balance()
+        return {
+            'total': balance['total'].get('USDT', 0.0),
+            'free': balance['free'].get('USDT', 0.0)
+        }
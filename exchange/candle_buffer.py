@@ -0,0 +1,132 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+class CandleBuffer:
+    """
+    Кольцевой буфер свечей OHLCV для одной пары (символ, таймфрейм).
+
+    Данные хранятся по колонкам в массивах NumPy удвоенной емкости: новые свечи
+    дописываются в конец, а при заполнении последние capacity свечей переносятся
+    в начало. Поэтому окно всегда непрерывно и отдается стратегиям срезами
+    без копирования, а добавление свечи в среднем занимает O(1).
+    """
+
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity * 2, dtype=np.int64)
+        self._values = np.zeros((len(self.COLUMNS), capacity * 2), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if self._end == self._start:
+            return None
+        return int(self._timestamps[self._end - 1])
+
+    def clear(self):
+        self._start = 0
+        self._end = 0
+
+    def update(self, ohlcv: List[List[float]]) -> int:
+        """
+        Добавляет свечи в формате ccxt [timestamp, open, high, low, close, volume].
+
+        Свеча с тем же временем открытия, что и последняя в буфере, обновляет ее
+        на месте (незакрытый бар), более старые свечи игнорируются.
+
+        :param ohlcv: список свечей, отсортированный по времени
+        :return: количество добавленных новых свечей
+        """
+        added = 0
+        for candle in ohlcv:
+            timestamp = int(candle[0])
+            last_timestamp = self.last_timestamp
+            if last_timestamp is not None and timestamp < last_timestamp:
+                continue
+            if last_timestamp is None or timestamp > last_timestamp:
+                self._append_slot()
+                added += 1
+            index = self._end - 1
+            self._timestamps[index] = timestamp
+            self._values[:, index] = candle[1:6]
+        return added
+
+    def load(self, candles: Dict[str, np.ndarray]) -> int:
+        """
+        Добавляет свечи из словаря массивов (например, из CandleStore).
+
+        :return: количество добавленных новых свечей
+        """
+        columns = [candles['timestamp']] + [candles[column] for column in self.COLUMNS]
+        return self.update(np.column_stack(columns)[-self.capacity:])
+
+    def _append_slot(self):
+        if self._end == len(self._timestamps):
+            # Переносим последние capacity - 1 свечей в начало массивов
+            keep = self.capacity - 1
+            self._timestamps[:keep] = self._timestamps[self._end - keep:self._end]
+            self._values[:, :keep] = self._values[:, self._end - keep:self._end]
+            self._start = 0
+            self._end = keep
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def as_market_data(self) -> Dict[str, np.ndarray]:
+        """
+        Возвращает окно свечей в формате market_data.
+
+        Массивы являются представлениями буфера и действительны до следующего
+        вызова update.
+        """
+        window = slice(self._start, self._end)
+        market_data = {'timestamp': self._timestamps[window]}
+        for i, column in enumerate(self.COLUMNS):
+            market_data[column] = self._values[i, window]
+        return market_data
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """
+        Копия окна свечей в формате market_data, не зависящая от последующих update.
+        Нужна, когда буфер обновляется в другом потоке во время чтения окна.
+        """
+        window = slice(self._start, self._end)
+        market_data = {'timestamp': self._timestamps[window].copy()}
+        values = self._values[:, window].copy()
+        for i, column in enumerate(self.COLUMNS):
+            market_data[column] = values[i]
+        return market_data
+
+
+def get_buffer(buffers: Dict[Tuple[str, str], CandleBuffer], symbol: str, timeframe: str,
+               limit: int) -> CandleBuffer:
+    """
+    Буфер пары (символ, таймфрейм) из словаря буферов клиента; создается при первом обращении.
+    """
+    buffer = buffers.get((symbol, timeframe))
+    if buffer is None:
+        buffer = CandleBuffer(limit)
+        buffers[(symbol, timeframe)] = buffer
+    return buffer
+
+
+def merge_fetched(buffer: CandleBuffer, ohlcv: List[List[float]], limit: int) -> bool:
+    """
+    Объединяет с буфером свечи, запрошенные начиная с buffer.last_timestamp
+    (последняя сохраненная свеча могла измениться), или все окно для пустого буфера.
+
+    :return: False, если пропущено больше свечей, чем помещается в окно, - буфер
+        очищен и окно нужно загрузить заново
+    """
+    if buffer.last_timestamp is not None and len(ohlcv) >= limit:
+        buffer.clear()
+        return False
+    buffer.update(ohlcv)
+    return True
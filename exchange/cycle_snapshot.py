@@ -0,0 +1,46 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from models.position import Position
+
+
+class CycleSnapshot:
+    """
+    Снимок позиций и баланса аккаунта на один торговый цикл.
+
+    В начале цикла выполняется один запрос позиций по всем символам и один
+    запрос баланса. Стратегии, менеджер рисков и get_status читают данные
+    из снимка, не обращаясь к бирже повторно.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._positions: Dict[str, List[Position]] = {}
+        self.balance = 0.0
+        self.available_balance = 0.0
+        self.timestamp: Optional[float] = None
+
+    def refresh(self, symbols: List[str]):
+        try:
+            positions = self.client.get_all_open_positions(symbols)
+            balance = self.client.get_balance_summary()
+        except Exception as e:
+            self.logger.error(f"Ошибка при обновлении снимка позиций и баланса: {str(e)}")
+            return
+
+        with self._lock:
+            self._positions = positions
+            self.balance = balance['total']
+            self.available_balance = balance['free']
+            self.timestamp = time.time()
+
+    def get_positions(self, symbol: str) -> List[Position]:
+        with self._lock:
+            return list(self._positions.get(symbol, []))
+
+    def get_all_positions(self) -> Dict[str, List[Position]]:
+        with self._lock:
+            return {symbol: list(positions) for symbol, positions in self._positions.items()}
@@ -1,126 +1,359 @@
 import asyncio
 import threading
-import time
 import logging
-from typing import Dict, List
-from exchange.bybit_client import BybitClient
-from strategies.strategy1 import ScalpingStrategy1
-from strategies.strategy2 import ScalpingStrategy2
-from strategies.strategy3 import ScalpingStrategy3
-from utils.risk_manager import RiskManager
-from bot.telegram_bot import TelegramBot
-from utils.strategy_visualizer import initialize_visualizer
+import time
+from typing import Dict, List, Optional, Tuple
+from exchange.async_engine import AsyncTradingEngine
+from exchange.cycle_snapshot import CycleSnapshot
+from exchange.scheduler import BarCloseScheduler
+from exchange.status_snapshot import StatusPublisher
+from strategies.registry import get_strategy_class
+from utils.risk_manager import ReservationBatcher, RiskManager
+from storage.state_store import StateStore
+from bot.notifications import PRIORITY_CRITICAL, PRIORITY_TRADE
+from utils.metrics import MetricsServer, metrics
+
+# Клиенты ccxt, WebSocket-потоки, Telegram и визуализатор импортируются
+# только при использовании: для запуска с SimulatedExchange или без бота
+# их загрузка не нужна.
 
 class TradingRobot:
-    def __init__(self, api_key: str, api_secret: str, symbols: List[str], telegram_token: str,
-                 max_position_size: float, max_daily_loss: float, max_drawdown: float, active_strategy: str = "ScalpingStrategy1"):
-        self.client = BybitClient(api_key, api_secret)
-        self.risk_manager = RiskManager(max_position_size, max_daily_loss, max_drawdown)
+    def __init__(self, api_key: str, api_secret: str, symbols: List[str], telegram_token: Optional[str],
+                 max_position_size: float, max_daily_loss: float, max_drawdown: float, active_strategy: str = "ScalpingStrategy1",
+                 max_concurrency: int = 10, timeframe: str = '1m', bar_close_offset: float = 1.0, candle_store=None,
+                 client=None, enable_visualizer: bool = True, visualizer_mode: str = 'tk', visualizer_port: int = 8050,
+                 metrics_port: Optional[int] = None, enable_profiler: bool = False, market_data_mode: str = 'rest',
+                 private_stream: bool = False, reconcile_interval: float = 60.0,
+                 risk_manager: Optional[RiskManager] = None, rate_limiter=None, admin_chat_id: Optional[int] = None,
+                 state_dir: Optional[str] = None, state_interval: float = 60.0,
+                 max_total_exposure: Optional[float] = None, max_symbol_exposure: Optional[float] = None):
+        # client позволяет подставить другую реализацию интерфейса BybitClient, например SimulatedExchange
+        self.client = client
+        if client is None:
+            from exchange.bybit_client import BybitClient
+            self.client = BybitClient.shared(api_key, api_secret, rate_limiter)
+        # risk_manager позволяет подставить общий для нескольких процессов SharedRiskManager
+        self.risk_manager = risk_manager or RiskManager(max_position_size, max_daily_loss, max_drawdown,
+                                                        max_total_exposure, max_symbol_exposure)
+        # Входы стратегий, сработавших в цикле одновременно, проверяются пачкой
+        self.reservations = ReservationBatcher(self.risk_manager)
         self.symbols = symbols
         self.strategies = {}
         self.is_running = False
-        self.total_profit = 0
         self.logger = logging.getLogger(__name__)
         self.active_strategy = active_strategy
+        # Подготовленный в фоне набор стратегий, ожидающий замены между циклами
+        self._pending_strategies: Optional[Tuple[str, Dict]] = None
+        self._swap_lock = threading.Lock()
+        # Снимок статуса публикуется после каждого цикла и читается без обращения к бирже
+        self.status = StatusPublisher()
+        services = []
+        if private_stream and client is None:
+            from exchange.account_state import AccountStateStore
+            from exchange.ws_private_stream import BybitPrivateStream
+            # Позиции, ордера и баланс обновляются событиями приватного потока, REST - только для сверки
+            self.snapshot = AccountStateStore(self.client, symbols, reconcile_interval)
+            services.append(BybitPrivateStream(api_key, api_secret, self.snapshot, symbols))
+        else:
+            self.snapshot = CycleSnapshot(self.client)
+
+        # Движок конкурентной обработки символов
+        market_data_client = client
+        if client is None:
+            from exchange.async_bybit_client import AsyncBybitClient
+            market_data_client = AsyncBybitClient(api_key, api_secret, rate_limiter=self.client.rate_limiter)
+        if market_data_mode == 'stream' and client is None:
+            from exchange.ws_market_stream import BybitMarketStream
+            # Свечи и цена последней сделки приходят по WebSocket, REST используется для догрузки
+            market_data_client = BybitMarketStream(market_data_client, symbols, timeframe)
+        self.engine = AsyncTradingEngine(self, market_data_client,
+                                         BarCloseScheduler(timeframe, bar_close_offset),
+                                         max_concurrency=max_concurrency, services=services)
+
+        self.strategies = self._create_strategies(active_strategy)
 
-        strategy_class = globals()[active_strategy]
-        for symbol in symbols:
-            self.strategies[symbol] = strategy_class(api_key, api_secret, symbol, self.risk_manager)
+        # Быстрый прогрев буферов свечей из локального архива
+        if candle_store is not None:
+            for symbol in symbols:
+                self.engine.market_data_client.warm_start(candle_store, symbol, timeframe)
 
-        self.telegram_bot = TelegramBot(telegram_token, self)
+        # Снимки состояния для быстрого перезапуска
+        self.timeframe = timeframe
+        self.state_store = StateStore(state_dir) if state_dir else None
+        self.state_interval = state_interval
+        self._last_state_save = time.monotonic()
+        if self.state_store is not None:
+            self.restore_state()
+
+        self.telegram_bot = None
+        if telegram_token:
+            from bot.telegram_bot import TelegramBot
+            self.telegram_bot = TelegramBot(telegram_token, self, admin_chat_id=admin_chat_id)
+        # Получатель уведомлений стратегий; процессы-шарды подменяют его пересылкой координатору
+        self.notifier = self.telegram_bot.notify if self.telegram_bot else None
         self.telegram_bot_thread = None
-        self.bot_loop = None
 
-        # Инициализация визуализатора
-        initialize_visualizer(active_strategy)
+        # Инициализация визуализатора: окно Tk, HTTP-панель или headless
+        self.visualizer = None
+        if enable_visualizer:
+            from utils.strategy_visualizer import initialize_visualizer
+            self.visualizer = initialize_visualizer(active_strategy, visualizer_mode, visualizer_port)
+
+        # Локальный HTTP-сервер метрик задержек (формат Prometheus)
+        self.metrics_server = None
+        if metrics_port is not None:
+            self.metrics_server = MetricsServer(metrics, metrics_port)
+            self.metrics_server.start()
+            if enable_profiler:
+                self.metrics_server.profiler.start()
 
     def start(self):
         self.is_running = True
+        self.publish_status()
         
         # Запускаем Telegram бота в отдельном потоке
-        self.telegram_bot_thread = threading.Thread(target=self._run_telegram_bot)
-        self.telegram_bot_thread.start()
+        if self.telegram_bot:
+            self.telegram_bot_thread = threading.Thread(target=self.telegram_bot.serve, name="telegram-bot")
+            self.telegram_bot_thread.start()
         
         try:
-            while self.is_running:
-                for symbol in self.symbols:
-                    try:
-                        self.logger.info(f"Обработка символа: {symbol}")
-                        market_data = self.client.get_market_data(symbol)
-                        self.logger.info(f"Получены рыночные данные для {symbol}")
-                        strategy = self.strategies[symbol]
-                        self.logger.info(f"Выполнение стратегии {type(strategy).__name__} для {symbol}")
-                        strategy.analyze_market(market_data)
-                        strategy.execute_strategy()
-                        
-                        self.update_profit(symbol)
-                    except Exception as e:
-                        self.logger.error(f"Ошибка при обработке символа {symbol}: {str(e)}", exc_info=True)
-                
-                time.sleep(10)  # Пауза в 10 секунд между итерациями
+            asyncio.run(self.engine.run())
         except Exception as e:
             self.logger.error(f"Ошибка в основном цикле: {str(e)}", exc_info=True)
+            self.notify(f"Торговый цикл остановлен из-за ошибки: {str(e)}", PRIORITY_CRITICAL)
         finally:
             self.stop()
 
-    def change_strategy(self, new_strategy: str):
-        if new_strategy not in ["ScalpingStrategy1", "ScalpingStrategy2", "ScalpingStrategy3"]:
-            raise ValueError("Неподдерживаемая стратегия")
-        
-        self.active_strategy = new_strategy
-        strategy_class = globals()[new_strategy]
+    def change_strategy(self, new_strategy: str, wait: bool = False):
+        """
+        Горячая замена стратегии.
+
+        Новые экземпляры создаются в фоновом потоке с общими клиентом, снимком
+        и менеджером рисков, их индикаторы прогреваются по уже загруженным
+        свечам, а подмена выполняется между циклами (apply_pending_strategies).
+        Текущий цикл не прерывается и всегда видит целый набор стратегий.
+
+        :param wait: дождаться окончания подготовки
+        :raises ValueError: если стратегия не зарегистрирована
+        """
+        strategy_class = get_strategy_class(new_strategy)
+        thread = threading.Thread(target=self._prepare_strategies, args=(new_strategy, strategy_class),
+                                  name="strategy-swap", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+
+    def _prepare_strategies(self, strategy_name: str, strategy_class):
+        try:
+            started = time.monotonic()
+            strategies = self._create_strategies(strategy_name, strategy_class)
+            buffers = getattr(self.engine.market_data_client, 'candle_buffers', {})
+            warmed = 0
+            for symbol, strategy in strategies.items():
+                buffer = buffers.get((symbol, self.timeframe))
+                if buffer is None or not len(buffer):
+                    continue
+                # Копия окна: буфер может обновляться циклом событий во время прогрева
+                strategy.warm_up(buffer.snapshot())
+                warmed += 1
+            with self._swap_lock:
+                self._pending_strategies = (strategy_name, strategies)
+            self.logger.info(f"Стратегия {strategy_name} подготовлена за {time.monotonic() - started:.2f} с "
+                             f"(прогрето символов: {warmed}), замена в начале следующего цикла")
+        except Exception as e:
+            self.logger.error(f"Ошибка при подготовке стратегии {strategy_name}: {str(e)}", exc_info=True)
+            self.notify(f"Не удалось переключить стратегию на {strategy_name}: {str(e)}", PRIORITY_CRITICAL)
+            return
+        if not self.is_running:
+            # Торговый цикл не выполняется - заменяем сразу
+            self.apply_pending_strategies()
+
+    def apply_pending_strategies(self) -> bool:
+        """
+        Подменяет набор стратегий подготовленным; вызывается движком между циклами.
+
+        :return: True, если замена выполнена
+        """
+        with self._swap_lock:
+            pending, self._pending_strategies = self._pending_strategies, None
+        if pending is None:
+            return False
+        strategy_name, strategies = pending
+        self.strategies = strategies
+        self.active_strategy = strategy_name
+        self.logger.info(f"Стратегия изменена на {strategy_name}")
+        self.notify(f"Стратегия изменена на {strategy_name}")
+        return True
+
+    def _create_strategies(self, strategy_name: str, strategy_class=None) -> Dict:
+        strategy_class = strategy_class or get_strategy_class(strategy_name)
+        strategies = {}
         for symbol in self.symbols:
-            self.strategies[symbol] = strategy_class(self.client.api_key, self.client.api_secret, symbol, self.risk_manager)
-        
-        self.logger.info(f"Стратегия изменена на {new_strategy}")
+            strategy = strategy_class(self.client.api_key, self.client.api_secret, symbol, self.risk_manager, self.client)
+            strategy.snapshot = self.snapshot
+            strategy.reservations = self.reservations
+            strategy.notifier = self.notify
+            strategies[symbol] = strategy
+        return strategies
+
 
+    def collect_state(self):
+        """
+        Собирает снимок состояния между циклами: копии окон свечей, состояние
+        стратегий и индикаторов, менеджера рисков.
 
-    def _run_telegram_bot(self):
-        self.bot_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.bot_loop)
-        self.bot_loop.run_until_complete(self.telegram_bot.run())
+        :return: (состояние для JSON, окна свечей)
+        """
+        state = {
+            'active_strategy': self.active_strategy,
+            'timeframe': self.timeframe,
+            'risk': self.risk_manager.get_state(),
+            'strategies': {symbol: strategy.get_state() for symbol, strategy in self.strategies.items()}
+        }
+        buffers = getattr(self.engine.market_data_client, 'candle_buffers', {})
+        candles = {key: StateStore.candle_window(buffer) for key, buffer in list(buffers.items()) if len(buffer)}
+        return state, candles
+
+    def state_save_due(self) -> bool:
+        return self.state_store is not None and time.monotonic() - self._last_state_save >= self.state_interval
+
+    def save_state(self, collected=None):
+        """
+        Записывает снимок состояния на диск; collected - результат collect_state.
+        """
+        if self.state_store is None:
+            return
+        try:
+            state, candles = collected or self.collect_state()
+            self.state_store.save(state, candles)
+            self._last_state_save = time.monotonic()
+        except Exception as e:
+            self.logger.error(f"Ошибка при сохранении снимка состояния: {str(e)}")
+
+    def restore_state(self) -> bool:
+        """
+        Восстанавливает состояние из последнего снимка и сверяет его с биржей:
+        позиции и баланс загружаются заново, закрытые за время простоя позиции
+        и исполненные стоп-ордера удаляются из состояния стратегий.
+
+        :return: True, если снимок найден и загружен
+        """
+        state = self.state_store.load()
+        if state is None:
+            return False
+        started = time.monotonic()
+        self.risk_manager.load_state(state.get('risk', {}))
+
+        restored_candles = 0
+        if state.get('timeframe') == self.timeframe:
+            for symbol in self.symbols:
+                restored_candles += self.engine.market_data_client.warm_start(self.state_store, symbol, self.timeframe)
+
+        # Состояние другой стратегии не подходит к текущим индикаторам и параметрам
+        if state.get('active_strategy') == self.active_strategy:
+            for symbol, strategy_state in state.get('strategies', {}).items():
+                if symbol not in self.strategies:
+                    continue
+                try:
+                    self.strategies[symbol].set_state(strategy_state)
+                except (KeyError, TypeError, ValueError) as e:
+                    self.logger.warning(f"Состояние стратегии {symbol} не восстановлено: {str(e)}")
+
+        self.refresh_snapshot()
+        try:
+            open_orders = self.client.get_open_orders(self.symbols)
+        except Exception as e:
+            self.logger.error(f"Ошибка при получении открытых ордеров для сверки: {str(e)}")
+            open_orders = None
+        for symbol, strategy in self.strategies.items():
+            strategy.reconcile_state(open_orders.get(symbol, []) if open_orders is not None else None)
+
+        self.logger.info(f"Состояние восстановлено из снимка за {time.monotonic() - started:.2f} с "
+                         f"(свечей: {restored_candles}, возраст снимка: {time.time() - state['saved_at']:.0f} с)")
+        return True
 
     def stop(self):
         self.logger.info("Остановка торгового робота...")
         self.is_running = False
-        if self.bot_loop:
-            self.bot_loop.call_soon_threadsafe(self._stop_telegram_bot)
+        if self.telegram_bot:
+            self.telegram_bot.shutdown()
         if self.telegram_bot_thread:
             self.telegram_bot_thread.join()
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        self.save_state()
+        if self.visualizer:
+            from utils.strategy_visualizer import stop_visualizer
+            stop_visualizer()
+            self.visualizer = None
         self.logger.info("Торговый робот остановлен.")
 
-    def _stop_telegram_bot(self):
-        async def stop_bot():
-            await self.telegram_bot.stop()
-        self.bot_loop.create_task(stop_bot())
-        self.bot_loop.stop()
+    def refresh_snapshot(self):
+        """
+        Обновляет позиции и баланс для всех символов в начале цикла.
+        """
+        with metrics.timer('position_refresh'):
+            self.snapshot.refresh(self.symbols)
+        self.risk_manager.update_balance(self.snapshot.balance, self.snapshot.available_balance)
+        # Экспозиция символов пересчитывается по фактическим позициям, резервы прошлого цикла снимаются
+        self.risk_manager.update_positions(self.snapshot.get_all_positions())
+
+    def notify(self, message: str, priority: int = PRIORITY_TRADE):
+        """
+        Передает уведомление в очередь Telegram-бота; не блокирует торговый поток.
+        """
+        if self.notifier is not None:
+            self.notifier(message, priority)
+
+    def publish_status(self, positions: Optional[Dict] = None, balance: Optional[float] = None):
+        """
+        Публикует снимок статуса; по умолчанию из уже загруженных данных цикла без обращений к бирже.
 
-    def update_profit(self, symbol: str):
+        :param positions: позиции вместо позиций снимка цикла
+        :param balance: баланс вместо баланса снимка цикла
+        """
         try:
-            positions = self.client.get_open_positions(symbol)
-            for position in positions:
-                self.total_profit += position.unrealized_pnl
-            self.risk_manager.update_balance(self.client.get_account_balance())
+            self.status.publish(
+                self.snapshot.get_all_positions() if positions is None else positions,
+                risk=self.risk_manager.get_state(),
+                wakeup_lateness=self.engine.scheduler.stats(),
+                is_running=self.is_running,
+                account_balance=self.snapshot.balance if balance is None else balance,
+                last_cycle_time=self.engine.last_cycle_time,
+                skipped_symbols=self.engine.skipped_symbols
+            )
         except Exception as e:
-            self.logger.error(f"Ошибка при обновлении прибыли для {symbol}: {str(e)}")
+            self.logger.error(f"Ошибка при публикации статуса: {str(e)}")
 
     def get_status(self) -> Dict:
-        try:
-            return {
-                "is_running": self.is_running,
-                "total_profit": self.total_profit,
-                "open_positions": self.client.get_open_positions(self.symbols[0]),  # Получаем позиции только для первого символа
-                "account_balance": self.client.get_account_balance()
-            }
-        except Exception as e:
-            self.logger.error(f"Ошибка при получении статуса: {str(e)}")
-            return {"error": str(e)}
+        """
+        Последний опубликованный снимок статуса; не блокирует и не обращается к бирже.
+        """
+        return self.status.current.to_dict()
+
+    def refresh_status(self) -> Dict:
+        """
+        Запрашивает позиции и баланс и публикует новый снимок статуса.
+
+        Данные читаются в отдельные объекты: снимок цикла и менеджер рисков
+        не изменяются, поэтому вызов безопасен параллельно с торговым циклом
+        (резервы экспозиции, взятые в цикле, сохраняются).
+        Блокирующий вызов: из цикла событий выполняется в пуле потоков.
+        """
+        source = self.snapshot.client
+        positions = source.get_all_open_positions(self.symbols)
+        balance = source.get_balance_summary()['total']
+        self.publish_status(positions, balance)
+        return self.get_status()
 
     def enable(self):
         self.is_running = True
+        self.publish_status()
 
     def disable(self):
         self.is_running = False
+        self.publish_status()
 
-    def get_total_profit(self) -> float:
-        return self.total_profit
\ No newline at end of file
+    def get_unrealized_pnl(self) -> float:
+        return self.status.current.unrealized_pnl
\ No newline at end of file
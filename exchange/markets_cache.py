@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MARKETS_CACHE_PATH = os.path.join('cache', 'bybit_markets.json')
+MARKETS_CACHE_TTL = 24 * 60 * 60  # Метаданные рынков обновляются раз в сутки
+
+
+def load_markets_cache(path: str = DEFAULT_MARKETS_CACHE_PATH,
+                       ttl: float = MARKETS_CACHE_TTL) -> Optional[Tuple[Dict, Dict]]:
+    """
+    Загружает сохраненные метаданные рынков (markets, currencies).
+
+    :param path: путь к файлу кэша
+    :param ttl: время жизни кэша в секундах
+    :return: кортеж (markets, currencies) или None, если кэш отсутствует или устарел
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - data.get('timestamp', 0) > ttl:
+        return None
+    return data['markets'], data.get('currencies')
+
+
+def save_markets_cache(markets: Dict, currencies: Optional[Dict],
+                       path: str = DEFAULT_MARKETS_CACHE_PATH):
+    """
+    Атомарно сохраняет метаданные рынков на диск.
+    """
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time(), 'markets': markets, 'currencies': currencies}, f, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error(f"Ошибка при сохранении кэша рынков: {str(e)}")
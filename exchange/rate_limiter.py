@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from utils.metrics import metrics
+
+# Классы эндпоинтов
+ENDPOINT_ORDER = 'order'  # размещение, отмена и изменение ордеров
+ENDPOINT_ACCOUNT = 'account'  # позиции и баланс
+ENDPOINT_MARKET = 'market'  # публичные рыночные данные
+
+# Приоритеты: меньшее значение обслуживается раньше
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_POLLING = 2
+
+# Бюджеты (запросов в секунду, размер пачки) по классам эндпоинтов.
+# Bybit v5: создание/изменение/отмена ордеров - 10 запросов/с, позиции и баланс -
+# до 50 запросов/с, публичные запросы - 600 за 5 с на IP. Берем с запасом.
+DEFAULT_BUDGETS: Dict[str, Tuple[float, float]] = {
+    ENDPOINT_ORDER: (10.0, 10),
+    ENDPOINT_ACCOUNT: (10.0, 10),
+    ENDPOINT_MARKET: (40.0, 40)
+}
+# Общий бюджет всех запросов клиента
+DEFAULT_GLOBAL_BUDGET: Tuple[float, float] = (50.0, 50)
+
+
+class TokenBucket:
+    """
+    Корзина токенов: пополняется со скоростью rate до capacity токенов.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Время ожидания, через которое в корзине будет amount токенов.
+        """
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float = 1.0):
+        self.tokens -= amount
+
+
+class RateLimitScheduler:
+    """
+    Общий планировщик частоты запросов к бирже.
+
+    Каждый запрос расходует токен из корзины своего класса эндпоинтов и из
+    общей корзины клиента. Запросы с более высоким приоритетом обслуживаются
+    первыми: пока ожидает ордер, опрос свечей и позиций не получает токены.
+    Запросам ниже приоритета ордеров недоступны последние reserve токенов общей
+    корзины, а опрос с таймаутом отбрасывается, если ждать пришлось бы дольше
+    таймаута, - так при нехватке бюджета первым сокращается опрос.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, Tuple[float, float]]] = None,
+                 global_budget: Tuple[float, float] = DEFAULT_GLOBAL_BUDGET,
+                 reserve: float = 5, max_poll_wait: float = 1.0):
+        budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self._buckets = {endpoint: TokenBucket(rate, capacity) for endpoint, (rate, capacity) in budgets.items()}
+        self._global = TokenBucket(*global_budget)
+        self.reserve = reserve
+        self.max_poll_wait = max_poll_wait
+        self._condition = threading.Condition()
+        self._waiting: Counter = Counter()
+        self.granted: Counter = Counter()
+        self.shed: Counter = Counter()
+
+    @classmethod
+    def scaled(cls, share: float, **kwargs) -> 'RateLimitScheduler':
+        """
+        Планировщик с долей share бюджетов по умолчанию, например для одного
+        из нескольких процессов, работающих с одним аккаунтом.
+        """
+        budgets = {endpoint: (rate * share, max(1.0, capacity * share))
+                   for endpoint, (rate, capacity) in DEFAULT_BUDGETS.items()}
+        rate, capacity = DEFAULT_GLOBAL_BUDGET
+        kwargs.setdefault('reserve', max(1.0, 5 * share))
+        return cls(budgets, (rate * share, max(1.0, capacity * share)), **kwargs)
+
+    def _try_acquire(self, endpoint: str, priority: int, now: float) -> float:
+        """
+        Пытается получить токен; вызывается под замком.
+
+        :return: 0, если токен получен, иначе рекомендуемое время ожидания
+        """
+        if any(self._waiting[p] for p in range(priority)):
+            # Ждем, пока обслужат запросы с более высоким приоритетом
+            return 0.005
+        bucket = self._buckets[endpoint]
+        reserve = self.reserve if priority > PRIORITY_ORDER else 0
+        wait = max(bucket.wait_time(1, now), self._global.wait_time(1 + reserve, now))
+        if wait == 0:
+            bucket.take()
+            self._global.take()
+            self.granted[endpoint] += 1
+        return wait
+
+    def acquire(self, endpoint: str, priority: int, timeout: Optional[float] = None) -> bool:
+        """
+        Блокирующее получение токена.
+
+        :param endpoint: класс эндпоинта (ENDPOINT_*)
+        :param priority: приоритет запроса (PRIORITY_*)
+        :param timeout: максимальное ожидание; None - ждать без ограничения
+        :return: False, если запрос отброшен по таймауту
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._try_acquire(endpoint, priority, now)
+                    if wait == 0:
+                        metrics.observe_endpoint('rate_limit_wait', now - started, endpoint)
+                        return True
+                    if deadline is not None and now + wait > deadline:
+                        self.shed[endpoint] += 1
+                        return False
+                    self._condition.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                # Будим запросы с более низким приоритетом, которые ждали этот
+                self._condition.notify_all()
+
+    async def acquire_async(self, endpoint: str, priority: int, timeout: Optional[float] = None) -> bool:
+        """
+        Асинхронный вариант acquire для клиента ccxt.async_support.
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._condition:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    wait = self._try_acquire(endpoint, priority, now)
+                    if wait == 0:
+                        metrics.observe_endpoint('rate_limit_wait', now - started, endpoint)
+                        return True
+                    if deadline is not None and now + wait > deadline:
+                        self.shed[endpoint] += 1
+                        return False
+                await asyncio.sleep(wait)
+        finally:
+            with self._condition:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._condition:
+            return {'granted': dict(self.granted), 'shed': dict(self.shed)}
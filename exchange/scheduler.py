@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+# Длительность единиц таймфрейма в секундах (как в ccxt Exchange.parse_timeframe)
+TIMEFRAME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000, 'y': 31536000}
+
+
+def parse_timeframe(timeframe: str) -> int:
+    """
+    Длительность таймфрейма в секундах, например '1m' -> 60, '4h' -> 14400.
+    Без импорта ccxt, загрузка которого занимает сотни миллисекунд.
+    """
+    unit = timeframe[-1]
+    if unit not in TIMEFRAME_UNITS:
+        raise ValueError(f"Неизвестный таймфрейм: {timeframe}")
+    return int(timeframe[:-1]) * TIMEFRAME_UNITS[unit]
+
+
+class BarCloseScheduler:
+    """
+    Планировщик пробуждений по закрытию бара.
+
+    Вместо фиксированной паузы торговый цикл просыпается сразу после
+    закрытия очередного бара таймфрейма со сдвигом offset секунд, который
+    дает бирже время опубликовать новую свечу. Для каждого пробуждения
+    фиксируется опоздание относительно запланированного момента.
+    """
+
+    def __init__(self, timeframe: str = '1m', offset: float = 1.0):
+        self.timeframe = timeframe
+        self.period = parse_timeframe(timeframe)
+        self.offset = offset
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.wakeups = 0
+
+    def next_wakeup(self, now: Optional[float] = None) -> float:
+        """
+        Время (unix, с) ближайшего пробуждения после now.
+        """
+        now = time.time() if now is None else now
+        bar_close = (now - self.offset) // self.period * self.period + self.period
+        return bar_close + self.offset
+
+    async def wait(self) -> float:
+        """
+        Ждет закрытия следующего бара.
+
+        :return: опоздание пробуждения в секундах
+        """
+        target = self.next_wakeup()
+        await asyncio.sleep(max(0.0, target - time.time()))
+        lateness = max(0.0, time.time() - target)
+
+        self.last_lateness = lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.total_lateness += lateness
+        self.wakeups += 1
+        return lateness
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'wakeups': self.wakeups,
+            'last_lateness': self.last_lateness,
+            'max_lateness': self.max_lateness,
+            'avg_lateness': self.total_lateness / self.wakeups if self.wakeups else 0.0
+        }
@@ -0,0 +1,256 @@
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from strategies.registry import available_strategies
+from utils.risk_manager import CURRENT_BALANCE, DAILY_LOSS, PEAK_BALANCE, STATE_SIZE, RiskManager
+
+# Первые поля общего состояния - дневной убыток, балансы и торговый день (utils.risk_manager),
+# далее экспозиция шардов
+SHARD_EXPOSURE_OFFSET = STATE_SIZE
+
+
+class SharedRiskManager(RiskManager):
+    """
+    Менеджер рисков, общий для всех процессов-шардов.
+
+    Дневной убыток с торговым днем, пиковый и текущий баланс и экспозиция каждого шарда
+    хранятся в одном массиве разделяемой памяти (multiprocessing.Array),
+    а его замок заменяет замок RiskManager. Поэтому проверка перед сделкой
+    с резервированием экспозиции атомарна для всех процессов и не требует
+    обращения к процессу-координатору. Индекс экспозиции по символам остается
+    локальным: символы шарда принадлежат только ему.
+    """
+
+    def __init__(self, max_position_size: float, max_daily_loss: float, max_drawdown: float,
+                 state, shard_id: int, max_total_exposure: Optional[float] = None,
+                 max_symbol_exposure: Optional[float] = None):
+        super().__init__(max_position_size, max_daily_loss, max_drawdown, max_total_exposure, max_symbol_exposure)
+        # Состояние не сбрасываем: оно общее для всех шардов и создано координатором
+        self._state = state
+        self._lock = state.get_lock()
+        self.shard_id = shard_id
+
+    @property
+    def total_exposure(self) -> float:
+        with self._lock:
+            return sum(self._state[SHARD_EXPOSURE_OFFSET:])
+
+    def _add_exposure(self, symbol: str, side: str, delta: float):
+        super()._add_exposure(symbol, side, delta)
+        self._state[SHARD_EXPOSURE_OFFSET + self.shard_id] = self._total_exposure
+
+
+def _run_shard(shard_id: int, symbols: List[str], robot_kwargs: Dict, risk_limits: Dict, state,
+               status_queue, command_queue, status_interval: float, log_file: Optional[str], json_logs: bool):
+    # Импорт внутри процесса: при запуске spawn модуль робота загружается заново
+    from exchange.data_fetcher import TradingRobot
+    from exchange.rate_limiter import RateLimitScheduler
+    from utils.logger import setup_logging
+
+    # Каждый шард пишет в свой файл: ротация одного файла из нескольких процессов небезопасна
+    if log_file:
+        root, ext = os.path.splitext(log_file)
+        log_file = f"{root}.shard{shard_id}{ext}"
+    setup_logging(log_file, json_format=json_logs)
+    logger = logging.getLogger(__name__)
+    if robot_kwargs.get('state_dir'):
+        robot_kwargs = {**robot_kwargs, 'state_dir': os.path.join(robot_kwargs['state_dir'], f"shard{shard_id}")}
+    risk_manager = SharedRiskManager(risk_limits['max_position_size'], risk_limits['max_daily_loss'],
+                                     risk_limits['max_drawdown'], state, shard_id,
+                                     max_total_exposure=risk_limits.get('max_total_exposure'),
+                                     max_symbol_exposure=risk_limits.get('max_symbol_exposure'))
+    # Бюджет запросов аккаунта делится между шардами
+    rate_limiter = RateLimitScheduler.scaled(1.0 / risk_limits['shards'])
+    robot = TradingRobot(symbols=symbols, telegram_token=None, enable_visualizer=False,
+                         max_position_size=risk_limits['max_position_size'],
+                         max_daily_loss=risk_limits['max_daily_loss'], max_drawdown=risk_limits['max_drawdown'],
+                         risk_manager=risk_manager, rate_limiter=rate_limiter, **robot_kwargs)
+    # Уведомления шарда пересылаются Telegram-боту координатора
+    robot.notifier = lambda message, priority: status_queue.put((shard_id, 'notify', (message, priority)))
+
+    def control_loop():
+        last_status = 0.0
+        while True:
+            try:
+                command, *args = command_queue.get(timeout=0.5)
+                if command == 'stop':
+                    robot.stop()
+                    break
+                getattr(robot, command)(*args)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f"Ошибка выполнения команды шарда {shard_id}: {str(e)}")
+            if time.monotonic() - last_status >= status_interval:
+                last_status = time.monotonic()
+                status_queue.put((shard_id, 'status', robot.get_status()))
+
+    threading.Thread(target=control_loop, name=f"shard-{shard_id}-control", daemon=True).start()
+    robot.start()
+    status_queue.put((shard_id, 'status', robot.get_status()))
+
+
+class ShardCoordinator:
+    """
+    Координатор процессов-шардов для большого числа символов.
+
+    Список символов делится между рабочими процессами, каждый из которых
+    запускает собственный TradingRobot со своими стратегиями. Глобальное
+    состояние риска находится в разделяемой памяти и проверяется шардами
+    напрямую. Статусы и уведомления шардов собираются через очередь: статусы -
+    в объединенное представление, уведомления - в очередь Telegram-бота. Координатор предоставляет интерфейс TradingRobot для
+    Telegram-бота (get_status, enable, disable, get_unrealized_pnl, change_strategy).
+    """
+
+    def __init__(self, api_key: str, api_secret: str, symbols: List[str], telegram_token: Optional[str],
+                 max_position_size: float, max_daily_loss: float, max_drawdown: float, processes: int,
+                 max_total_exposure: Optional[float] = None, max_symbol_exposure: Optional[float] = None,
+                 status_interval: float = 5.0,
+                 log_file: Optional[str] = 'trading_bot.log', json_logs: bool = False,
+                 admin_chat_id: Optional[int] = None, **robot_kwargs):
+        self.symbols = symbols
+        self.processes = max(1, min(processes, len(symbols)))
+        self.status_interval = status_interval
+        self.log_file = log_file
+        self.json_logs = json_logs
+        self.logger = logging.getLogger(__name__)
+        self._context = mp.get_context('spawn')
+        self.risk_state = self._context.Array('d', SHARD_EXPOSURE_OFFSET + self.processes)
+        self.risk_limits = {
+            'max_position_size': max_position_size,
+            'max_daily_loss': max_daily_loss,
+            'max_drawdown': max_drawdown,
+            'max_total_exposure': max_total_exposure,
+            'max_symbol_exposure': max_symbol_exposure,
+            'shards': self.processes
+        }
+        self.robot_kwargs = {'api_key': api_key, 'api_secret': api_secret, **robot_kwargs}
+        self.active_strategy = robot_kwargs.get('active_strategy', 'ScalpingStrategy1')
+        # Символы распределяются по кругу, чтобы шарды получили примерно равную нагрузку
+        self.shards = [symbols[i::self.processes] for i in range(self.processes)]
+        self.shard_status: Dict[int, Dict] = {}
+        self.status_queue = self._context.Queue()
+        self.command_queues = [self._context.Queue() for _ in self.shards]
+        self.workers: List = []
+        self.is_running = False
+        self._status_lock = threading.Lock()
+        self._collector = None
+
+        self.telegram_bot = None
+        if telegram_token:
+            from bot.telegram_bot import TelegramBot
+            self.telegram_bot = TelegramBot(telegram_token, self, admin_chat_id=admin_chat_id)
+        self.telegram_bot_thread = None
+
+    def start(self):
+        self.is_running = True
+        for shard_id, symbols in enumerate(self.shards):
+            worker = self._context.Process(
+                target=_run_shard, name=f"shard-{shard_id}",
+                args=(shard_id, symbols, self.robot_kwargs, self.risk_limits, self.risk_state,
+                      self.status_queue, self.command_queues[shard_id], self.status_interval,
+                      self.log_file, self.json_logs))
+            worker.start()
+            self.workers.append(worker)
+        self.logger.info(f"Запущено {len(self.workers)} процессов-шардов для {len(self.symbols)} символов")
+
+        self._collector = threading.Thread(target=self._collect_status, name="shard-status", daemon=True)
+        self._collector.start()
+        if self.telegram_bot:
+            self.telegram_bot_thread = threading.Thread(target=self.telegram_bot.serve, name="telegram-bot")
+            self.telegram_bot_thread.start()
+
+        for worker in self.workers:
+            worker.join()
+
+    def _collect_status(self):
+        while self.is_running or any(worker.is_alive() for worker in self.workers):
+            try:
+                shard_id, kind, payload = self.status_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if kind == 'notify':
+                if self.telegram_bot:
+                    self.telegram_bot.notify(*payload)
+                continue
+            with self._status_lock:
+                self.shard_status[shard_id] = payload
+
+    def _broadcast(self, *command):
+        for command_queue in self.command_queues:
+            command_queue.put(command)
+
+    def stop(self, timeout: float = 90.0):
+        self.logger.info("Остановка процессов-шардов...")
+        self.is_running = False
+        self._broadcast('stop')
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+            if worker.is_alive():
+                worker.terminate()
+        if self.telegram_bot:
+            self.telegram_bot.shutdown()
+        if self.telegram_bot_thread:
+            self.telegram_bot_thread.join()
+
+    # Интерфейс TradingRobot для Telegram-бота
+
+    def change_strategy(self, new_strategy: str):
+        # Имя проверяется до рассылки, каждый шард заменяет стратегии между своими циклами
+        if new_strategy not in available_strategies():
+            raise ValueError(f"Неподдерживаемая стратегия: {new_strategy}")
+        self._broadcast('change_strategy', new_strategy)
+        self.active_strategy = new_strategy
+
+    def enable(self):
+        self._broadcast('enable')
+
+    def disable(self):
+        self._broadcast('disable')
+
+    def refresh_status(self) -> Dict:
+        # Шарды обновят снимки и пришлют их со следующим отчетом о статусе
+        self._broadcast('refresh_status')
+        return self.get_status()
+
+    def get_unrealized_pnl(self) -> float:
+        with self._status_lock:
+            return sum(status.get('unrealized_pnl', 0) for status in self.shard_status.values())
+
+    def get_status(self) -> Dict:
+        with self._status_lock:
+            statuses = dict(self.shard_status)
+        open_positions = {}
+        for status in statuses.values():
+            open_positions.update(status.get('open_positions', {}))
+        with self.risk_state.get_lock():
+            daily_loss = self.risk_state[DAILY_LOSS]
+            peak_balance = self.risk_state[PEAK_BALANCE]
+            current_balance = self.risk_state[CURRENT_BALANCE]
+            total_exposure = sum(self.risk_state[SHARD_EXPOSURE_OFFSET:])
+        return {
+            "is_running": any(status.get('is_running') for status in statuses.values()),
+            "unrealized_pnl": sum(status.get('unrealized_pnl', 0) for status in statuses.values()),
+            "open_positions": open_positions,
+            "account_balance": current_balance,
+            "last_cycle_time": max((status.get('last_cycle_time', 0) for status in statuses.values()), default=0),
+            "risk": {
+                "daily_loss": daily_loss,
+                "peak_balance": peak_balance,
+                "total_exposure": total_exposure
+            },
+            "shards": {
+                shard_id: {
+                    "symbols": len(self.shards[shard_id]),
+                    "alive": self.workers[shard_id].is_alive() if shard_id < len(self.workers) else False,
+                    "last_cycle_time": statuses.get(shard_id, {}).get('last_cycle_time')
+                }
+                for shard_id in range(len(self.shards))
+            }
+        }
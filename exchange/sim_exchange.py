@@ -0,0 +1,275 @@
+import asyncio
+import dataclasses
+import itertools
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.fill import Fill
+from models.order import Order
+from models.position import Position
+
+
+def generate_synthetic_candles(symbols: List[str], bars: int, start_price: float = 30000.0,
+                               volatility: float = 0.001, timeframe_ms: int = 60_000,
+                               seed: Optional[int] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Генерирует синтетические свечи (геометрическое броуновское движение) для набора символов.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(bars, dtype=np.int64) * timeframe_ms
+    candles = {}
+    for symbol in symbols:
+        close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, bars)))
+        open_ = np.concatenate(([start_price], close[:-1]))
+        spread = np.abs(rng.normal(0, volatility / 2, bars)) * close
+        candles[symbol] = {
+            'timestamp': timestamps,
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': rng.uniform(1, 100, bars)
+        }
+    return candles
+
+
+class SimulatedExchange:
+    """
+    Симулятор биржи с интерфейсом BybitClient.
+
+    Работает на записанных или синтетических свечах без обращения к сети.
+    Каждый вызов advance() переводит часы на следующий бар и прогоняет
+    механизм сопоставления: стоп-ордера, лимитные ордера, затем SL/TP позиций
+    (при касании обоих уровней в одном баре первым срабатывает стоп-лосс).
+    Стопы при гэпе через уровень исполняются по цене открытия бара, как в бэктестере.
+    Рыночные ордера исполняются сразу по цене закрытия текущего бара.
+    Позиции учитываются в режиме one-way: одна нетто-позиция на символ.
+    Состояние (позиции, ордера, баланс) меняется под одним замком, так как стратегии
+    вызывают методы симулятора из потоков пула движка; наружу отдаются копии моделей.
+    """
+
+    def __init__(self, candles: Dict[str, Dict[str, np.ndarray]], initial_balance: float = 10000.0,
+                 fee_rate: float = 0.00055, slippage: float = 0.0, start_index: int = 100):
+        self.api_key = 'simulated'
+        self.api_secret = 'simulated'
+        self.candles = candles
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.wallet_balance = initial_balance
+        self.index = start_index - 1
+        self.length = min(len(data['close']) for data in candles.values())
+        self.positions: Dict[str, Position] = {}
+        self.open_orders: Dict[str, Order] = {}
+        self.fills: List[Fill] = []
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    # Управление временем
+
+    def advance(self) -> bool:
+        """
+        Переходит к следующему бару и исполняет сработавшие ордера.
+
+        :return: False, если свечи закончились
+        """
+        with self._lock:
+            if self.index + 1 >= self.length:
+                return False
+            self.index += 1
+            for symbol in self.candles:
+                self._match(symbol)
+            return True
+
+    def _bar(self, symbol: str):
+        data = self.candles[symbol]
+        i = self.index
+        return data['open'][i], data['high'][i], data['low'][i], data['close'][i], int(data['timestamp'][i])
+
+    def _match(self, symbol: str):
+        # Вызывается под замком
+        open_, high, low, _, timestamp = self._bar(symbol)
+
+        for order in [o for o in self.open_orders.values() if o.symbol == symbol]:
+            side = order.side.upper()
+            order_type = order.order_type.upper()
+            if order_type == 'STOP':
+                triggered = high >= order.price if side == 'BUY' else low <= order.price
+            else:
+                triggered = low <= order.price if side == 'BUY' else high >= order.price
+            if triggered:
+                del self.open_orders[order.order_id]
+                price = order.price
+                if order_type == 'STOP':
+                    # При гэпе через уровень стоп исполняется по худшей цене - открытию бара
+                    price = max(open_, price) if side == 'BUY' else min(open_, price)
+                self._fill(order, price, timestamp)
+
+        position = self.positions.get(symbol)
+        if position is None:
+            return
+        is_long = position.side == 'LONG'
+        close_side = 'SELL' if is_long else 'BUY'
+        if position.stop_loss is not None and (low <= position.stop_loss if is_long else high >= position.stop_loss):
+            price = min(open_, position.stop_loss) if is_long else max(open_, position.stop_loss)
+            self._fill(Order(symbol, close_side, 'MARKET', position.amount, reduce_only=True,
+                             order_id=str(next(self._order_ids))), price, timestamp)
+        elif position.take_profit is not None and (high >= position.take_profit if is_long else low <= position.take_profit):
+            self._fill(Order(symbol, close_side, 'MARKET', position.amount, reduce_only=True,
+                             order_id=str(next(self._order_ids))), position.take_profit, timestamp)
+
+    def _fill(self, order: Order, price: float, timestamp: int) -> bool:
+        # Вызывается под замком
+        symbol = order.symbol
+        side = order.side.upper()
+        quantity = order.quantity
+        position = self.positions.get(symbol)
+        order_side = 'LONG' if side == 'BUY' else 'SHORT'
+
+        if order.reduce_only:
+            if position is None or position.side == order_side:
+                return False
+            quantity = min(quantity, position.amount)
+
+        fee = quantity * price * self.fee_rate
+        realized = 0.0
+        if position is None or position.side == order_side:
+            # Открытие или увеличение позиции
+            if position is None:
+                position = Position(symbol, order_side, 0.0, price)
+                self.positions[symbol] = position
+            total = position.amount + quantity
+            position.entry_price = (position.entry_price * position.amount + price * quantity) / total
+            position.amount = total
+            if order.stop_loss is not None:
+                position.stop_loss = order.stop_loss
+            if order.take_profit is not None:
+                position.take_profit = order.take_profit
+        else:
+            # Уменьшение, закрытие или разворот позиции
+            closed = min(quantity, position.amount)
+            direction = 1 if position.side == 'LONG' else -1
+            realized = (price - position.entry_price) * direction * closed
+            position.amount -= closed
+            remaining = quantity - closed
+            if position.amount <= 1e-12:
+                del self.positions[symbol]
+                if remaining > 1e-12:
+                    self.positions[symbol] = Position(symbol, order_side, remaining, price,
+                                                      stop_loss=order.stop_loss, take_profit=order.take_profit)
+
+        self.wallet_balance += realized - fee
+        self.fills.append(Fill(symbol, side, quantity, price, fee, realized, timestamp, order.order_id))
+        return True
+
+    # Интерфейс BybitClient
+
+    def get_market_data(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> Dict:
+        data = self.candles[symbol]
+        window = slice(max(0, self.index + 1 - limit), self.index + 1)
+        return {column: values[window] for column, values in data.items()}
+
+    def place_order(self, order: Order) -> bool:
+        with self._lock:
+            order.order_id = str(next(self._order_ids))
+            order_type = order.order_type.upper()
+            if order_type == 'MARKET':
+                _, _, _, close, timestamp = self._bar(order.symbol)
+                direction = 1 if order.side.upper() == 'BUY' else -1
+                return self._fill(order, close * (1 + direction * self.slippage), timestamp)
+            if order_type in ('LIMIT', 'STOP'):
+                if order.price is None:
+                    return False
+                # Копия, чтобы вызывающий код не менял ордер, ожидающий исполнения
+                self.open_orders[order.order_id] = dataclasses.replace(order)
+                return True
+            return False
+
+    def cancel_order(self, symbol: str, order_id: str) -> bool:
+        with self._lock:
+            order = self.open_orders.get(order_id)
+            if order is None or order.symbol != symbol:
+                return False
+            del self.open_orders[order_id]
+            return True
+
+    def get_open_positions(self, symbol: str) -> List[Position]:
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                return []
+            _, _, _, close, _ = self._bar(symbol)
+            result = dataclasses.replace(position, leverage=1)
+        result.update_unrealized_pnl(close)
+        return [result]
+
+    def get_all_open_positions(self, symbols: List[str]) -> Dict[str, List[Position]]:
+        return {symbol: self.get_open_positions(symbol) for symbol in symbols}
+
+    def get_open_orders(self, symbols: List[str]) -> Dict[str, List[Order]]:
+        result: Dict[str, List[Order]] = {symbol: [] for symbol in symbols}
+        with self._lock:
+            for order in self.open_orders.values():
+                if order.symbol in result:
+                    result[order.symbol].append(dataclasses.replace(order))
+        return result
+
+    def close_position(self, position: Position) -> bool:
+        order = Order(position.symbol, 'SELL' if position.side == 'LONG' else 'BUY', 'MARKET',
+                      position.amount, reduce_only=True)
+        return self.place_order(order)
+
+    def _unrealized_pnl(self) -> float:
+        # Вызывается под замком
+        total = 0.0
+        for symbol, position in self.positions.items():
+            _, _, _, close, _ = self._bar(symbol)
+            direction = 1 if position.side == 'LONG' else -1
+            total += (close - position.entry_price) * direction * position.amount
+        return total
+
+    def _used_margin(self) -> float:
+        return sum(position.amount * position.entry_price for position in self.positions.values())
+
+    def get_account_balance(self) -> float:
+        with self._lock:
+            return self.wallet_balance + self._unrealized_pnl()
+
+    def get_available_balance(self) -> float:
+        with self._lock:
+            return max(0.0, self.wallet_balance - self._used_margin())
+
+    def get_balance_summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {'total': self.get_account_balance(), 'free': self.get_available_balance()}
+
+    def warm_start(self, store, symbol: str, timeframe: str = '1m', limit: int = 100) -> int:
+        return 0
+
+    async def close(self):
+        pass
+
+
+def run_simulation(robot, exchange: SimulatedExchange, steps: Optional[int] = None) -> int:
+    """
+    Прогоняет торгового робота по свечам симулятора без пауз между барами.
+
+    :param robot: TradingRobot, созданный с client=exchange
+    :param steps: максимальное количество баров, по умолчанию все оставшиеся
+    :return: количество обработанных баров
+    """
+    async def _run() -> int:
+        processed = 0
+        robot.is_running = True
+        while (steps is None or processed < steps) and exchange.advance():
+            await robot.engine.run_cycle(robot.symbols)
+            processed += 1
+        return processed
+
+    try:
+        return asyncio.run(_run())
+    finally:
+        robot.engine.executor.shutdown(wait=True)
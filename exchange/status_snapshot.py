@@ -0,0 +1,86 @@
+import copy
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+from models.position import Position
+
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """
+    Неизменяемый снимок состояния робота после торгового цикла.
+
+    Позиции копируются при публикации, поэтому снимок не меняется вместе
+    с живым состоянием и его можно читать из любого потока без замков.
+    """
+    version: int = 0
+    created_at: float = 0.0
+    is_running: bool = False
+    unrealized_pnl: float = 0.0  # по открытым позициям снимка
+    account_balance: float = 0.0
+    open_positions: Mapping[str, Tuple[Position, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    risk: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+    last_cycle_time: float = 0.0
+    skipped_symbols: int = 0
+    wakeup_lateness: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def age(self) -> float:
+        """
+        Время с момента публикации в секундах.
+        """
+        return time.time() - self.created_at if self.created_at else float('inf')
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "created_at": self.created_at,
+            "is_running": self.is_running,
+            "unrealized_pnl": self.unrealized_pnl,
+            "open_positions": {symbol: list(positions) for symbol, positions in self.open_positions.items()},
+            "account_balance": self.account_balance,
+            "risk": dict(self.risk),
+            "last_cycle_time": self.last_cycle_time,
+            "skipped_symbols": self.skipped_symbols,
+            "wakeup_lateness": dict(self.wakeup_lateness)
+        }
+
+
+class StatusPublisher:
+    """
+    Хранит последний опубликованный StatusSnapshot.
+
+    Торговый цикл публикует новый снимок заменой ссылки, читатели (Telegram-бот,
+    координатор шардов) получают текущий снимок без ввода-вывода и ожидания.
+    """
+
+    def __init__(self):
+        self._current = StatusSnapshot()
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> StatusSnapshot:
+        return self._current
+
+    def publish(self, open_positions: Dict[str, List[Position]], risk: Optional[Dict] = None,
+                wakeup_lateness: Optional[Dict] = None, **fields) -> StatusSnapshot:
+        """
+        Публикует новую версию снимка.
+
+        :param open_positions: словарь {символ: список позиций}, позиции копируются
+        :param fields: остальные поля StatusSnapshot
+        """
+        positions = MappingProxyType({symbol: tuple(copy.copy(position) for position in symbol_positions)
+                                      for symbol, symbol_positions in open_positions.items() if symbol_positions})
+        # Приватный поток может еще не прислать PnL позиции
+        unrealized_pnl = sum(position.unrealized_pnl or 0.0 for symbol_positions in positions.values()
+                             for position in symbol_positions)
+        # Замок только упорядочивает версии при одновременной публикации
+        with self._lock:
+            snapshot = StatusSnapshot(version=self._current.version + 1, created_at=time.time(),
+                                      open_positions=positions, unrealized_pnl=unrealized_pnl, risk=MappingProxyType(dict(risk or {})),
+                                      wakeup_lateness=MappingProxyType(dict(wakeup_lateness or {})), **fields)
+            self._current = snapshot
+        return snapshot
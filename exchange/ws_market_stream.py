@@ -0,0 +1,213 @@
+import asyncio
+import itertools
+import json
+import logging
+from typing import Dict, List, Optional, Set
+
+import aiohttp
+
+from exchange.candle_buffer import CandleBuffer, get_buffer
+from exchange.scheduler import parse_timeframe
+
+BYBIT_PUBLIC_LINEAR_URL = 'wss://stream.bybit.com/v5/public/linear'
+SUBSCRIBE_ARGS_LIMIT = 10  # Максимум топиков в одном запросе подписки
+PING_INTERVAL = 20  # Bybit рекомендует ping каждые 20 секунд
+
+
+def bybit_interval(timeframe: str) -> str:
+    """
+    Переводит таймфрейм ccxt ('1m', '1h', '1d') в интервал Bybit ('1', '60', 'D').
+    """
+    special = {'1d': 'D', '1w': 'W', '1M': 'M'}
+    if timeframe in special:
+        return special[timeframe]
+    return str(parse_timeframe(timeframe) // 60)
+
+
+def bybit_symbol(symbol: str) -> str:
+    """
+    Переводит символ ccxt ('BTC/USDT:USDT') в формат Bybit ('BTCUSDT').
+    """
+    return symbol.split(':')[0].replace('/', '')
+
+
+class BybitMarketStream:
+    """
+    Потоковые рыночные данные через публичный WebSocket Bybit.
+
+    Топики kline и tickers всех символов распределяются по нескольким
+    соединениям (до topics_per_connection топиков на соединение). Свечи из
+    сообщений сразу записываются в буферы свечей REST-клиента, а цена последней
+    сделки из тикера отдается в market_data под ключом 'last_price'.
+
+    После каждого (пере)подключения и при обнаружении пропуска свечей буферы
+    догружаются через REST-клиент (AsyncBybitClient). Интерфейс совпадает
+    с AsyncBybitClient, поэтому поток подставляется в AsyncTradingEngine.
+    """
+
+    def __init__(self, rest_client, symbols: List[str], timeframe: str = '1m', limit: int = 100,
+                 url: str = BYBIT_PUBLIC_LINEAR_URL, topics_per_connection: int = 100,
+                 ping_interval: float = PING_INTERVAL, max_reconnect_delay: float = 30.0):
+        self.rest_client = rest_client
+        self.symbols = symbols
+        self.timeframe = timeframe
+        self.limit = limit
+        self.url = url
+        self.topics_per_connection = topics_per_connection
+        self.ping_interval = ping_interval
+        self.max_reconnect_delay = max_reconnect_delay
+        self.period_ms = parse_timeframe(timeframe) * 1000
+        self.interval = bybit_interval(timeframe)
+        self.last_prices: Dict[str, float] = {}
+        self.reconnects = 0
+        self.logger = logging.getLogger(__name__)
+
+        # Сопоставление символа Bybit с символом из конфигурации
+        self._symbols_by_topic_name = {bybit_symbol(symbol): symbol for symbol in symbols}
+        self._backfilling: Set[str] = set()
+        self._req_ids = itertools.count(1)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._tasks: List[asyncio.Task] = []
+        # Догрузки после пропуска свечей; ссылки держим, чтобы задачи не собрал GC и их отменил close()
+        self._backfill_tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+    def _buffer(self, symbol: str) -> CandleBuffer:
+        return get_buffer(self.rest_client.candle_buffers, symbol, self.timeframe, self.limit)
+
+    def start(self):
+        """
+        Открывает соединения; вызывается внутри работающего цикла событий.
+        """
+        if self._tasks:
+            return
+        self._closed = False
+        self._session = aiohttp.ClientSession()
+        per_connection = max(1, self.topics_per_connection // 2)  # kline и tickers на каждый символ
+        for i in range(0, len(self.symbols), per_connection):
+            symbols = self.symbols[i:i + per_connection]
+            self._tasks.append(asyncio.create_task(self._run_connection(symbols)))
+
+    async def _run_connection(self, symbols: List[str]):
+        delay = 1.0
+        while not self._closed:
+            try:
+                async with self._session.ws_connect(self.url) as ws:
+                    await self._subscribe(ws, symbols)
+                    # Догружаем свечи, пропущенные до подключения или во время разрыва
+                    await self._backfill(symbols)
+                    delay = 1.0
+                    ping_task = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for message in ws:
+                            if message.type == aiohttp.WSMsgType.TEXT:
+                                self._handle_message(json.loads(message.data))
+                            elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                    finally:
+                        ping_task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Ошибка WebSocket-соединения рыночных данных: {str(e)}")
+
+            if self._closed:
+                break
+            self.reconnects += 1
+            self.logger.info(f"Переподключение WebSocket через {delay:.0f} с")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _subscribe(self, ws, symbols: List[str]):
+        topics = []
+        for symbol in symbols:
+            name = bybit_symbol(symbol)
+            topics.append(f"kline.{self.interval}.{name}")
+            topics.append(f"tickers.{name}")
+        for i in range(0, len(topics), SUBSCRIBE_ARGS_LIMIT):
+            await ws.send_json({'op': 'subscribe', 'req_id': str(next(self._req_ids)),
+                                'args': topics[i:i + SUBSCRIBE_ARGS_LIMIT]})
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send_json({'op': 'ping'})
+
+    async def _backfill(self, symbols: List[str]):
+        self._backfilling.update(symbols)
+        try:
+            results = await asyncio.gather(*(self.rest_client.get_market_data(symbol, self.timeframe, self.limit)
+                                             for symbol in symbols), return_exceptions=True)
+            for symbol, result in zip(symbols, results):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Ошибка догрузки свечей {symbol} через REST: {str(result)}",
+                                      extra={'symbol': symbol})
+        finally:
+            self._backfilling.difference_update(symbols)
+
+    def _handle_message(self, message: Dict):
+        topic = message.get('topic')
+        if not topic:
+            # Ответы на подписку и ping
+            return
+        kind, _, name = topic.rpartition('.')
+        symbol = self._symbols_by_topic_name.get(name)
+        if symbol is None:
+            return
+        if kind == 'tickers':
+            last_price = message['data'].get('lastPrice')
+            if last_price is not None:
+                self.last_prices[symbol] = float(last_price)
+        elif kind == f'kline.{self.interval}':
+            self._handle_klines(symbol, message['data'])
+
+    def _handle_klines(self, symbol: str, klines: List[Dict]):
+        if symbol in self._backfilling:
+            # Свечи придут из REST; более старые обновления буфер все равно проигнорирует
+            return
+        buffer = self._buffer(symbol)
+        for kline in klines:
+            start = int(kline['start'])
+            last_timestamp = buffer.last_timestamp
+            if last_timestamp is None or start > last_timestamp + self.period_ms:
+                # Пропуск свечей: восстанавливаем окно через REST
+                self._backfilling.add(symbol)
+                task = asyncio.get_running_loop().create_task(self._backfill([symbol]))
+                self._backfill_tasks.add(task)
+                task.add_done_callback(self._backfill_tasks.discard)
+                return
+            buffer.update([[start, float(kline['open']), float(kline['high']), float(kline['low']),
+                            float(kline['close']), float(kline['volume'])]])
+
+    async def get_market_data(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> Dict:
+        self.start()
+        buffer = self._buffer(symbol)
+        if not len(buffer):
+            # Соединение еще не успело загрузить окно свечей
+            return await self.rest_client.get_market_data(symbol, timeframe, limit)
+        # Копия снимается в цикле событий: _handle_klines продолжает обновлять буфер,
+        # пока стратегии читают окно в потоках пула
+        market_data = buffer.snapshot()
+        last_price = self.last_prices.get(symbol)
+        if last_price is not None:
+            market_data['last_price'] = last_price
+        return market_data
+
+    @property
+    def candle_buffers(self):
+        return self.rest_client.candle_buffers
+
+    def warm_start(self, store, symbol: str, timeframe: str = '1m', limit: int = 100) -> int:
+        return self.rest_client.warm_start(store, symbol, timeframe, limit)
+
+    async def close(self):
+        self._closed = True
+        tasks = self._tasks + list(self._backfill_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        if self._session:
+            await self._session.close()
+            self._session = None
+        await self.rest_client.close()
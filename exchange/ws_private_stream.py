@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+
+from exchange.account_state import AccountStateStore
+from exchange.ws_market_stream import PING_INTERVAL
+
+BYBIT_PRIVATE_URL = 'wss://stream.bybit.com/v5/private'
+PRIVATE_TOPICS = ['position', 'order', 'execution', 'wallet']
+
+
+def auth_signature(api_secret: str, expires: int) -> str:
+    """
+    Подпись аутентификации приватного WebSocket Bybit: HMAC-SHA256 от "GET/realtime{expires}".
+    """
+    return hmac.new(api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+class BybitPrivateStream:
+    """
+    Приватный WebSocket Bybit с событиями ордеров, исполнений, позиций и кошелька.
+
+    События применяются к AccountStateStore. После (пере)подключения
+    выполняется полная сверка состояния через REST, а на время разрыва
+    хранилище помечается устаревшим и сверяется каждый цикл.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, store: AccountStateStore, symbols,
+                 url: str = BYBIT_PRIVATE_URL, ping_interval: float = PING_INTERVAL,
+                 max_reconnect_delay: float = 30.0):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.store = store
+        self.symbols = symbols
+        self.url = url
+        self.ping_interval = ping_interval
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self.logger = logging.getLogger(__name__)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def start(self):
+        """
+        Запускает соединение; вызывается внутри работающего цикла событий.
+        """
+        if self._task is not None:
+            return
+        self._closed = False
+        self._session = aiohttp.ClientSession()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        delay = 1.0
+        while not self._closed:
+            try:
+                async with self._session.ws_connect(self.url) as ws:
+                    await self._authenticate(ws)
+                    await ws.send_json({'op': 'subscribe', 'args': PRIVATE_TOPICS})
+                    self.store.stream_connected = True
+                    # События, пропущенные до подключения, восстанавливаем сверкой
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, self.store.reconcile, self.symbols)
+                    delay = 1.0
+                    ping_task = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for message in ws:
+                            if message.type == aiohttp.WSMsgType.TEXT:
+                                self.store.apply_message(json.loads(message.data))
+                            elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                    finally:
+                        ping_task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Ошибка приватного WebSocket-соединения: {str(e)}")
+            finally:
+                self.store.mark_stale()
+
+            if self._closed:
+                break
+            self.reconnects += 1
+            self.logger.info(f"Переподключение приватного WebSocket через {delay:.0f} с")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _authenticate(self, ws):
+        expires = int((time.time() + 10) * 1000)
+        await ws.send_json({'op': 'auth', 'args': [self.api_key, expires, auth_signature(self.api_secret, expires)]})
+        response = await ws.receive_json(timeout=10)
+        if not response.get('success'):
+            raise ConnectionError(f"Ошибка аутентификации: {response.get('ret_msg')}")
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send_json({'op': 'ping'})
+
+    async def close(self):
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._session:
+            await self._session.close()
+            self._session = None
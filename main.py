@@ -1,25 +1,79 @@
 import logging
 import sys
-from exchange.data_fetcher import TradingRobot
-import config
+import time
+
+# Отсчет времени запуска; модули проекта, включая config, импортируются в main() после него
+STARTED = time.perf_counter()
+
+# Модули робота импортируются в main() по мере необходимости: стратегии загружаются
+# через реестр, а Telegram, визуализатор и клиенты биржи - только если используются.
+# Время импорта можно проверить командой: python -m benchmarks.import_report
 
 def main():
-    # Настройка логирования
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from utils.logger import setup_logging
+    import config
+
+    # Настройка логирования: запись в консоль и файл выполняется фоновым потоком
+    setup_logging(getattr(config, 'LOG_FILE', 'trading_bot.log'), json_format=getattr(config, 'LOG_JSON', False))
     logger = logging.getLogger(__name__)
 
-    # Создание и запуск торгового робота
-    robot = TradingRobot(
-        api_key=config.API_KEY,
-        api_secret=config.API_SECRET,
-        symbols=config.SYMBOLS,
-        telegram_token=config.TELEGRAM_TOKEN,
-        max_position_size=config.MAX_POSITION_SIZE,
-        max_daily_loss=config.MAX_DAILY_LOSS,
-        max_drawdown=config.MAX_DRAWDOWN,
-        active_strategy=config.ACTIVE_STRATEGY
+    candle_store = None
+    if getattr(config, 'CANDLE_ARCHIVE_DIR', None):
+        from storage.candle_store import CandleStore
+        candle_store = CandleStore(config.CANDLE_ARCHIVE_DIR)
+
+    robot_kwargs = dict(
+        active_strategy=config.ACTIVE_STRATEGY,
+        max_concurrency=getattr(config, 'MAX_CONCURRENCY', 10),
+        bar_close_offset=getattr(config, 'BAR_CLOSE_OFFSET', 1.0),
+        candle_store=candle_store,
+        market_data_mode=getattr(config, 'MARKET_DATA_MODE', 'rest'),
+        private_stream=getattr(config, 'PRIVATE_STREAM', False),
+        visualizer_mode=getattr(config, 'VISUALIZER_MODE', 'tk'),
+        visualizer_port=getattr(config, 'VISUALIZER_PORT', 8050),
+        state_dir=getattr(config, 'STATE_DIR', None),
+        state_interval=getattr(config, 'STATE_INTERVAL', 60.0),
+        max_total_exposure=getattr(config, 'MAX_TOTAL_EXPOSURE', None),
+        max_symbol_exposure=getattr(config, 'MAX_SYMBOL_EXPOSURE', None)
     )
 
+    shard_processes = getattr(config, 'SHARD_PROCESSES', 1)
+    if shard_processes > 1:
+        from exchange.sharding import ShardCoordinator
+        # Символы делятся между процессами, риск контролируется через разделяемую память
+        robot = ShardCoordinator(
+            api_key=config.API_KEY,
+            api_secret=config.API_SECRET,
+            symbols=config.SYMBOLS,
+            telegram_token=config.TELEGRAM_TOKEN,
+            max_position_size=config.MAX_POSITION_SIZE,
+            max_daily_loss=config.MAX_DAILY_LOSS,
+            max_drawdown=config.MAX_DRAWDOWN,
+            processes=shard_processes,
+            log_file=getattr(config, 'LOG_FILE', 'trading_bot.log'),
+            json_logs=getattr(config, 'LOG_JSON', False),
+            admin_chat_id=getattr(config, 'ADMIN_CHAT_ID', None),
+            **robot_kwargs
+        )
+    else:
+        from exchange.data_fetcher import TradingRobot
+        # Создание и запуск торгового робота
+        robot = TradingRobot(
+            api_key=config.API_KEY,
+            api_secret=config.API_SECRET,
+            symbols=config.SYMBOLS,
+            telegram_token=config.TELEGRAM_TOKEN,
+            max_position_size=config.MAX_POSITION_SIZE,
+            max_daily_loss=config.MAX_DAILY_LOSS,
+            max_drawdown=config.MAX_DRAWDOWN,
+            metrics_port=getattr(config, 'METRICS_PORT', None),
+            enable_profiler=getattr(config, 'ENABLE_PROFILER', False),
+            admin_chat_id=getattr(config, 'ADMIN_CHAT_ID', None),
+            **robot_kwargs
+        )
+
+    logger.info(f"Импорт и инициализация заняли {time.perf_counter() - STARTED:.2f} с")
+
     try:
         logger.info("Запуск торгового робота...")
         robot.start()
@@ -0,0 +1,114 @@
+import math
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from models.fill import Fill
+from models.order import Order
+from models.position import Position
+
+MAGIC = b'TRBM'
+FORMAT_VERSION = 1
+
+# Заголовок пакета: сигнатура, версия формата, тип модели, количество записей, количество строк
+_HEADER = struct.Struct('<4sBBII')
+
+# Типы полей записи:
+# 's' - строка (индекс в таблице строк пакета, 0 - None),
+# 'd' - число с плавающей точкой (None хранится как NaN),
+# 'q' - целое 64 бита, '?' - логическое.
+# Поля перечислены в порядке полей модели, поэтому запись передается в конструктор позиционно.
+_SCHEMAS: Dict[Type, Tuple[int, Tuple[Tuple[str, str], ...]]] = {
+    Order: (1, (('symbol', 's'), ('side', 's'), ('order_type', 's'), ('quantity', 'd'), ('price', 'd'),
+                ('stop_loss', 'd'), ('take_profit', 'd'), ('order_id', 's'), ('reduce_only', '?'))),
+    Position: (2, (('symbol', 's'), ('side', 's'), ('amount', 'd'), ('entry_price', 'd'),
+                   ('liquidation_price', 'd'), ('unrealized_pnl', 'd'), ('leverage', 'd'), ('stop_loss', 'd'),
+                   ('take_profit', 'd'), ('stop_loss_order_id', 's'))),
+    Fill: (3, (('symbol', 's'), ('side', 's'), ('quantity', 'd'), ('price', 'd'), ('fee', 'd'),
+               ('realized_pnl', 'd'), ('timestamp', 'q'), ('order_id', 's'))),
+}
+_RECORD_CODES = {'s': 'I', 'd': 'd', 'q': 'q', '?': '?'}
+_RECORDS = {model: struct.Struct('<' + ''.join(_RECORD_CODES[kind] for _, kind in fields))
+            for model, (_, fields) in _SCHEMAS.items()}
+_MODELS = {model_id: model for model, (model_id, _) in _SCHEMAS.items()}
+
+
+def encode_batch(items: Sequence, model: Optional[Type] = None) -> bytes:
+    """
+    Упаковывает список однотипных моделей (Order, Position или Fill) в компактный бинарный пакет.
+
+    Записи имеют фиксированный размер, а строки (символы, стороны, ID ордеров)
+    вынесены в общую таблицу пакета и хранятся по одному разу, поэтому пакет
+    разбирается одним проходом struct.iter_unpack без промежуточных словарей.
+
+    :param model: класс модели; обязателен для пустого списка
+    :raises ValueError: для неподдерживаемой модели или смешанного списка
+    """
+    model = model or (type(items[0]) if items else None)
+    if model not in _SCHEMAS:
+        raise ValueError(f"Неподдерживаемая модель для бинарного формата: {model}")
+    if any(type(item) is not model for item in items):
+        raise ValueError(f"Пакет должен содержать только {model.__name__}")
+    model_id, fields = _SCHEMAS[model]
+
+    strings: Dict[str, int] = {}
+    columns = []
+    for name, kind in fields:
+        column = [getattr(item, name) for item in items]
+        if kind == 's':
+            column = [0 if value is None else strings.setdefault(value, len(strings) + 1) for value in column]
+        elif kind == 'd':
+            column = [math.nan if value is None else value for value in column]
+        columns.append(column)
+
+    table = [value.encode('utf-8') for value in strings]
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, model_id, len(items), len(table)),
+             struct.pack(f'<{len(table)}I', *map(len, table)), *table]
+    parts.extend(map(_RECORDS[model].pack, *columns))
+    return b''.join(parts)
+
+
+def decode_batch(data: bytes) -> List:
+    """
+    Распаковывает пакет encode_batch.
+
+    :return: список моделей в исходном порядке
+    :raises ValueError: если данные не являются пакетом поддерживаемой версии
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Недостаточно данных для заголовка пакета")
+    magic, version, model_id, count, strings_count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION or model_id not in _MODELS:
+        raise ValueError(f"Неподдерживаемый пакет: сигнатура {magic!r}, версия {version}, модель {model_id}")
+    model = _MODELS[model_id]
+    record = _RECORDS[model]
+
+    offset = _HEADER.size
+    lengths = struct.unpack_from(f'<{strings_count}I', data, offset)
+    offset += 4 * strings_count
+    table: List[Optional[str]] = [None]
+    for length in lengths:
+        table.append(bytes(data[offset:offset + length]).decode('utf-8'))
+        offset += length
+    if len(data) - offset != record.size * count:
+        raise ValueError("Размер пакета не соответствует количеству записей")
+    if not count:
+        return []
+
+    columns = list(zip(*record.iter_unpack(memoryview(data)[offset:])))
+    for i, (_, kind) in enumerate(_SCHEMAS[model][1]):
+        if kind == 's':
+            columns[i] = [table[index] for index in columns[i]]
+        elif kind == 'd':
+            columns[i] = [None if value != value else value for value in columns[i]]
+    return list(map(model, *columns))
+
+
+def encode(item) -> bytes:
+    return encode_batch([item])
+
+
+def decode(data: bytes):
+    items = decode_batch(data)
+    if len(items) != 1:
+        raise ValueError(f"Ожидалась одна запись, получено {len(items)}")
+    return items[0]
@@ -0,0 +1,38 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(slots=True)
+class Fill:
+    symbol: str
+    side: str  # 'BUY' или 'SELL'
+    quantity: float
+    price: float
+    fee: float
+    realized_pnl: float
+    timestamp: int  # время исполнения, мс
+    order_id: Optional[str] = None
+
+    def to_dict(self):
+        return {
+            "symbol": self.symbol,
+            "side": self.side,
+            "quantity": self.quantity,
+            "price": self.price,
+            "fee": self.fee,
+            "realizedPnl": self.realized_pnl,
+            "timestamp": self.timestamp,
+            "orderId": self.order_id
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            symbol=data['symbol'],
+            side=data['side'],
+            quantity=data['quantity'],
+            price=data['price'],
+            fee=data['fee'],
+            realized_pnl=data['realizedPnl'],
+            timestamp=data['timestamp'],
+            order_id=data.get('orderId')
+        )
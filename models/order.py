@@ -1,16 +1,17 @@
 from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     symbol: str
     side: str  # 'BUY' или 'SELL'
-    order_type: str  # 'MARKET' или 'LIMIT'
+    order_type: str  # 'MARKET', 'LIMIT' или 'STOP'
     quantity: float
     price: Optional[float] = None  # Цена для лимитного ордера
     stop_loss: Optional[float] = None
     take_profit: Optional[float] = None
     order_id: Optional[str] = None  # ID ордера, присваиваемый биржей
+    reduce_only: bool = False  # Ордер только на уменьшение позиции
 
     def __str__(self):
         return (f"Order(symbol={self.symbol}, side={self.side}, type={self.order_type}, "
@@ -26,7 +27,8 @@ class Order:
             "price": self.price,
             "stopLoss": self.stop_loss,
             "takeProfit": self.take_profit,
-            "orderId": self.order_id
+            "orderId": self.order_id,
+            "reduceOnly": self.reduce_only
         }
 
     @classmethod
@@ -39,5 +41,6 @@ class Order:
             price=data.get('price'),
             stop_loss=data.get('stopLoss'),
             take_profit=data.get('takeProfit'),
-            order_id=data.get('orderId')
+            order_id=data.get('orderId'),
+            reduce_only=data.get('reduceOnly', False)
         )
\ No newline at end of file
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     symbol: str
     side: str  # 'LONG' или 'SHORT'
@@ -10,11 +10,17 @@ class Position:
     liquidation_price: Optional[float] = None
     unrealized_pnl: Optional[float] = None
     leverage: Optional[float] = None
+    # Уровни, которые стратегия сопровождает для открытой позиции
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    stop_loss_order_id: Optional[str] = None  # ID стоп-ордера на бирже
 
     def __str__(self):
         return (f"Position(symbol={self.symbol}, side={self.side}, amount={self.amount}, "
                 f"entry_price={self.entry_price}, liquidation_price={self.liquidation_price}, "
-                f"unrealized_pnl={self.unrealized_pnl}, leverage={self.leverage})")
+                f"unrealized_pnl={self.unrealized_pnl}, leverage={self.leverage}, "
+                f"stop_loss={self.stop_loss}, take_profit={self.take_profit}, "
+                f"stop_loss_order_id={self.stop_loss_order_id})")
 
     def to_dict(self):
         return {
@@ -24,7 +30,10 @@ class Position:
             "entryPrice": self.entry_price,
             "liquidationPrice": self.liquidation_price,
             "unrealizedPnl": self.unrealized_pnl,
-            "leverage": self.leverage
+            "leverage": self.leverage,
+            "stopLoss": self.stop_loss,
+            "takeProfit": self.take_profit,
+            "stopLossOrderId": self.stop_loss_order_id
         }
 
     @classmethod
@@ -36,7 +45,10 @@ class Position:
             entry_price=data['entryPrice'],
             liquidation_price=data.get('liquidationPrice'),
             unrealized_pnl=data.get('unrealizedPnl'),
-            leverage=data.get('leverage')
+            leverage=data.get('leverage'),
+            stop_loss=data.get('stopLoss'),
+            take_profit=data.get('takeProfit'),
+            stop_loss_order_id=data.get('stopLossOrderId')
         )
 
     def update_unrealized_pnl(self, current_price: float):
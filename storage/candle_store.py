@@ -0,0 +1,134 @@
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+COLUMNS = (
+    ('timestamp', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+)
+
+
+class CandleStore:
+    """
+    Локальный колоночный архив свечей.
+
+    Для каждой пары (символ, таймфрейм) каждая колонка хранится в отдельном
+    бинарном файле, в который свечи только дописываются. Чтение выполняется
+    через memory-mapping, а выборка диапазона - поиском по колонке меток
+    времени и срезом без копирования данных.
+    """
+
+    def __init__(self, root: str = os.path.join('data', 'candles')):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+        self._maps: Dict[Tuple[str, str], Tuple[int, Dict[str, np.memmap]]] = {}
+
+    def _directory(self, symbol: str, timeframe: str) -> str:
+        safe_symbol = symbol.replace('/', '_').replace(':', '_')
+        return os.path.join(self.root, safe_symbol, timeframe)
+
+    def _column_path(self, symbol: str, timeframe: str, column: str) -> str:
+        return os.path.join(self._directory(symbol, timeframe), f"{column}.bin")
+
+    def length(self, symbol: str, timeframe: str) -> int:
+        """
+        Количество полностью записанных свечей.
+
+        Если запись была прервана, колонки могут иметь разную длину -
+        учитывается наименьшая из них.
+        """
+        lengths = []
+        for column, dtype in COLUMNS:
+            path = self._column_path(symbol, timeframe, column)
+            if not os.path.exists(path):
+                return 0
+            lengths.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+        return min(lengths)
+
+    def _repair(self, symbol: str, timeframe: str, length: int):
+        # Обрезаем хвосты колонок, оставшиеся после прерванной записи
+        for column, dtype in COLUMNS:
+            path = self._column_path(symbol, timeframe, column)
+            size = length * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        length = self.length(symbol, timeframe)
+        if length == 0:
+            return None
+        with open(self._column_path(symbol, timeframe, 'timestamp'), 'rb') as f:
+            f.seek((length - 1) * np.dtype(np.int64).itemsize)
+            return int(np.frombuffer(f.read(8), dtype=np.int64)[0])
+
+    def append(self, symbol: str, timeframe: str, ohlcv: List[List[float]]) -> int:
+        """
+        Дописывает свечи в формате ccxt, пропуская уже сохраненные.
+
+        :param ohlcv: список свечей [timestamp, open, high, low, close, volume], отсортированный по времени
+        :return: количество записанных свечей
+        """
+        if len(ohlcv) == 0:
+            return 0
+        os.makedirs(self._directory(symbol, timeframe), exist_ok=True)
+        self._repair(symbol, timeframe, self.length(symbol, timeframe))
+
+        rows = np.asarray(ohlcv, dtype=np.float64)
+        timestamps = rows[:, 0].astype(np.int64)
+        last_timestamp = self.last_timestamp(symbol, timeframe)
+        if last_timestamp is not None:
+            new = timestamps > last_timestamp
+            rows = rows[new]
+            timestamps = timestamps[new]
+        if len(rows) == 0:
+            return 0
+
+        for i, (column, dtype) in enumerate(COLUMNS):
+            values = timestamps if column == 'timestamp' else rows[:, i].astype(dtype)
+            with open(self._column_path(symbol, timeframe, column), 'ab') as f:
+                values.tofile(f)
+        return len(rows)
+
+    def read(self, symbol: str, timeframe: str, start: Optional[int] = None,
+             end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Возвращает свечи в диапазоне [start, end) по меткам времени в мс.
+
+        Массивы являются срезами memory-mapped файлов и не копируются.
+        """
+        columns = self._open(symbol, timeframe)
+        timestamps = columns['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        return {column: values[lo:hi] for column, values in columns.items()}
+
+    def tail(self, symbol: str, timeframe: str, count: int) -> Dict[str, np.ndarray]:
+        """
+        Возвращает последние count свечей.
+        """
+        columns = self._open(symbol, timeframe)
+        return {column: values[-count:] if count else values[:0] for column, values in columns.items()}
+
+    def _open(self, symbol: str, timeframe: str) -> Dict[str, np.ndarray]:
+        key = (symbol, timeframe)
+        length = self.length(symbol, timeframe)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == length:
+            return cached[1]
+
+        if length == 0:
+            columns = {column: np.zeros(0, dtype=dtype) for column, dtype in COLUMNS}
+        else:
+            columns = {
+                column: np.memmap(self._column_path(symbol, timeframe, column), dtype=dtype, mode='r', shape=(length,))
+                for column, dtype in COLUMNS
+            }
+        self._maps[key] = (length, columns)
+        return columns
@@ -0,0 +1,80 @@
+import argparse
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from storage.candle_store import CandleStore
+
+
+class CandleDownloader:
+    """
+    Загрузчик истории свечей в CandleStore.
+
+    Постранично запрашивает fetch_ohlcv и продолжает с последней сохраненной
+    свечи, поэтому прерванную загрузку можно просто запустить повторно.
+    Сохраняются только закрытые свечи.
+    """
+
+    def __init__(self, exchange, store: CandleStore, page_limit: int = 1000):
+        self.exchange = exchange
+        self.store = store
+        self.page_limit = page_limit
+        self.logger = logging.getLogger(__name__)
+
+    def download(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None) -> int:
+        """
+        Загружает свечи начиная с since (мс) или с последней сохраненной свечи.
+
+        :return: количество сохраненных свечей
+        """
+        timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        last_timestamp = self.store.last_timestamp(symbol, timeframe)
+        if last_timestamp is not None:
+            since = last_timestamp + timeframe_ms
+        elif since is None:
+            raise ValueError("Для пустого архива нужно указать начальную дату загрузки")
+
+        total = 0
+        while True:
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=self.page_limit)
+            # Последняя свеча может быть еще не закрыта - ее не сохраняем
+            closed_before = self.exchange.milliseconds() - timeframe_ms
+            ohlcv = [candle for candle in ohlcv if candle[0] <= closed_before]
+            if not ohlcv:
+                break
+
+            total += self.store.append(symbol, timeframe, ohlcv)
+            since = int(ohlcv[-1][0]) + timeframe_ms
+            self.logger.info(f"{symbol} {timeframe}: загружено {total} свечей, "
+                             f"последняя {datetime.fromtimestamp(ohlcv[-1][0] / 1000, tz=timezone.utc)}")
+        return total
+
+
+def main():
+    import ccxt
+
+    parser = argparse.ArgumentParser(description="Загрузка истории свечей Bybit в локальный архив")
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--timeframe', default='1m')
+    parser.add_argument('--since', help="Дата начала для пустого архива, например 2023-01-01")
+    parser.add_argument('--root', default=None, help="Каталог архива")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    exchange = ccxt.bybit({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
+    store = CandleStore(args.root) if args.root else CandleStore()
+    downloader = CandleDownloader(exchange, store)
+
+    since = None
+    if args.since:
+        since = int(datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+    for symbol in args.symbols:
+        started = time.monotonic()
+        count = downloader.download(symbol, args.timeframe, since)
+        logging.info(f"{symbol}: сохранено {count} свечей за {time.monotonic() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
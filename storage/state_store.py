@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from exchange.candle_buffer import CandleBuffer
+
+STATE_FILE = 'state.json'
+STATE_VERSION = 1
+
+
+class StateStore:
+    """
+    Локальные снимки состояния для быстрого перезапуска.
+
+    Состояние стратегий, индикаторов и менеджера рисков хранится в одном
+    JSON-файле, окна свечей - в файлах .npy (по одному на символ и таймфрейм),
+    которые при загрузке открываются через memory-mapping. Каждый файл
+    записывается во временный и атомарно заменяет прежний, поэтому прерванная
+    запись не портит последний снимок.
+    """
+
+    def __init__(self, root: str = 'state'):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+
+    def _candles_path(self, symbol: str, timeframe: str) -> str:
+        safe_symbol = symbol.replace('/', '_').replace(':', '_')
+        return os.path.join(self.root, 'candles', f"{safe_symbol}_{timeframe}.npy")
+
+    @staticmethod
+    def _replace(path: str, write):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def candle_window(buffer: CandleBuffer) -> np.ndarray:
+        """
+        Копия окна буфера в виде массива [timestamp, open, high, low, close, volume].
+        Метки времени в миллисекундах точно представимы в float64.
+        """
+        data = buffer.as_market_data()
+        return np.column_stack([data['timestamp']] + [data[column] for column in CandleBuffer.COLUMNS])
+
+    def save(self, state: Dict, candles: Optional[Dict[Tuple[str, str], np.ndarray]] = None):
+        """
+        :param state: состояние, сериализуемое в JSON
+        :param candles: словарь {(символ, таймфрейм): окно из candle_window}
+        """
+        os.makedirs(os.path.join(self.root, 'candles'), exist_ok=True)
+        # Сначала свечи, затем state.json
+        for (symbol, timeframe), window in (candles or {}).items():
+            self._replace(self._candles_path(symbol, timeframe), lambda f: np.save(f, window))
+
+        payload = json.dumps({'version': STATE_VERSION, 'saved_at': time.time(), **state}).encode('utf-8')
+        self._replace(os.path.join(self.root, STATE_FILE), lambda f: f.write(payload))
+
+    def load(self) -> Optional[Dict]:
+        """
+        :return: сохраненное состояние или None, если снимка нет или он не читается
+        """
+        path = os.path.join(self.root, STATE_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Не удалось прочитать снимок состояния {path}: {str(e)}")
+            return None
+        if state.get('version') != STATE_VERSION:
+            self.logger.warning(f"Снимок состояния версии {state.get('version')} не поддерживается")
+            return None
+        return state
+
+    def load_candles(self, symbol: str, timeframe: str) -> Optional[np.ndarray]:
+        """
+        Окно свечей [timestamp, open, high, low, close, volume] без копирования в память.
+        """
+        path = self._candles_path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Не удалось прочитать свечи {path}: {str(e)}")
+            return None
+
+    def tail(self, symbol: str, timeframe: str, count: int) -> Dict[str, np.ndarray]:
+        """
+        Последние count сохраненных свечей по колонкам; интерфейс CandleStore.tail
+        для warm_start клиентов биржи.
+        """
+        window = self.load_candles(symbol, timeframe)
+        if window is None:
+            window = np.zeros((0, len(CandleBuffer.COLUMNS) + 1))
+        window = window[-count:] if count else window[:0]
+        columns = {'timestamp': window[:, 0].astype(np.int64)}
+        for i, column in enumerate(CandleBuffer.COLUMNS, start=1):
+            columns[column] = window[:, i]
+        return columns
@@ -1,16 +1,30 @@
 import logging
-from typing import Dict, List
-from exchange.bybit_client import BybitClient
+from typing import Callable, Dict, List, Optional
+from bot.notifications import PRIORITY_TRADE
+from exchange.cycle_snapshot import CycleSnapshot
 from models.order import Order
 from models.position import Position
-from utils.risk_manager import RiskManager
+from utils.logger import TRADE_EVENT, SymbolLoggerAdapter
+from utils.risk_manager import ReservationBatcher, RiskManager
 
 class BaseTradingRobot:
-    def __init__(self, api_key: str, api_secret: str, symbol: str, risk_manager: RiskManager):
-        self.client = BybitClient(api_key, api_secret)
+    def __init__(self, api_key: str, api_secret: str, symbol: str, risk_manager: RiskManager,
+                 client=None):
+        # Все стратегии используют общий клиент биржи (BybitClient или SimulatedExchange)
+        if client is None:
+            from exchange.bybit_client import BybitClient
+            client = BybitClient.shared(api_key, api_secret)
+        self.client = client
         self.symbol = symbol
         self.risk_manager = risk_manager
-        self.logger = logging.getLogger(__name__)
+        # Все записи стратегии помечаются ее символом (поле symbol в JSON-логах)
+        self.logger = SymbolLoggerAdapter(logging.getLogger(__name__), symbol)
+        # Пакетная проверка резервов одновременно сработавших стратегий (устанавливается TradingRobot)
+        self.reservations: Optional[ReservationBatcher] = None
+        # Снимок позиций и баланса текущего цикла (устанавливается TradingRobot)
+        self.snapshot: Optional[CycleSnapshot] = None
+        # Отправка уведомлений (устанавливается TradingRobot)
+        self.notifier: Optional[Callable[[str, int], None]] = None
 
     def analyze_market(self, market_data: Dict):
         raise NotImplementedError("Метод должен быть реализован в подклассе")
@@ -18,10 +32,102 @@ class BaseTradingRobot:
     def execute_strategy(self):
         raise NotImplementedError("Метод должен быть реализован в подклассе")
 
+    def warm_up(self, market_data: Dict):
+        """
+        Прогревает индикаторы по уже загруженным свечам без торговых действий,
+        например перед горячей заменой стратегии.
+        """
+        indicators = getattr(self, 'indicators', None)
+        if indicators is not None:
+            indicators.update(market_data)
+
+    def get_state(self) -> Dict:
+        """
+        Состояние стратегии для снимка перезапуска (сериализуемое в JSON).
+        """
+        indicators = getattr(self, 'indicators', None)
+        return {'indicators': indicators.get_state()} if indicators is not None else {}
+
+    def set_state(self, state: Dict):
+        indicators = getattr(self, 'indicators', None)
+        if indicators is not None and 'indicators' in state:
+            indicators.set_state(state['indicators'])
+
+    def reconcile_state(self, open_orders: Optional[List[Order]] = None):
+        """
+        Сверяет восстановленное состояние с биржей после перезапуска.
+
+        :param open_orders: открытые ордера символа; None - если получить их не удалось
+        """
+        pass
+
+    @staticmethod
+    def _last_price(market_data: Dict) -> float:
+        """
+        Цена последней сделки из потока тикеров, а без него - закрытие последней свечи.
+        """
+        last_price = market_data.get('last_price')
+        return last_price if last_price is not None else market_data['close'][-1]
+
+    def notify(self, message: str, priority: int = PRIORITY_TRADE):
+        if self.notifier is not None:
+            self.notifier(message, priority)
+
     def place_order(self, order: Order) -> bool:
         return self.client.place_order(order)
 
+    def open_long_position(self, price: Optional[float] = None) -> bool:
+        return self._open_position('BUY', price)
+
+    def open_short_position(self, price: Optional[float] = None) -> bool:
+        return self._open_position('SELL', price)
+
+    def _open_position(self, side: str, price: Optional[float] = None) -> bool:
+        """
+        Открывает позицию рыночным ордером с уровнями SL/TP из параметров стратегии.
+
+        :param side: 'BUY' или 'SELL'
+        :param price: цена входа, по умолчанию текущая цена
+        :return: True, если ордер размещен
+        """
+        price = price or self.current_price
+        quantity = self.risk_manager.calculate_position_size(price, self.get_available_balance())
+        position_side = 'LONG' if side == 'BUY' else 'SHORT'
+        # Проверка лимитов и резервирование экспозиции выполняются атомарно
+        if quantity <= 0 or not self.reserve(position_side, quantity * price):
+            return False
+
+        direction = 1 if side == 'BUY' else -1
+        order = Order(
+            symbol=self.symbol,
+            side=side,
+            order_type='MARKET',
+            quantity=quantity,
+            price=price,
+            stop_loss=price * (1 - direction * self.stop_loss_pct),
+            take_profit=price * (1 + direction * self.take_profit_pct)
+        )
+        if self.place_order(order):
+            self.logger.info(f"Открыта позиция {side} по цене {price} для {self.symbol}", extra=TRADE_EVENT)
+            self.notify(f"{self.symbol}: открыта позиция {position_side} {quantity:.6g} по цене {price}")
+            return True
+        self.risk_manager.release(self.symbol, position_side, quantity * price)
+        return False
+
+    def reserve(self, side: str, trade_size: float) -> bool:
+        """
+        Атомарно проверяет лимиты и резервирует экспозицию под новую сделку символа.
+
+        :param side: 'LONG' или 'SHORT'
+        :param trade_size: номинал сделки
+        """
+        if self.reservations is not None:
+            return self.reservations.reserve(self.symbol, side, trade_size)
+        return self.risk_manager.try_reserve(self.symbol, side, trade_size)
+
     def get_open_positions(self) -> List[Position]:
+        if self.snapshot is not None:
+            return self.snapshot.get_positions(self.symbol)
         return self.client.get_open_positions(self.symbol)
 
     def close_position(self, position: Position) -> bool:
@@ -31,6 +137,8 @@ class BaseTradingRobot:
         return self.client.get_market_data(self.symbol)
 
     def get_available_balance(self) -> float:
+        if self.snapshot is not None:
+            return self.snapshot.available_balance
         return self.client.get_available_balance()
 
     def _check_trend(self, direction: str) -> bool:
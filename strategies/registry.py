@@ -0,0 +1,26 @@
+import importlib
+from typing import Dict, List, Type
+
+# Имя стратегии -> модуль с ее классом. Модуль импортируется только при
+# первом обращении, поэтому при запуске загружается одна активная стратегия.
+STRATEGIES: Dict[str, str] = {
+    'ScalpingStrategy1': 'strategies.strategy1',
+    'ScalpingStrategy2': 'strategies.strategy2',
+    'ScalpingStrategy3': 'strategies.strategy3',
+}
+
+
+def available_strategies() -> List[str]:
+    return list(STRATEGIES)
+
+
+def get_strategy_class(name: str) -> Type:
+    """
+    Возвращает класс стратегии по имени, импортируя его модуль при необходимости.
+
+    :raises ValueError: если стратегия не зарегистрирована
+    """
+    module_name = STRATEGIES.get(name)
+    if module_name is None:
+        raise ValueError(f"Неподдерживаемая стратегия: {name}")
+    return getattr(importlib.import_module(module_name), name)
@@ -1,49 +1,74 @@
 import numpy as np
-from typing import Dict
+from typing import Dict, List, Optional
 from strategies.base_trading_robot import BaseTradingRobot
-import ta
-import pandas as pd
-from utils.strategy_visualizer import update_visualizer
+from utils.indicators import ATR, RSI, IndicatorEngine
+from utils.strategy_visualizer import update_visualizer, visualizer_enabled
 from datetime import datetime
 from models.position import Position
 from models.order import Order
+from bot.notifications import PRIORITY_INFO
+from utils.logger import TRADE_EVENT
 
 class ScalpingStrategy1(BaseTradingRobot):
-    def __init__(self, api_key: str, api_secret: str, symbol: str, risk_manager):
-        super().__init__(api_key, api_secret, symbol, risk_manager)
-        self.rsi_period = 14
-        self.rsi_overbought = 70
-        self.rsi_oversold = 30
-        self.stop_loss_pct = 0.005  # 0.5%
-        self.take_profit_pct = 0.01  # 1%
-        self.trailing_stop_pct = 0.003  # 0.3%
-        self.partial_close_pct = 0.5  # 50% частичное закрытие
+    DEFAULT_PARAMS = {
+        'rsi_period': 14,
+        'rsi_overbought': 70,
+        'rsi_oversold': 30,
+        'stop_loss_pct': 0.005,  # 0.5%
+        'take_profit_pct': 0.01,  # 1%
+        'trailing_stop_pct': 0.003,  # 0.3%
+        'partial_close_pct': 0.5,  # 50% частичное закрытие
+        'max_positions': 4,  # Максимальное количество открытых позиций
+        'position_size_pct': 0.1,  # 10% от доступного баланса на одну позицию
+        'trend_period': 20,  # Период для определения тренда
+        'trend_threshold': 0.01  # Порог для определения тренда (1%)
+    }
+
+    def __init__(self, api_key: str, api_secret: str, symbol: str, risk_manager, client=None,
+                 params: Optional[Dict] = None):
+        super().__init__(api_key, api_secret, symbol, risk_manager, client)
+        params = {**self.DEFAULT_PARAMS, **(params or {})}
+        self.rsi_period = params['rsi_period']
+        self.rsi_overbought = params['rsi_overbought']
+        self.rsi_oversold = params['rsi_oversold']
+        self.stop_loss_pct = params['stop_loss_pct']
+        self.take_profit_pct = params['take_profit_pct']
+        self.trailing_stop_pct = params['trailing_stop_pct']
+        self.partial_close_pct = params['partial_close_pct']
         self.current_position = None
-        self.max_positions = 4  # Максимальное количество открытых позиций
-        self.position_size_pct = 0.1  # 10% от доступного баланса на одну позицию
+        self.max_positions = params['max_positions']
+        self.position_size_pct = params['position_size_pct']
         self.open_positions = []
-        self.trend_period = 20  # Период для определения тренда
-        self.trend_threshold = 0.01  # Порог для определения тренда (1%)
+        self.trend_period = params['trend_period']
+        self.trend_threshold = params['trend_threshold']
+        self.indicators = IndicatorEngine({
+            'rsi': RSI(self.rsi_period),
+            'atr': ATR(14)
+        })
 
     def analyze_market(self, market_data: Dict):
         self.update_positions()  # Обновляем информацию о позициях перед анализом
 
-        # Преобразуем списки в pandas Series
-        high = pd.Series(market_data['high'])
-        low = pd.Series(market_data['low'])
-        close_prices = pd.Series(market_data['close'])
-        volume = pd.Series(market_data['volume'])
+        self.market_data = market_data
+
+        # Индикаторы обновляются инкрементально только по новым и изменившимся свечам
+        self.indicators.update(market_data)
+        close_prices = np.asarray(market_data['close'])
+
+        self.rsi = self.indicators['rsi'].value
+        self.current_price = self._last_price(market_data)
+        self.atr = self.indicators['atr'].value
+
+        # Без визуализатора данные для отображения не собираем
+        if not visualizer_enabled():
+            return
 
-        self.rsi = ta.momentum.RSIIndicator(close_prices, self.rsi_period).rsi()
-        self.current_price = close_prices.iloc[-1]
-        self.atr = ta.volatility.AverageTrueRange(high=high, low=low, close=close_prices, window=14).average_true_range()
-        
         conditions = {
-            "RSI": self.rsi.iloc[-1],
+            "RSI": self.rsi,
             "Цена": self.current_price,
-            "Объем": volume.iloc[-1],
-            "Тренд": close_prices.pct_change(5).mean() * 100,  # 5-периодный тренд
-            "ATR": self.atr.iloc[-1]
+            "Объем": market_data['volume'][-1],
+            "Тренд": np.mean(close_prices[5:] / close_prices[:-5] - 1) * 100,  # 5-периодный тренд
+            "ATR": self.atr
         }
         
         position_data = self._get_position_data()
@@ -51,21 +76,53 @@ class ScalpingStrategy1(BaseTradingRobot):
         update_visualizer(self.symbol, conditions, position_data)
 
     def update_positions(self):
-        # Получаем актуальную информацию о позициях с биржи
+        # Получаем информацию о позициях символа из снимка цикла или состояния приватного потока
         exchange_positions = self.get_open_positions()
         
-        # Обновляем наш список открытых позиций
+        # Обновляем наш список открытых позиций, сохраняя уровни SL/TP и ID стоп-ордеров
+        tracked = {pos.side: pos for pos in self.open_positions}
         self.open_positions = []
+        self.current_position = None
         for pos in exchange_positions:
-            if pos.symbol == self.symbol:
-                self.open_positions.append(pos)
-                self.current_position = pos  # Обновляем текущую позицию
+            position = tracked.get(pos.side)
+            if position is None:
+                # Позиция открыта вне стратегии - рассчитываем уровни от цены входа
+                direction = 1 if pos.side == 'LONG' else -1
+                position = Position(self.symbol, pos.side, pos.amount, pos.entry_price,
+                                    stop_loss=pos.entry_price * (1 - direction * self.stop_loss_pct),
+                                    take_profit=pos.entry_price * (1 + direction * self.take_profit_pct))
+            else:
+                position.entry_price = pos.entry_price
+                position.amount = pos.amount
+            self.open_positions.append(position)
+            self.current_position = position  # Обновляем текущую позицию
+
+    def get_state(self) -> Dict:
+        state = super().get_state()
+        state['open_positions'] = [position.to_dict() for position in self.open_positions]
+        return state
+
+    def set_state(self, state: Dict):
+        super().set_state(state)
+        self.open_positions = [Position.from_dict(data) for data in state.get('open_positions', [])]
+        self.current_position = self.open_positions[-1] if self.open_positions else None
+
+    def reconcile_state(self, open_orders: Optional[List[Order]] = None):
+        # Закрытые за время простоя позиции удаляются, уровни SL/TP сохраненных остаются
+        self.update_positions()
+        if open_orders is None:
+            return
+        order_ids = {order.order_id for order in open_orders}
+        for position in self.open_positions:
+            if position.stop_loss_order_id not in order_ids:
+                # Стоп-ордер исполнен или отменен - при следующем переносе стопа будет создан новый
+                position.stop_loss_order_id = None
 
     def execute_strategy(self):
         if len(self.open_positions) < self.max_positions:
-            if self.rsi.iloc[-1] < self.rsi_oversold and self._check_trend('up'):
+            if self.rsi < self.rsi_oversold and self._check_trend('up'):
                 self.open_long_position(self.current_price)
-            elif self.rsi.iloc[-1] > self.rsi_overbought and self._check_trend('down'):
+            elif self.rsi > self.rsi_overbought and self._check_trend('down'):
                 self.open_short_position(self.current_price)
 
         self.manage_open_positions()
@@ -105,48 +162,60 @@ class ScalpingStrategy1(BaseTradingRobot):
         available_balance = self.get_available_balance()
         position_size = available_balance * self.position_size_pct
         quantity = position_size / price
+        if quantity <= 0 or not self.reserve('LONG', position_size):
+            return
         
         stop_loss = price * (1 - self.stop_loss_pct)
         take_profit = price * (1 + self.take_profit_pct)
         
-        order = self.place_order(
+        order = Order(
             symbol=self.symbol,
             side="BUY",
+            order_type="MARKET",
             quantity=quantity,
             price=price,
             stop_loss=stop_loss,
             take_profit=take_profit
         )
         
-        if order:
-            self.current_position = Position("LONG", price, stop_loss, take_profit, quantity)
+        if self.place_order(order):
+            self.current_position = Position(self.symbol, "LONG", quantity, price, stop_loss=stop_loss, take_profit=take_profit)
             self.open_positions.append(self.current_position)
-            self.logger.info(f"Открыта длинная позиция по цене {price}")
+            self.logger.info(f"Открыта длинная позиция по цене {price}", extra=TRADE_EVENT)
+            self.notify(f"{self.symbol}: открыта позиция LONG {quantity:.6g} по цене {price}")
+        else:
+            self.risk_manager.release(self.symbol, 'LONG', position_size)
 
     def open_short_position(self, price):
         available_balance = self.get_available_balance()
         position_size = available_balance * self.position_size_pct
         quantity = position_size / price
+        if quantity <= 0 or not self.reserve('SHORT', position_size):
+            return
         
         stop_loss = price * (1 + self.stop_loss_pct)
         take_profit = price * (1 - self.take_profit_pct)
         
-        order = self.place_order(
+        order = Order(
             symbol=self.symbol,
             side="SELL",
+            order_type="MARKET",
             quantity=quantity,
             price=price,
             stop_loss=stop_loss,
             take_profit=take_profit
         )
         
-        if order:
-            self.current_position = Position("SHORT", price, stop_loss, take_profit, quantity)
+        if self.place_order(order):
+            self.current_position = Position(self.symbol, "SHORT", quantity, price, stop_loss=stop_loss, take_profit=take_profit)
             self.open_positions.append(self.current_position)
-            self.logger.info(f"Открыта короткая позиция по цене {price}")
+            self.logger.info(f"Открыта короткая позиция по цене {price}", extra=TRADE_EVENT)
+            self.notify(f"{self.symbol}: открыта позиция SHORT {quantity:.6g} по цене {price}")
+        else:
+            self.risk_manager.release(self.symbol, 'SHORT', position_size)
 
     def manage_open_positions(self):
-        for position in self.open_positions:
+        for position in list(self.open_positions):
             if position.side == 'LONG':
                 if self.current_price >= position.entry_price * (1 + self.partial_close_pct):
                     self._partial_close(position)
@@ -157,28 +226,30 @@ class ScalpingStrategy1(BaseTradingRobot):
                 self._update_stop_loss_order(position)
 
     def _partial_close(self, position):
-        close_quantity = position.quantity * self.partial_close_pct
+        close_quantity = position.amount * self.partial_close_pct
         self._close_position(position, close_quantity)
-        position.quantity -= close_quantity
-        self.logger.info(f"Частично закрыта позиция: {position}")
+        self.logger.info(f"Частично закрыта позиция: {position}", extra=TRADE_EVENT)
 
     def _close_position(self, position, quantity=None):
         if quantity is None:
-            quantity = position.quantity
+            quantity = position.amount
         
-        order = self.place_order(
+        order = Order(
             symbol=self.symbol,
             side="SELL" if position.side == "LONG" else "BUY",
+            order_type="MARKET",
             quantity=quantity,
-            price=self.current_price
+            price=self.current_price,
+            reduce_only=True
         )
         
-        if order:
-            self.logger.info(f"Закрыта позиция: {position}")
-            if quantity == position.quantity:
+        if self.place_order(order):
+            self.logger.info(f"Закрыта позиция: {position}", extra=TRADE_EVENT)
+            self.notify(f"{self.symbol}: закрыто {quantity:.6g} позиции {position.side} по цене {self.current_price}")
+            if quantity == position.amount:
                 self.open_positions.remove(position)
             else:
-                position.quantity -= quantity
+                position.amount -= quantity
 
     def _update_trailing_stop(self, position):
         if position.side == 'LONG':
@@ -219,9 +290,10 @@ class ScalpingStrategy1(BaseTradingRobot):
                     symbol=self.symbol,
                     side='SELL' if position.side == 'LONG' else 'BUY',
                     order_type='STOP',
-                    quantity=position.quantity,
+                    quantity=position.amount,
                     price=new_stop_loss,
-                    stop_loss=new_stop_loss  # Устанавливаем стоп-лосс
+                    stop_loss=new_stop_loss,  # Устанавливаем стоп-лосс
+                    reduce_only=True
                 )
                 
                 # Отменяем предыдущий стоп-лосс ордер, если он есть
@@ -232,7 +304,9 @@ class ScalpingStrategy1(BaseTradingRobot):
                 if self.place_order(order):
                     position.stop_loss = new_stop_loss
                     position.stop_loss_order_id = order.order_id  # Предполагаем, что Order имеет атрибут order_id
-                    self.logger.info(f"Обновлен трейлинг-стоп для позиции: {position}. Новый стоп-лосс: {new_stop_loss:.2f}")
+                    self.logger.info(f"Обновлен трейлинг-стоп для позиции: {position}. Новый стоп-лосс: {new_stop_loss:.2f}",
+                                     extra=TRADE_EVENT)
+                    self.notify(f"{self.symbol}: стоп-лосс {position.side} перенесен на {new_stop_loss:.2f}", PRIORITY_INFO)
                 else:
                     self.logger.error(f"Не удалось обновить трейлинг-стоп для позиции: {position}")
             except Exception as e:
@@ -245,11 +319,10 @@ class ScalpingStrategy1(BaseTradingRobot):
         :param symbol: символ торговой пары
         :param order_id: ID ордера для отмены
         """
-        try:
-            self.client.exchange.cancel_order(order_id, symbol)
-            self.logger.info(f"Ордер {order_id} для {symbol} успешно отменен")
-        except Exception as e:
-            self.logger.error(f"Ошибка при отмене ордера {order_id} для {symbol}: {str(e)}")
+        if self.client.cancel_order(symbol, order_id):
+            self.logger.info(f"Ордер {order_id} для {symbol} успешно отменен", extra=TRADE_EVENT)
+        else:
+            self.logger.error(f"Ошибка при отмене ордера {order_id} для {symbol}")
 
     def _check_trend(self, direction: str) -> bool:
         """
@@ -258,7 +331,8 @@ class ScalpingStrategy1(BaseTradingRobot):
         :param direction: 'up' для восходящего тренда, 'down' для нисходящего
         :return: True, если тренд соответствует указанному направлению, иначе False
         """
-        close_prices = self.fetch_market_data()['close']
+        # Используем свечи, уже полученные в analyze_market, вместо повторной загрузки
+        close_prices = self.market_data['close']
         trend = (close_prices[-1] - close_prices[-self.trend_period]) / close_prices[-self.trend_period]
         
         if direction == 'up':
@@ -280,32 +354,11 @@ class ScalpingStrategy1(BaseTradingRobot):
         
         if position.side == 'LONG':
             # Для длинной позиции усредняем вниз
-            average_down_price = entry_price * (1 - self.atr.iloc[-1] / entry_price)
+            average_down_price = entry_price * (1 - self.atr / entry_price)
             return max(average_down_price, current_price * 0.98)  # Не более 2% ниже текущей цены
         elif position.side == 'SHORT':
             # Для короткой позиции усредняем вверх
-            average_up_price = entry_price * (1 + self.atr.iloc[-1] / entry_price)
+            average_up_price = entry_price * (1 + self.atr / entry_price)
             return min(average_up_price, current_price * 1.02)  # Не более 2% выше текущей цены
         else:
             raise ValueError("Неизвестный тип позиции")
-        
-    def get_available_balance(self) -> float:
-        """
-        Получает доступный баланс для торговли.
-        
-        :return: доступный баланс в USDT
-        """
-        return self.client.get_available_balance()
-
-
-class Position:
-    def __init__(self, side, entry_price, stop_loss, take_profit, quantity):
-        self.side = side
-        self.entry_price = entry_price
-        self.stop_loss = stop_loss
-        self.take_profit = take_profit
-        self.quantity = quantity
-        self.stop_loss_order_id = None  # Добавляем новый атрибут
-
-    def __str__(self):
-        return f"Position({self.side}, entry={self.entry_price}, SL={self.stop_loss}, TP={self.take_profit}, quantity={self.quantity}, SL_order_id={self.stop_loss_order_id})"
\ No newline at end of file
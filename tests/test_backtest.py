@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from backtest.engine import Backtester, get_default_params, run_backtest
+from backtest.signals import SIGNAL_FUNCTIONS, Signals
+from exchange.sim_exchange import generate_synthetic_candles
+
+
+def _candles(bars):
+    """
+    :param bars: список (open, high, low, close)
+    """
+    bars = np.array(bars, dtype=np.float64)
+    return {'timestamp': np.arange(len(bars), dtype=np.int64) * 60_000, 'open': bars[:, 0], 'high': bars[:, 1],
+            'low': bars[:, 2], 'close': bars[:, 3], 'volume': np.ones(len(bars))}
+
+
+def _simulate(strategy_name, params, bars, side='LONG'):
+    backtester = Backtester(strategy_name, params, fee_rate=0.0)
+    backtester._load(_candles(bars))
+    no_signal = np.zeros(len(bars), dtype=bool)
+    return backtester._simulate_position(Signals(no_signal, no_signal), 0, side, 100.0, 1.0)
+
+
+STOPS = {'stop_loss_pct': 0.01, 'take_profit_pct': 0.02}
+
+
+def test_stop_loss_fills_at_stop_level_or_at_open_after_gap():
+    trade, = _simulate('ScalpingStrategy2', STOPS, [(100, 100, 100, 100), (100, 100.5, 98.5, 99.5)])
+    assert (trade.exit_reason, trade.exit_price, trade.pnl) == ('stop_loss', 99.0, pytest.approx(-1.0))
+
+    # Бар открылся ниже стопа: исполнение по открытию, а не по уровню стопа
+    trade, = _simulate('ScalpingStrategy2', STOPS, [(100, 100, 100, 100), (95, 96, 94, 95)])
+    assert (trade.exit_reason, trade.exit_price) == ('stop_loss', 95.0)
+    trade, = _simulate('ScalpingStrategy2', STOPS, [(100, 100, 100, 100), (104, 105, 103, 104)], side='SHORT')
+    assert (trade.exit_reason, trade.exit_price) == ('stop_loss', 104.0)
+
+
+def test_take_profit_and_stop_loss_priority_within_one_bar():
+    trade, = _simulate('ScalpingStrategy2', STOPS, [(100, 100, 100, 100), (100, 102.5, 99.5, 102)])
+    assert (trade.exit_reason, trade.exit_price) == ('take_profit', 102.0)
+
+    trade, = _simulate('ScalpingStrategy2', STOPS, [(100, 100, 100, 100), (100, 103, 98, 100)])
+    assert (trade.exit_reason, trade.exit_price) == ('stop_loss', 99.0)
+
+
+def test_trailing_stop_follows_closes():
+    params = {**STOPS, 'take_profit_pct': 0.5, 'trailing_stop_pct': 0.01, 'partial_close_pct': 0.0}
+    bars = [(100, 100, 100, 100), (100, 102, 100, 102), (102, 105, 102, 105), (105, 105, 104.5, 104.5),
+            (104.4, 104.4, 103.5, 103.6)]
+    trade, = _simulate('ScalpingStrategy1', params, bars)
+    assert trade.exit_reason == 'trailing_stop' and trade.exit_index == 4
+    assert trade.exit_price == pytest.approx(105 * 0.99)
+
+
+def test_partial_close_then_take_profit():
+    params = {**STOPS, 'stop_loss_pct': 0.05, 'trailing_stop_pct': 0.0, 'partial_close_pct': 0.01}
+    bars = [(100, 100, 100, 100), (100, 101.5, 100, 101), (101, 102.5, 101, 102)]
+    partial, final = _simulate('ScalpingStrategy1', params, bars)
+    assert (partial.exit_reason, partial.exit_price, partial.quantity) == ('partial', 101.0, pytest.approx(0.01))
+    assert (final.exit_reason, final.exit_price, final.quantity) == ('take_profit', 102.0, pytest.approx(0.99))
+
+
+def test_equity_curve_matches_trades():
+    candles = generate_synthetic_candles(['BTCUSDT'], 3000, seed=5)['BTCUSDT']
+    result = run_backtest('ScalpingStrategy2', candles, initial_balance=1000.0)
+    assert result.trades
+    assert len(result.equity) == len(candles['close'])
+    assert result.equity[0] == pytest.approx(1000.0)
+    # Последняя позиция закрывается в конце истории, поэтому итог равен сумме сделок
+    assert result.equity[-1] == pytest.approx(1000.0 + sum(trade.pnl for trade in result.trades))
+    assert result.metrics['trades'] == len(result.trades)
+
+
+@pytest.mark.parametrize('strategy_name', ['ScalpingStrategy2', 'ScalpingStrategy3'])
+def test_backtest_signals_match_live_strategy(strategy_name):
+    from strategies.registry import get_strategy_class
+
+    candles = generate_synthetic_candles(['BTCUSDT'], 300, seed=6)['BTCUSDT']
+    params = get_default_params(strategy_name)
+    signals = SIGNAL_FUNCTIONS[strategy_name](candles, params)
+    strategy = get_strategy_class(strategy_name)('sim', 'sim', 'BTCUSDT', None, client=object())
+    for i in range(len(candles['close'])):
+        strategy.analyze_market({column: values[:i + 1] for column, values in candles.items()})
+        price = strategy.current_price
+        if strategy_name == 'ScalpingStrategy2':
+            live = price < strategy.bb.lband, price > strategy.bb.hband
+        else:
+            live = (strategy.macd_diff > 0 and price > strategy.ema), (strategy.macd_diff < 0 and price < strategy.ema)
+        assert (signals.long_entry[i], signals.short_entry[i]) == live
+
+
+def test_default_params_come_from_registry():
+    from strategies.strategy2 import ScalpingStrategy2
+
+    assert get_default_params('ScalpingStrategy2') == ScalpingStrategy2.DEFAULT_PARAMS
+    with pytest.raises(ValueError):
+        get_default_params('NoSuchStrategy')
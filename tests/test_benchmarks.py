@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks import cases  # noqa: F401
+from benchmarks.runner import BENCHMARKS, compare, measure
+
+
+@pytest.mark.parametrize('name', [name for name in BENCHMARKS if not name.endswith(('100_symbols', '500_symbols'))])
+def test_benchmark_runs(name):
+    operation, units = BENCHMARKS[name](True)
+    result = measure(operation, units, repeat=1, min_time=0.0)
+    assert result['median'] > 0
+
+
+def test_compare_flags_regressions():
+    baseline = {'a': {'median': 1.0}, 'b': {'median': 1.0}}
+    current = {'a': {'median': 1.05}, 'b': {'median': 1.5}, 'c': {'median': 1.0}}
+    result = {item['name']: item['regression'] for item in compare(current, baseline, threshold=0.1)}
+    assert result == {'a': False, 'b': True}
+
+
+def test_cold_import_loads_only_the_active_strategy():
+    import subprocess
+    import sys
+
+    from benchmarks.import_report import PROJECT_ROOT
+
+    code = ("import sys; import exchange.data_fetcher; from strategies.registry import get_strategy_class; "
+            "get_strategy_class('ScalpingStrategy2'); "
+            "print(','.join(m for m in ('strategies.strategy1', 'strategies.strategy3', 'telegram', 'tkinter', "
+            "'ccxt', 'pandas') if m in sys.modules))")
+    completed = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == ''
+
+
+def test_shard_coordinator_without_telegram_does_not_import_it():
+    import subprocess
+    import sys
+
+    from benchmarks.import_report import PROJECT_ROOT
+
+    code = ("import sys; from exchange.sharding import ShardCoordinator; "
+            "ShardCoordinator('key', 'secret', ['A', 'B'], None, 100, 50, 0.1, processes=2); "
+            "print('telegram' in sys.modules, 'bot.telegram_bot' in sys.modules)")
+    completed = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == 'False False'
+
+
+def test_import_report_parses_importtime():
+    from benchmarks.import_report import measure_imports, render_report
+
+    timings = measure_imports('import strategies.registry')
+    assert any(timing.module == 'strategies.registry' and timing.depth == 0 for timing in timings)
+    assert 'strategies.registry' in render_report(timings)
+
+
+def test_unknown_strategy_is_rejected():
+    from strategies.registry import get_strategy_class
+
+    with pytest.raises(ValueError):
+        get_strategy_class('NoSuchStrategy')
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from storage.candle_store import CandleStore
+from storage.downloader import CandleDownloader
+
+MINUTE = 60_000
+
+
+def _rows(start, count):
+    return [[i * MINUTE, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(start, start + count)]
+
+
+class FakeExchange:
+    """
+    Биржа с историей из bars минутных свечей; последняя свеча еще не закрыта.
+    """
+
+    def __init__(self, bars, fail_after=None):
+        self.rows = _rows(0, bars)
+        self.now = (bars - 1) * MINUTE + 30_000
+        self.fail_after = fail_after
+        self.requests = []
+
+    def parse_timeframe(self, timeframe):
+        return 60
+
+    def milliseconds(self):
+        return self.now
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        if self.fail_after is not None and len(self.requests) >= self.fail_after:
+            raise ConnectionError("обрыв соединения")
+        self.requests.append(since)
+        return [row for row in self.rows if row[0] >= since][:limit]
+
+
+def test_append_skips_stored_bars_and_read_returns_memmap_views(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.append('BTC/USDT:USDT', '1m', _rows(0, 5)) == 5
+    # Пересекающийся пакет: сохраненные свечи пропускаются
+    assert store.append('BTC/USDT:USDT', '1m', _rows(3, 4)) == 2
+    assert store.length('BTC/USDT:USDT', '1m') == 7
+    assert store.last_timestamp('BTC/USDT:USDT', '1m') == 6 * MINUTE
+
+    candles = store.read('BTC/USDT:USDT', '1m', start=2 * MINUTE, end=5 * MINUTE)
+    assert list(candles['timestamp']) == [2 * MINUTE, 3 * MINUTE, 4 * MINUTE]
+    assert list(candles['close']) == [3.5, 4.5, 5.5]
+    # Срезы memory-mapped файлов, а не копии
+    mapped = store._open('BTC/USDT:USDT', '1m')
+    for column, values in candles.items():
+        assert isinstance(values, np.memmap) and np.shares_memory(values, mapped[column])
+    assert list(store.tail('BTC/USDT:USDT', '1m', 2)['timestamp']) == [5 * MINUTE, 6 * MINUTE]
+
+
+def test_torn_write_is_truncated_to_complete_bars(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append('BTCUSDT', '1m', _rows(0, 3))
+    # Прерванная запись: в колонке close одна лишняя свеча и половина следующей
+    with open(store._column_path('BTCUSDT', '1m', 'close'), 'ab') as f:
+        f.write(np.float64(99.0).tobytes() + b'\x00' * 4)
+    assert store.length('BTCUSDT', '1m') == 3
+
+    assert store.append('BTCUSDT', '1m', _rows(3, 1)) == 1
+    candles = store.read('BTCUSDT', '1m')
+    assert list(candles['timestamp']) == [0, MINUTE, 2 * MINUTE, 3 * MINUTE]
+    assert list(candles['close']) == [1.5, 2.5, 3.5, 4.5]
+    for column in ('timestamp', 'open', 'close', 'volume'):
+        assert (tmp_path / 'BTCUSDT' / '1m' / f'{column}.bin').stat().st_size == 4 * 8
+
+
+def test_download_excludes_open_bar_and_resumes_from_last_bar(tmp_path):
+    store = CandleStore(str(tmp_path))
+    exchange = FakeExchange(25, fail_after=2)
+    downloader = CandleDownloader(exchange, store, page_limit=10)
+    with pytest.raises(ValueError):
+        downloader.download('BTCUSDT', '1m')
+    with pytest.raises(ConnectionError):
+        downloader.download('BTCUSDT', '1m', since=0)
+    assert store.length('BTCUSDT', '1m') == 20
+
+    exchange.fail_after = None
+    exchange.requests.clear()
+    assert downloader.download('BTCUSDT', '1m', since=0) == 4
+    # Продолжение со свечи после последней сохраненной, а не с since
+    assert exchange.requests[0] == 20 * MINUTE
+    timestamps = store.read('BTCUSDT', '1m')['timestamp']
+    assert list(timestamps) == [i * MINUTE for i in range(24)]
+    assert store.last_timestamp('BTCUSDT', '1m') == 23 * MINUTE  # незакрытая свеча 24 не сохранена
@@ -0,0 +1,220 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from exchange.async_engine import AsyncTradingEngine
+from exchange.scheduler import BarCloseScheduler, parse_timeframe
+
+
+@pytest.mark.parametrize('timeframe, offset, now, expected', [
+    ('1m', 1.0, 120.5, 121.0),
+    ('1m', 1.0, 121.0, 181.0),
+    ('1m', 1.0, 150.0, 181.0),
+    ('5m', 2.0, 1000.0, 1202.0),
+    ('1h', 1.0, 18000.5, 18001.0),
+    ('4h', 1.0, 14401.5, 28801.0),
+    ('1d', 5.0, 86400.0 * 3 + 4.0, 86400.0 * 3 + 5.0),
+])
+def test_next_wakeup_follows_bar_close(timeframe, offset, now, expected):
+    scheduler = BarCloseScheduler(timeframe, offset)
+    assert scheduler.next_wakeup(now) == expected
+
+
+def test_parse_timeframe():
+    assert parse_timeframe('15m') == 900
+    assert parse_timeframe('4h') == 14400
+    with pytest.raises(ValueError):
+        parse_timeframe('10x')
+
+
+def test_wait_records_lateness(monkeypatch):
+    scheduler = BarCloseScheduler('1m')
+    monkeypatch.setattr(scheduler, 'next_wakeup', lambda now=None: 0.0)
+    lateness = asyncio.run(scheduler.wait())
+    assert lateness > 0
+    assert scheduler.stats()['wakeups'] == 1 and scheduler.stats()['max_lateness'] == lateness
+
+
+class DelayedBarClient:
+    """
+    Клиент, который публикует новый бар только после publish_after запросов.
+    """
+
+    def __init__(self, publish_after: int, asynchronous: bool = False):
+        self.publish_after = publish_after
+        self.asynchronous = asynchronous
+        self.calls = 0
+
+    def _data(self):
+        self.calls += 1
+        last = 120_000 if self.calls > self.publish_after else 60_000
+        timestamps = np.array([last - 60_000, last], dtype=np.int64)
+        return {'timestamp': timestamps, 'close': np.array([1.0, 2.0])}
+
+    def get_market_data(self, symbol, timeframe='1m', limit=100):
+        if self.asynchronous:
+            async def fetch():
+                return self._data()
+            return fetch()
+        return self._data()
+
+
+def _fetch(client, retries=3):
+    engine = AsyncTradingEngine(None, client, BarCloseScheduler('1m'), new_bar_retries=retries, retry_delay=0)
+    engine._last_bar_timestamps['BTCUSDT'] = 60_000
+    try:
+        return asyncio.run(engine._fetch_new_bar('BTCUSDT')), engine
+    finally:
+        engine.executor.shutdown()
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_fetch_new_bar_retries_until_bar_is_published(asynchronous):
+    client = DelayedBarClient(publish_after=2, asynchronous=asynchronous)
+    market_data, engine = _fetch(client)
+    assert client.calls == 3
+    assert market_data['timestamp'][-1] == 120_000
+    assert engine._last_bar_timestamps['BTCUSDT'] == 120_000
+
+
+def test_fetch_new_bar_gives_up_without_new_bar():
+    client = DelayedBarClient(publish_after=10)
+    market_data, engine = _fetch(client, retries=2)
+    assert market_data is None
+    assert client.calls == 3
+    assert engine._last_bar_timestamps['BTCUSDT'] == 60_000
+
+
+class CountingClient:
+    """
+    Клиент свечей, который считает запросы и одновременно выполняемые загрузки.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_market_data(self, symbol, timeframe='1m', limit=100):
+        self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {'timestamp': np.array([60_000 * self.calls[symbol]], dtype=np.int64), 'close': np.array([1.0])}
+
+
+class RecordingStrategy:
+    def __init__(self):
+        self.analyzed = []
+
+    def analyze_market(self, market_data):
+        self.analyzed.append(market_data)
+
+    def execute_strategy(self):
+        pass
+
+
+class FakeRobot:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.strategies = {symbol: RecordingStrategy() for symbol in symbols}
+        self.snapshot_refreshes = 0
+
+    def apply_pending_strategies(self):
+        pass
+
+    def refresh_snapshot(self):
+        self.snapshot_refreshes += 1
+
+
+def test_cycle_fetches_each_symbol_once_with_bounded_concurrency():
+    symbols = [f'S{i}USDT' for i in range(20)]
+    robot = FakeRobot(symbols)
+    client = CountingClient()
+    engine = AsyncTradingEngine(robot, client, BarCloseScheduler('1m'), max_concurrency=5, retry_delay=0)
+    try:
+        asyncio.run(engine.run_cycle(symbols))
+    finally:
+        engine.executor.shutdown()
+
+    assert client.calls == {symbol: 1 for symbol in symbols}
+    assert 1 < client.max_in_flight <= 5
+    assert all(len(strategy.analyzed) == 1 for strategy in robot.strategies.values())
+    assert robot.snapshot_refreshes == 1
+
+
+def test_cycle_requests_account_once_and_strategies_wait_for_snapshot():
+    from exchange.data_fetcher import TradingRobot
+    from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles
+
+    events = []
+
+    class CountingExchange(SimulatedExchange):
+        def get_all_open_positions(self, symbols):
+            # Медленный запрос позиций: стратегии не должны стартовать раньше снимка
+            time.sleep(0.05)
+            events.append('positions')
+            return super().get_all_open_positions(symbols)
+
+        def get_balance_summary(self):
+            events.append('balance')
+            return super().get_balance_summary()
+
+    symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+    exchange = CountingExchange(generate_synthetic_candles(symbols, 300, seed=3))
+    exchange.advance()
+    robot = TradingRobot('sim', 'sim', symbols, None, 100, 1000, 0.5, client=exchange, enable_visualizer=False)
+    for strategy in robot.strategies.values():
+        analyze_market = strategy.analyze_market
+        strategy.analyze_market = lambda market_data, analyze_market=analyze_market: (
+            events.append('strategy'), analyze_market(market_data))
+    try:
+        asyncio.run(robot.engine.run_cycle(symbols))
+    finally:
+        robot.engine.executor.shutdown(wait=True)
+
+    assert events == ['positions', 'balance'] + ['strategy'] * len(symbols)
+
+
+def test_cycle_entries_are_reserved_through_batches():
+    import threading
+
+    from exchange.data_fetcher import TradingRobot
+    from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles
+    from strategies.base_trading_robot import BaseTradingRobot
+
+    symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT']
+    barrier = threading.Barrier(len(symbols), timeout=5)
+
+    class AlwaysLong(BaseTradingRobot):
+        stop_loss_pct = 0.01
+        take_profit_pct = 0.02
+
+        def analyze_market(self, market_data):
+            self.current_price = self._last_price(market_data)
+
+        def execute_strategy(self):
+            # Все стратегии подают сигнал одновременно
+            barrier.wait()
+            self.open_long_position()
+
+    exchange = SimulatedExchange(generate_synthetic_candles(symbols, 300, seed=5))
+    exchange.advance()
+    robot = TradingRobot('sim', 'sim', symbols, None, 100, 1000, 0.5, client=exchange, enable_visualizer=False,
+                         max_concurrency=len(symbols), max_total_exposure=250)
+    robot.strategies = robot._create_strategies('AlwaysLong', AlwaysLong)
+    batches = []
+    reserve_batch = robot.risk_manager.reserve_batch
+    robot.risk_manager.reserve_batch = lambda requests: batches.append(len(requests)) or reserve_batch(requests)
+    try:
+        asyncio.run(robot.engine.run_cycle(symbols))
+    finally:
+        robot.engine.executor.shutdown(wait=True)
+
+    assert sum(batches) == len(symbols)
+    # Номинал входа 100, общий лимит 250: открыты только две позиции
+    assert len(exchange.positions) == 2
+    assert robot.risk_manager.total_exposure == 200
@@ -0,0 +1,571 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from exchange.candle_buffer import CandleBuffer
+from exchange.rate_limiter import (ENDPOINT_MARKET, ENDPOINT_ORDER, PRIORITY_ORDER, PRIORITY_POLLING,
+                                   RateLimitScheduler)
+
+
+def test_polling_is_shed_before_orders():
+    limiter = RateLimitScheduler(budgets={ENDPOINT_MARKET: (1.0, 100), ENDPOINT_ORDER: (10.0, 10)},
+                                 global_budget=(1.0, 10), reserve=3)
+    granted = sum(limiter.acquire(ENDPOINT_MARKET, PRIORITY_POLLING, timeout=0) for _ in range(10))
+    # Последние reserve токенов общей корзины доступны только ордерам
+    assert granted == 7
+    assert limiter.shed[ENDPOINT_MARKET] == 3
+    assert all(limiter.acquire(ENDPOINT_ORDER, PRIORITY_ORDER, timeout=0) for _ in range(3))
+
+
+def test_waiting_order_is_served_before_polling():
+    limiter = RateLimitScheduler(global_budget=(20.0, 1), reserve=0)
+    assert limiter.acquire(ENDPOINT_MARKET, PRIORITY_POLLING)
+    served = []
+
+    def request(endpoint, priority):
+        limiter.acquire(endpoint, priority)
+        served.append(endpoint)
+
+    poller = threading.Thread(target=request, args=(ENDPOINT_MARKET, PRIORITY_POLLING))
+    poller.start()
+    time.sleep(0.01)
+    order = threading.Thread(target=request, args=(ENDPOINT_ORDER, PRIORITY_ORDER))
+    order.start()
+    poller.join()
+    order.join()
+    assert served == [ENDPOINT_ORDER, ENDPOINT_MARKET]
+
+
+def test_async_acquire_respects_rate():
+    limiter = RateLimitScheduler(budgets={ENDPOINT_MARKET: (50.0, 1)})
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(5):
+            assert await limiter.acquire_async(ENDPOINT_MARKET, PRIORITY_POLLING)
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.07
+
+
+class _RestStub:
+    """
+    Заглушка AsyncBybitClient: окно из трех свечей, последняя - текущая минута сервера.
+    """
+
+    def __init__(self):
+        self.candle_buffers = {}
+        self.calls = []
+        self.now = 180_000
+
+    async def get_market_data(self, symbol, timeframe='1m', limit=100):
+        self.calls.append(symbol)
+        buffer = self.candle_buffers.setdefault((symbol, timeframe), CandleBuffer(limit))
+        buffer.update([[t, 1.0, 2.0, 0.5, 1.5, 10.0] for t in range(self.now - 120_000, self.now + 1, 60_000)])
+        return buffer.as_market_data()
+
+    def warm_start(self, store, symbol, timeframe='1m', limit=100):
+        return 0
+
+    async def close(self):
+        pass
+
+
+def _kline(symbol, start, close):
+    return {'topic': f'kline.1.{symbol}', 'type': 'snapshot',
+            'data': [{'start': start, 'end': start + 59_999, 'interval': '1', 'open': '1', 'high': '3',
+                      'low': '0.5', 'close': str(close), 'volume': '7', 'confirm': False}]}
+
+
+def test_market_stream_feeds_buffers_and_backfills_after_reconnect():
+    web = pytest.importorskip('aiohttp.web')
+
+    from exchange.ws_market_stream import BybitMarketStream
+
+    async def run():
+        subscriptions = []
+        connections = []
+
+        async def handler(request):
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            connections.append(ws)
+            async for message in ws:
+                data = message.json()
+                if data.get('op') != 'subscribe':
+                    continue
+                subscriptions.append(data['args'])
+                await ws.send_json({'success': True, 'op': 'subscribe'})
+                if len(connections) == 1 and len(subscriptions) == 1:
+                    await ws.send_json(_kline('BTCUSDT', 180_000, 2.5))
+                    await ws.send_json({'topic': 'tickers.BTCUSDT', 'type': 'snapshot',
+                                        'data': {'symbol': 'BTCUSDT', 'lastPrice': '2.75'}})
+                    await ws.send_json(_kline('BTCUSDT', 240_000, 2.6))
+                    # Разрываем соединение, чтобы проверить переподключение и догрузку
+                    await asyncio.sleep(0.05)
+                    await ws.close()
+            return ws
+
+        app = web.Application()
+        app.router.add_get('/ws', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        rest = _RestStub()
+        stream = BybitMarketStream(rest, ['BTC/USDT:USDT', 'ETHUSDT'], url=f'http://127.0.0.1:{port}/ws',
+                                   max_reconnect_delay=0.05)
+        try:
+            await stream.get_market_data('BTC/USDT:USDT')
+            for _ in range(100):
+                if stream.last_prices and len(connections) == 1:
+                    break
+                await asyncio.sleep(0.01)
+            market_data = await stream.get_market_data('BTC/USDT:USDT')
+            assert market_data['last_price'] == 2.75
+            assert list(market_data['timestamp']) == [60_000, 120_000, 180_000, 240_000]
+            assert market_data['close'][-2] == 2.5 and market_data['close'][-1] == 2.6
+
+            rest.now = 360_000
+            for _ in range(200):
+                if stream.reconnects and len(rest.calls) >= 6:
+                    break
+                await asyncio.sleep(0.01)
+            market_data = await stream.get_market_data('BTC/USDT:USDT')
+            assert market_data['timestamp'][-1] == 360_000
+        finally:
+            await stream.close()
+            await runner.cleanup()
+
+        assert sorted(subscriptions[0]) == sorted(['kline.1.BTCUSDT', 'tickers.BTCUSDT',
+                                                   'kline.1.ETHUSDT', 'tickers.ETHUSDT'])
+        assert stream.reconnects >= 1
+
+    asyncio.run(run())
+
+
+def test_market_stream_window_is_not_changed_by_later_klines():
+    pytest.importorskip('aiohttp')
+
+    from exchange.ws_market_stream import BybitMarketStream
+
+    async def run():
+        rest = _RestStub()
+        buffer = CandleBuffer(3)
+        buffer.update([[t, 1.0, 2.0, 0.5, 1.5, 10.0] for t in (60_000, 120_000, 180_000)])
+        rest.candle_buffers[('BTCUSDT', '1m')] = buffer
+        stream = BybitMarketStream(rest, ['BTCUSDT'], limit=3, url='ws://127.0.0.1:9/ws', max_reconnect_delay=0.05)
+        try:
+            market_data = await stream.get_market_data('BTCUSDT')
+            # Обновления из WebSocket между чтением окна и расчетом стратегии:
+            # правка текущей свечи и новые свечи с переносом окна в начало массивов
+            stream._handle_klines('BTCUSDT', _kline('BTCUSDT', 180_000, 9.0)['data'])
+            for start in (240_000, 300_000, 360_000):
+                stream._handle_klines('BTCUSDT', _kline('BTCUSDT', start, 8.0)['data'])
+            assert list(market_data['timestamp']) == [60_000, 120_000, 180_000]
+            assert list(market_data['close']) == [1.5, 1.5, 1.5]
+            assert buffer.as_market_data()['timestamp'][-1] == 360_000
+        finally:
+            await stream.close()
+
+    asyncio.run(run())
+
+
+def test_market_stream_gap_triggers_rest_backfill():
+    from exchange.ws_market_stream import BybitMarketStream, bybit_interval
+
+    async def run():
+        rest = _RestStub()
+        stream = BybitMarketStream(rest, ['BTCUSDT'])
+        await rest.get_market_data('BTCUSDT')
+        rest.calls.clear()
+        rest.now = 600_000
+        stream._handle_message(_kline('BTCUSDT', 600_000, 3.0))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert rest.calls == ['BTCUSDT']
+        assert rest.candle_buffers[('BTCUSDT', '1m')].last_timestamp == 600_000
+
+    asyncio.run(run())
+    assert bybit_interval('1m') == '1' and bybit_interval('1h') == '60' and bybit_interval('1d') == 'D'
+
+
+def test_market_stream_tracks_and_cancels_backfill_tasks():
+    from exchange.ws_market_stream import BybitMarketStream
+
+    class BlockingRest(_RestStub):
+        async def get_market_data(self, symbol, timeframe='1m', limit=100):
+            self.calls.append(symbol)
+            await asyncio.Event().wait()
+
+    async def run():
+        rest = BlockingRest()
+        buffer = CandleBuffer(3)
+        buffer.update([[t, 1.0, 2.0, 0.5, 1.5, 10.0] for t in (60_000, 120_000, 180_000)])
+        rest.candle_buffers[('BTCUSDT', '1m')] = buffer
+        stream = BybitMarketStream(rest, ['BTCUSDT'])
+        stream._handle_message(_kline('BTCUSDT', 600_000, 3.0))
+        # Повторный пропуск до завершения догрузки не запускает вторую
+        stream._handle_message(_kline('BTCUSDT', 660_000, 3.0))
+        await asyncio.sleep(0.01)
+        task, = stream._backfill_tasks
+        assert rest.calls == ['BTCUSDT']
+
+        await stream.close()
+        assert task.cancelled()
+        assert not stream._backfill_tasks and not stream._backfilling
+
+    asyncio.run(run())
+
+
+class _AccountClientStub:
+    def __init__(self):
+        self.position_calls = 0
+
+    def get_all_open_positions(self, symbols):
+        from models.position import Position
+
+        self.position_calls += 1
+        return {'BTCUSDT': [Position('BTCUSDT', 'LONG', 0.5, 100.0)], 'ETHUSDT': []}
+
+    def get_balance_summary(self):
+        return {'total': 1000.0, 'free': 800.0}
+
+    def get_open_orders(self, symbols):
+        return {symbol: [] for symbol in symbols}
+
+
+def test_account_state_applies_private_events():
+    from exchange.account_state import AccountStateStore
+
+    client = _AccountClientStub()
+    store = AccountStateStore(client, ['BTCUSDT', 'ETH/USDT:USDT'], reconcile_interval=60)
+    store.refresh(['BTCUSDT', 'ETH/USDT:USDT'])
+    assert store.get_positions('BTCUSDT')[0].amount == 0.5
+
+    store.apply_message({'topic': 'order', 'data': [
+        {'symbol': 'ETHUSDT', 'orderId': 'o1', 'side': 'Sell', 'orderType': 'Market', 'qty': '1',
+         'price': '', 'triggerPrice': '95', 'orderStatus': 'Untriggered', 'reduceOnly': True}]})
+    order = store.get_order('o1')
+    assert order.symbol == 'ETH/USDT:USDT' and order.order_type == 'STOP' and order.price == 95.0
+
+    store.apply_message({'topic': 'position', 'data': [
+        {'symbol': 'ETHUSDT', 'side': 'Sell', 'size': '2', 'entryPrice': '50', 'liqPrice': '',
+         'unrealisedPnl': '1.5', 'leverage': '10', 'positionIdx': 0},
+        {'symbol': 'BTCUSDT', 'side': '', 'size': '0', 'entryPrice': '0', 'positionIdx': 0}]})
+    store.apply_message({'topic': 'order', 'data': [
+        {'symbol': 'ETHUSDT', 'orderId': 'o1', 'side': 'Sell', 'orderStatus': 'Cancelled'}]})
+    store.apply_message({'topic': 'wallet', 'data': [
+        {'coin': [{'coin': 'USDT', 'equity': '1003', 'walletBalance': '1001.5', 'availableToWithdraw': '700'}]}]})
+
+    assert store.get_positions('BTCUSDT') == []
+    position = store.get_positions('ETH/USDT:USDT')[0]
+    assert position.side == 'SHORT' and position.amount == 2.0 and position.liquidation_price is None
+    assert store.get_order('o1') is None and store.get_open_orders('ETH/USDT:USDT') == []
+    assert store.balance == 1001.5 and store.available_balance == 700.0
+
+    # При подключенном потоке сверка выполняется не чаще reconcile_interval
+    store.stream_connected = True
+    store.refresh(['BTCUSDT', 'ETH/USDT:USDT'])
+    assert client.position_calls == 1
+    store.mark_stale()
+    store.refresh(['BTCUSDT', 'ETH/USDT:USDT'])
+    assert client.position_calls == 2
+
+
+def test_wallet_events_and_reconcile_report_the_same_balance():
+    from exchange.account_state import AccountStateStore
+    from utils.risk_manager import RiskManager
+
+    store = AccountStateStore(_AccountClientStub(), ['BTCUSDT', 'ETHUSDT'])
+    risk_manager = RiskManager(100, 50, 0.5)
+    store.reconcile(['BTCUSDT', 'ETHUSDT'])
+    risk_manager.update_balance(store.balance)
+    # Нереализованный PnL позиции (equity выше баланса кошелька) не является дневной прибылью или убытком
+    store.apply_message({'topic': 'wallet', 'data': [
+        {'coin': [{'coin': 'USDT', 'equity': '1080', 'walletBalance': '1000', 'availableToWithdraw': '800'}]}]})
+    risk_manager.update_balance(store.balance)
+    store.reconcile(['BTCUSDT', 'ETHUSDT'])
+    risk_manager.update_balance(store.balance)
+    assert store.balance == 1000.0
+    assert risk_manager.daily_loss == 0 and risk_manager.peak_balance == 1000.0
+
+
+def test_private_stream_authenticates_and_applies_events():
+    web = pytest.importorskip('aiohttp.web')
+
+    from exchange.account_state import AccountStateStore
+    from exchange.ws_private_stream import BybitPrivateStream, auth_signature
+
+    async def run():
+        requests = []
+
+        async def handler(request):
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            async for message in ws:
+                data = message.json()
+                requests.append(data)
+                if data['op'] == 'auth':
+                    key, expires, signature = data['args']
+                    await ws.send_json({'op': 'auth', 'success': signature == auth_signature('secret', expires)})
+                elif data['op'] == 'subscribe':
+                    await ws.send_json({'op': 'subscribe', 'success': True})
+                    await ws.send_json({'topic': 'position', 'data': [
+                        {'symbol': 'ETHUSDT', 'side': 'Buy', 'size': '3', 'entryPrice': '10',
+                         'unrealisedPnl': '0', 'leverage': '5', 'positionIdx': 0}]})
+            return ws
+
+        app = web.Application()
+        app.router.add_get('/private', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        store = AccountStateStore(_AccountClientStub(), ['BTCUSDT', 'ETHUSDT'])
+        stream = BybitPrivateStream('key', 'secret', store, ['BTCUSDT', 'ETHUSDT'],
+                                    url=f'http://127.0.0.1:{port}/private')
+        stream.start()
+        try:
+            for _ in range(200):
+                if store.get_positions('ETHUSDT'):
+                    break
+                await asyncio.sleep(0.01)
+            assert store.stream_connected
+            assert store.get_positions('ETHUSDT')[0].amount == 3.0
+            assert store.get_positions('BTCUSDT')[0].amount == 0.5
+        finally:
+            await stream.close()
+            await runner.cleanup()
+        assert requests[0]['args'][0] == 'key'
+        assert requests[1] == {'op': 'subscribe', 'args': ['position', 'order', 'execution', 'wallet']}
+        assert not store.stream_connected
+
+    asyncio.run(run())
+
+
+def test_robot_applies_exposure_limits():
+    from exchange.data_fetcher import TradingRobot
+    from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles
+
+    exchange = SimulatedExchange(generate_synthetic_candles(['BTCUSDT'], 10, seed=1))
+    robot = TradingRobot('sim', 'sim', ['BTCUSDT'], None, 100, 1000, 0.5, client=exchange, enable_visualizer=False,
+                         max_total_exposure=500, max_symbol_exposure=150)
+    assert robot.risk_manager.try_reserve('BTCUSDT', 'LONG', 100)
+    assert not robot.risk_manager.try_reserve('BTCUSDT', 'SHORT', 100)
+    assert robot.risk_manager.max_total_exposure == 500
+
+
+def test_status_snapshot_is_versioned_and_detached_from_live_state():
+    from exchange.data_fetcher import TradingRobot
+    from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles
+    from models.order import Order
+
+    exchange = SimulatedExchange(generate_synthetic_candles(['BTCUSDT', 'ETHUSDT'], 300, seed=4))
+    robot = TradingRobot('sim', 'sim', ['BTCUSDT', 'ETHUSDT'], None, 100, 1000, 0.5,
+                         client=exchange, enable_visualizer=False)
+    assert robot.get_status()['version'] == 0
+
+    exchange.advance()
+    exchange.place_order(Order('ETHUSDT', 'BUY', 'MARKET', 0.01))
+    robot.refresh_snapshot()
+    robot.publish_status()
+    status = robot.get_status()
+    assert status['version'] == 1 and status['account_balance'] > 0
+    # Позиции всех символов, а не только первого
+    assert [position.side for position in status['open_positions']['ETHUSDT']] == ['LONG']
+
+    snapshot = robot.status.current
+    robot.snapshot.get_positions('ETHUSDT')[0].amount = 5.0
+    with pytest.raises(Exception):
+        snapshot.unrealized_pnl = 1.0
+    assert snapshot.open_positions['ETHUSDT'][0].amount == pytest.approx(0.01)
+
+    robot.disable()
+    assert robot.get_status()['version'] == 2 and robot.get_status()['is_running'] is False
+    robot.engine.executor.shutdown(wait=True)
+
+
+def test_status_refresh_keeps_cycle_reservations():
+    from exchange.data_fetcher import TradingRobot
+    from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles
+    from models.order import Order
+
+    exchange = SimulatedExchange(generate_synthetic_candles(['BTCUSDT'], 300, seed=4))
+    robot = TradingRobot('sim', 'sim', ['BTCUSDT'], None, 1000, 1000, 0.5, client=exchange, enable_visualizer=False)
+    exchange.advance()
+    robot.refresh_snapshot()
+    # Резерв, взятый стратегией в текущем цикле, и позиция, открытая после снимка цикла
+    assert robot.risk_manager.try_reserve('BTCUSDT', 'LONG', 50)
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 0.01))
+
+    status = robot.refresh_status()
+    assert robot.risk_manager.get_exposure('BTCUSDT', 'LONG') == pytest.approx(50)
+    assert robot.snapshot.get_positions('BTCUSDT') == []
+    position, = status['open_positions']['BTCUSDT']
+    assert status['unrealized_pnl'] == pytest.approx(position.unrealized_pnl)
+    robot.engine.executor.shutdown(wait=True)
+
+
+def test_strategy_hot_swap_prewarms_and_switches_between_cycles():
+    from exchange.data_fetcher import TradingRobot
+    from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles, run_simulation
+
+    exchange = SimulatedExchange(generate_synthetic_candles(['BTCUSDT'], 300, seed=7))
+    for _ in range(60):
+        exchange.advance()
+    # Общий поток свечей, как у BybitMarketStream
+    buffer = CandleBuffer(100)
+    buffer.load(exchange.get_market_data('BTCUSDT', '1m', 100))
+    exchange.candle_buffers = {('BTCUSDT', '1m'): buffer}
+
+    robot = TradingRobot('sim', 'sim', ['BTCUSDT'], None, 100, 1000, 0.5, active_strategy='ScalpingStrategy2',
+                         client=exchange, enable_visualizer=False)
+    with pytest.raises(ValueError):
+        robot.change_strategy('UnknownStrategy')
+
+    old = robot.strategies['BTCUSDT']
+    robot.is_running = True
+    robot.change_strategy('ScalpingStrategy1', wait=True)
+    # До следующего цикла работают прежние стратегии
+    assert robot.strategies['BTCUSDT'] is old and robot.active_strategy == 'ScalpingStrategy2'
+    new = robot._pending_strategies[1]['BTCUSDT']
+    assert new.indicators.last_timestamp == buffer.last_timestamp
+    assert not np.isnan(new.indicators['rsi'].value)
+    assert new.client is exchange and new.risk_manager is robot.risk_manager
+
+    run_simulation(robot, exchange, steps=1)
+    assert robot.strategies['BTCUSDT'] is new and robot.active_strategy == 'ScalpingStrategy1'
+
+
+def _bars(start, count, close=1.5):
+    return [[t * 60_000, 1.0, 2.0, 0.5, close + t, 10.0] for t in range(start, start + count)]
+
+
+def test_candle_buffer_compaction_keeps_a_contiguous_window():
+    buffer = CandleBuffer(3)
+    for t in range(10):
+        assert buffer.update(_bars(t, 1)) == 1
+        window = buffer.as_market_data()
+        expected = list(range(max(0, t - 2), t + 1))
+        assert list(window['timestamp']) == [i * 60_000 for i in expected]
+        assert list(window['close']) == [1.5 + i for i in expected]
+    # Массивы удвоенной емкости: окно переносится в начало без роста памяти
+    assert len(buffer._timestamps) == 6
+
+
+def test_candle_buffer_amends_last_bar_and_ignores_older_bars():
+    buffer = CandleBuffer(5)
+    buffer.update(_bars(0, 3))
+    # Повтор последней свечи с новой ценой и старая свеча
+    assert buffer.update([[2 * 60_000, 1.0, 2.5, 0.5, 9.0, 11.0], [60_000, 0.0, 0.0, 0.0, 0.0, 0.0]]) == 0
+    window = buffer.as_market_data()
+    assert len(buffer) == 3
+    assert window['close'][-1] == 9.0 and window['high'][-1] == 2.5 and window['close'][1] == 2.5
+
+
+def test_merge_fetched_requests_full_window_after_gap():
+    from exchange.candle_buffer import merge_fetched
+
+    buffer = CandleBuffer(3)
+    assert merge_fetched(buffer, _bars(0, 3), 3)
+    assert merge_fetched(buffer, _bars(2, 2), 3) and buffer.last_timestamp == 3 * 60_000
+    # Пропущено больше свечей, чем помещается в окно
+    assert not merge_fetched(buffer, _bars(3, 3), 3)
+    assert len(buffer) == 0
+
+
+class _OHLCVStub:
+    def __init__(self):
+        self.now = 2
+        self.requests = []
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.requests.append(since)
+        first = 0 if since is None else since // 60_000
+        first = max(first, self.now - limit + 1) if since is None else first
+        return _bars(first, self.now - first + 1)[:limit]
+
+    async def close(self):
+        pass
+
+
+def test_async_client_fetches_incrementally_and_reloads_after_gap(tmp_path):
+    from exchange.async_bybit_client import AsyncBybitClient
+    from exchange.rate_limiter import RateLimitScheduler
+
+    unlimited = (1e12, 1e12)
+    client = AsyncBybitClient('key', 'secret', markets_cache_path=str(tmp_path / 'markets.json'),
+                              rate_limiter=RateLimitScheduler({ENDPOINT_MARKET: unlimited}, global_budget=unlimited))
+    stub = _OHLCVStub()
+    client.exchange = stub
+
+    async def run():
+        market_data = await client.get_market_data('BTCUSDT', limit=3)
+        assert list(market_data['timestamp']) == [0, 60_000, 120_000]
+        stub.now = 3
+        market_data = await client.get_market_data('BTCUSDT', limit=3)
+        assert list(market_data['timestamp']) == [60_000, 120_000, 180_000]
+        stub.now = 10
+        market_data = await client.get_market_data('BTCUSDT', limit=3)
+        assert list(market_data['timestamp']) == [480_000, 540_000, 600_000]
+
+    asyncio.run(run())
+    assert stub.requests == [None, 120_000, 180_000, None]
+
+
+_MARKETS = {'BTC/USDT:USDT': {'id': 'BTCUSDT', 'symbol': 'BTC/USDT:USDT', 'base': 'BTC', 'quote': 'USDT',
+                              'settle': 'USDT', 'type': 'swap', 'spot': False, 'swap': True, 'linear': True, 'contract': True,
+                              'active': True, 'precision': {'amount': 0.001, 'price': 0.1}, 'limits': {}}}
+
+
+def test_markets_cache_roundtrip_and_expiry(tmp_path):
+    from exchange.markets_cache import load_markets_cache, save_markets_cache
+
+    path = str(tmp_path / 'cache' / 'markets.json')
+    assert load_markets_cache(path) is None
+    save_markets_cache(_MARKETS, None, path)
+    markets, currencies = load_markets_cache(path)
+    assert markets['BTC/USDT:USDT']['id'] == 'BTCUSDT' and currencies is None
+    assert load_markets_cache(path, ttl=-1) is None
+
+
+def test_client_uses_markets_cache_and_is_shared(tmp_path, monkeypatch):
+    import ccxt
+    from exchange.bybit_client import BybitClient
+    from exchange.markets_cache import save_markets_cache
+    from strategies.base_trading_robot import BaseTradingRobot
+    from utils.risk_manager import RiskManager
+
+    loads = []
+
+    def load_markets(self, reload=False, params={}):
+        loads.append(self)
+        self.set_markets(_MARKETS, None)
+        return self.markets
+
+    monkeypatch.setattr(ccxt.bybit, 'load_markets', load_markets)
+    path = str(tmp_path / 'markets.json')
+    # Первый клиент загружает метаданные с биржи и сохраняет кэш, второй читает кэш
+    BybitClient('key', 'secret', markets_cache_path=path)
+    client = BybitClient('key', 'secret', markets_cache_path=path)
+    assert len(loads) == 1
+    assert client.exchange.market('BTCUSDT')['symbol'] == 'BTC/USDT:USDT'
+
+    # Кэш по умолчанию (относительный путь) для BybitClient.shared
+    monkeypatch.chdir(tmp_path)
+    save_markets_cache(_MARKETS, None)
+    monkeypatch.setattr(BybitClient, '_shared_clients', {})
+    shared = BybitClient.shared('key', 'secret')
+    assert BybitClient.shared('key', 'secret') is shared
+    strategies = [BaseTradingRobot('key', 'secret', symbol, RiskManager(100, 50, 0.2)) for symbol in ('A', 'B')]
+    assert all(strategy.client is shared for strategy in strategies)
+    assert BybitClient.shared('other', 'secret') is not shared
+    assert len(loads) == 1
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+ta = pytest.importorskip("ta")
+
+from utils.indicators import ATR, EMA, MACD, RSI, BollingerBands, IndicatorEngine
+
+
+def make_candles(n=500, seed=42):
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 25, n))
+    high = close + rng.uniform(0, 30, n)
+    low = close - rng.uniform(0, 30, n)
+    open_ = close + rng.normal(0, 5, n)
+    volume = rng.uniform(1, 100, n)
+    timestamp = np.arange(n, dtype=np.int64) * 60_000
+    return {'timestamp': timestamp, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def stream(indicator_factory, candles, getter, amend=True):
+    """
+    Прогоняет свечи через потоковый индикатор. Перед финальным значением
+    каждого бара подается промежуточное, чтобы проверить обновление бара на месте.
+    """
+    indicator = indicator_factory()
+    result = []
+    for i in range(len(candles['close'])):
+        if amend:
+            draft = {key: np.array(values[i:i + 1] * 0.999) for key, values in candles.items() if key != 'timestamp'}
+            indicator.update_from(draft, 0, new_bar=True)
+            indicator.update_from(candles, i, new_bar=False)
+        else:
+            indicator.update_from(candles, i, new_bar=True)
+        result.append(getter(indicator))
+    return np.array(result)
+
+
+def assert_parity(actual, expected):
+    np.testing.assert_allclose(actual, np.asarray(expected, dtype=float), rtol=1e-9, atol=1e-7, equal_nan=True)
+
+
+@pytest.mark.parametrize("amend", [False, True])
+def test_rsi_parity(amend):
+    candles = make_candles()
+    expected = ta.momentum.RSIIndicator(pd.Series(candles['close']), 14).rsi()
+    assert_parity(stream(lambda: RSI(14), candles, lambda ind: ind.value, amend), expected)
+
+
+@pytest.mark.parametrize("amend", [False, True])
+def test_ema_parity(amend):
+    candles = make_candles()
+    expected = ta.trend.EMAIndicator(pd.Series(candles['close']), 50).ema_indicator()
+    assert_parity(stream(lambda: EMA(50), candles, lambda ind: ind.value, amend), expected)
+
+
+@pytest.mark.parametrize("amend", [False, True])
+def test_atr_parity(amend):
+    candles = make_candles()
+    expected = ta.volatility.AverageTrueRange(high=pd.Series(candles['high']), low=pd.Series(candles['low']),
+                                              close=pd.Series(candles['close']), window=14).average_true_range()
+    assert_parity(stream(lambda: ATR(14), candles, lambda ind: ind.value, amend), expected)
+
+
+@pytest.mark.parametrize("amend", [False, True])
+def test_macd_parity(amend):
+    candles = make_candles()
+    macd = ta.trend.MACD(pd.Series(candles['close']), 26, 12, 9)
+    assert_parity(stream(lambda: MACD(12, 26, 9), candles, lambda ind: ind.macd, amend), macd.macd())
+    assert_parity(stream(lambda: MACD(12, 26, 9), candles, lambda ind: ind.signal, amend), macd.macd_signal())
+    assert_parity(stream(lambda: MACD(12, 26, 9), candles, lambda ind: ind.macd_diff, amend), macd.macd_diff())
+
+
+@pytest.mark.parametrize("amend", [False, True])
+def test_bollinger_parity(amend):
+    candles = make_candles()
+    bb = ta.volatility.BollingerBands(close=pd.Series(candles['close']), window=20, window_dev=2)
+    assert_parity(stream(lambda: BollingerBands(20, 2), candles, lambda ind: ind.mavg, amend), bb.bollinger_mavg())
+    assert_parity(stream(lambda: BollingerBands(20, 2), candles, lambda ind: ind.hband, amend), bb.bollinger_hband())
+    assert_parity(stream(lambda: BollingerBands(20, 2), candles, lambda ind: ind.lband, amend), bb.bollinger_lband())
+
+
+def test_engine_processes_only_new_and_amended_bars():
+    candles = make_candles(300)
+    engine = IndicatorEngine({'rsi': RSI(14), 'bb': BollingerBands(20, 2)})
+
+    # Окно из 100 свечей сдвигается так же, как в CandleBuffer
+    for end in range(100, 301):
+        window = {key: values[end - 100:end] for key, values in candles.items()}
+        engine.update(window)
+
+    expected_rsi = ta.momentum.RSIIndicator(pd.Series(candles['close']), 14).rsi().iloc[-1]
+    expected_mavg = pd.Series(candles['close']).rolling(20).mean().iloc[-1]
+    assert engine['rsi'].value == pytest.approx(expected_rsi, rel=1e-9)
+    assert engine['bb'].mavg == pytest.approx(expected_mavg, rel=1e-9)
+    assert engine.last_timestamp == candles['timestamp'][-1]
+
+
+def test_engine_rewarms_after_gap():
+    candles = make_candles(300)
+    engine = IndicatorEngine({'ema': EMA(10)})
+    engine.update({key: values[:100] for key, values in candles.items()})
+    engine.update({key: values[200:300] for key, values in candles.items()})
+
+    expected = ta.trend.EMAIndicator(pd.Series(candles['close'][200:300]), 10).ema_indicator().iloc[-1]
+    assert engine['ema'].value == pytest.approx(expected, rel=1e-9)
@@ -0,0 +1,120 @@
+import json
+import logging
+import time
+
+from utils.logger import JsonFormatter, RateLimitFilter, _start_queue_logging, _stop_listener
+
+
+def _record(message, level=logging.INFO, symbol=None):
+    record = logging.LogRecord('trading', level, __file__, 1, message, None, None)
+    record.symbol = symbol
+    return record
+
+
+def test_rate_limit_filter_suppresses_repeats_per_symbol():
+    rate_filter = RateLimitFilter(interval=0.05)
+    assert rate_filter.filter(_record("Нет новых данных", symbol='BTCUSDT'))
+    assert rate_filter.filter(_record("Нет новых данных", symbol='ETHUSDT'))
+    assert not rate_filter.filter(_record("Нет новых данных", symbol='BTCUSDT'))
+    assert not rate_filter.filter(_record("Нет новых данных", symbol='BTCUSDT'))
+    # Ошибки не подавляются
+    assert rate_filter.filter(_record("Ошибка", logging.ERROR))
+    assert rate_filter.filter(_record("Ошибка", logging.ERROR))
+
+    time.sleep(0.06)
+    record = _record("Нет новых данных", symbol='BTCUSDT')
+    assert rate_filter.filter(record)
+    assert record.msg.endswith("(подавлено повторов: 2)")
+
+
+def test_rate_limit_filter_groups_formatted_messages_by_template():
+    rate_filter = RateLimitFilter(interval=60)
+    assert rate_filter.filter(_record("Переподключение WebSocket через 2 с"))
+    assert not rate_filter.filter(_record("Переподключение WebSocket через 4 с"))
+    assert rate_filter.filter(_record("Ордер отклонен по цене 30123.5", symbol='BTCUSDT'))
+    assert not rate_filter.filter(_record("Ордер отклонен по цене 30150", symbol='BTCUSDT'))
+    # Предупреждения не подавляются, даже если отличаются только числами
+    assert rate_filter.filter(_record("Спред 0.5%", logging.WARNING))
+    assert rate_filter.filter(_record("Спред 0.7%", logging.WARNING))
+    assert rate_filter.filter(_record("Нет новых данных для ETHUSDT"))
+    assert rate_filter.filter(_record("Нет новых данных для BTCUSDT"))
+
+
+def test_strategy_records_carry_symbol(caplog):
+    from strategies.base_trading_robot import BaseTradingRobot
+    from utils.risk_manager import RiskManager
+
+    strategy = BaseTradingRobot('key', 'secret', 'BTCUSDT', RiskManager(100, 50, 0.2), client=object())
+    with caplog.at_level(logging.INFO):
+        strategy.logger.info("Открыта позиция")
+    assert caplog.records[-1].symbol == 'BTCUSDT'
+    assert json.loads(JsonFormatter().format(caplog.records[-1]))['symbol'] == 'BTCUSDT'
+
+
+def test_trade_events_are_never_rate_limited():
+    from strategies.base_trading_robot import BaseTradingRobot
+    from utils.logger import TRADE_EVENT
+    from utils.risk_manager import RiskManager
+
+    class Capture(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.records = []
+
+        def emit(self, record):
+            self.records.append(record)
+
+    capture = Capture()
+    capture.addFilter(RateLimitFilter(interval=60))
+    strategy = BaseTradingRobot('key', 'secret', 'BTCUSDT', RiskManager(100, 50, 0.2), client=object())
+    logger = strategy.logger.logger
+    logger.addHandler(capture)
+    level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        strategy.logger.info("Открыта позиция BUY по цене 30000.5 для BTCUSDT", extra=TRADE_EVENT)
+        strategy.logger.info("Открыта позиция BUY по цене 30010 для BTCUSDT", extra=TRADE_EVENT)
+        strategy.logger.info("Пересчет индикаторов 1")
+        strategy.logger.info("Пересчет индикаторов 2")
+    finally:
+        logger.setLevel(level)
+        logger.removeHandler(capture)
+    assert [record.getMessage() for record in capture.records] == [
+        "Открыта позиция BUY по цене 30000.5 для BTCUSDT", "Открыта позиция BUY по цене 30010 для BTCUSDT",
+        "Пересчет индикаторов 1"]
+    assert all(record.symbol == 'BTCUSDT' for record in capture.records)
+
+
+def test_json_formatter_outputs_one_object_per_line():
+    line = JsonFormatter().format(_record("Открыта позиция", symbol='BTCUSDT'))
+    entry = json.loads(line)
+    assert entry['message'] == "Открыта позиция" and entry['symbol'] == 'BTCUSDT' and entry['level'] == 'INFO'
+
+
+def test_queue_logging_does_not_block_on_slow_handler(tmp_path, monkeypatch):
+    class SlowHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.records = []
+
+        def emit(self, record):
+            time.sleep(0.01)
+            self.records.append(record.getMessage())
+
+    slow = SlowHandler()
+    monkeypatch.setattr('utils.logger._build_handlers', lambda log_file, json_format: [slow])
+    logger = logging.getLogger('test_queue_logging')
+    logger.propagate = False
+    listener = _start_queue_logging(logger, None, False, None)
+    try:
+        started = time.perf_counter()
+        for i in range(20):
+            logger.warning(f"сообщение {i}")
+        assert time.perf_counter() - started < 0.1
+    finally:
+        _stop_listener(listener)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+    assert slow.records == [f"сообщение {i}" for i in range(20)]
+    # Повторная остановка (как из atexit) не падает
+    _stop_listener(listener)
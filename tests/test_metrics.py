@@ -0,0 +1,60 @@
+import urllib.request
+
+from utils.metrics import LATENCY_BUCKETS, MetricsRegistry, MetricsServer
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    for seconds in (0.00005, 0.003, 0.003, 7.0, 100.0):
+        registry.observe('candle_fetch', seconds, 'BTCUSDT')
+
+    histogram = registry.histograms()[('candle_fetch', 'BTCUSDT')]
+    counts, total, count = histogram.snapshot()
+    assert count == 5
+    assert abs(total - 107.00605) < 1e-9
+    assert len(counts) == len(LATENCY_BUCKETS) + 1
+    assert counts[0] == 1 and counts[-1] == 1
+
+    text = registry.render_prometheus()
+    assert 'trading_stage_latency_seconds_bucket{stage="candle_fetch",symbol="BTCUSDT",le="0.005"} 3' in text
+    assert 'trading_stage_latency_seconds_bucket{stage="candle_fetch",symbol="BTCUSDT",le="+Inf"} 5' in text
+    assert 'trading_stage_latency_seconds_count{stage="candle_fetch",symbol="BTCUSDT"} 5' in text
+
+
+def test_timer_records_stage():
+    registry = MetricsRegistry()
+    with registry.timer('signals', 'ETHUSDT'):
+        pass
+    assert registry.histograms()[('signals', 'ETHUSDT')].count == 1
+
+
+def test_metrics_server_serves_text_and_profiler():
+    registry = MetricsRegistry()
+    registry.observe('cycle', 0.2)
+    server = MetricsServer(registry, port=0)
+    server.start()
+    try:
+        base = f"http://127.0.0.1:{server.httpd.server_address[1]}"
+        body = urllib.request.urlopen(base + '/metrics').read().decode()
+        assert 'stage="cycle"' in body
+        urllib.request.urlopen(base + '/profiler/start').read()
+        assert server.profiler.running
+        urllib.request.urlopen(base + '/profiler/stop').read()
+        assert not server.profiler.running
+    finally:
+        server.stop()
+
+
+def test_endpoint_latency_has_its_own_label(monkeypatch):
+    from exchange import rate_limiter
+    from exchange.rate_limiter import ENDPOINT_ORDER, PRIORITY_ORDER, RateLimitScheduler
+
+    registry = MetricsRegistry()
+    monkeypatch.setattr(rate_limiter, 'metrics', registry)
+    assert RateLimitScheduler().acquire(ENDPOINT_ORDER, PRIORITY_ORDER)
+
+    assert registry.histograms() == {}
+    assert registry.endpoint_histograms()[('rate_limit_wait', ENDPOINT_ORDER)].count == 1
+    text = registry.render_prometheus()
+    assert f'trading_endpoint_latency_seconds_count{{stage="rate_limit_wait",endpoint="{ENDPOINT_ORDER}"}} 1' in text
+    assert 'symbol="' not in text
@@ -0,0 +1,39 @@
+import pytest
+
+from models.codec import decode, decode_batch, encode, encode_batch
+from models.fill import Fill
+from models.order import Order
+from models.position import Position
+
+
+def test_batch_round_trip_preserves_models_and_optional_fields():
+    orders = [Order('BTCUSDT', 'BUY', 'LIMIT', 0.5, 30000.0, None, 31000.0, '1'),
+              Order('ETHUSDT', 'SELL', 'MARKET', 2.0, reduce_only=True),
+              Order('BTCUSDT', 'SELL', 'STOP', 0.5, 29000.0, 29000.0, order_id='3')]
+    data = encode_batch(orders)
+    assert decode_batch(data) == orders
+    # Повторяющиеся строки хранятся в таблице пакета один раз
+    assert data.count(b'BTCUSDT') == 1
+
+    position = Position('ETHUSDT', 'SHORT', 1.5, 2000.0, leverage=10, stop_loss=2100.0, stop_loss_order_id='7')
+    assert decode(encode(position)) == position
+    fills = [Fill('BTCUSDT', 'BUY', 0.1, 30000.0, 0.6, 0.0, 1_700_000_000_000 + i) for i in range(3)]
+    assert decode_batch(encode_batch(fills)) == fills
+    assert decode_batch(encode_batch([], Fill)) == []
+
+
+def test_codec_rejects_mixed_batches_and_foreign_data():
+    with pytest.raises(ValueError):
+        encode_batch([Order('BTCUSDT', 'BUY', 'MARKET', 1.0), Position('BTCUSDT', 'LONG', 1.0, 1.0)])
+    with pytest.raises(ValueError):
+        decode_batch(b'{"symbol": "BTCUSDT"}')
+    with pytest.raises(ValueError):
+        decode_batch(encode_batch([Order('BTCUSDT', 'BUY', 'MARKET', 1.0)])[:-1])
+
+
+def test_slotted_models_are_smaller_than_legacy_dataclasses():
+    from benchmarks.model_memory import measure_models
+
+    for sizes in measure_models(1000).values():
+        assert sizes['slots'] < sizes['legacy']
+        assert sizes['binary'] < sizes['slots']
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+from bot.notifications import PRIORITY_CRITICAL, PRIORITY_INFO, PRIORITY_TRADE, NotificationQueue
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, chat_id, text):
+        self.messages.append((chat_id, text, time.monotonic()))
+
+
+def test_events_from_threads_are_merged_into_one_digest():
+    sent = Recorder()
+    notifications = NotificationQueue(sent, [1], window=0.2, max_lines=10)
+
+    async def scenario():
+        notifications.start()
+        threads = [threading.Thread(target=lambda i=i: notifications.notify(f"fill {i}")) for i in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        await asyncio.sleep(0.4)
+        await notifications.close()
+
+    asyncio.run(scenario())
+    assert len(sent.messages) == 1
+    text = sent.messages[0][1]
+    assert text.startswith("Сводка событий (40)") and "...и еще 30 событий" in text
+
+
+def test_critical_event_skips_the_window():
+    sent = Recorder()
+    notifications = NotificationQueue(sent, [1], window=10.0)
+
+    async def scenario():
+        notifications.start()
+        notifications.notify("stop moved", PRIORITY_INFO)
+        notifications.notify("loop crashed", PRIORITY_CRITICAL)
+        await asyncio.sleep(0.1)
+        delivered = list(sent.messages)
+        await notifications.close()
+        return delivered
+
+    delivered = asyncio.run(scenario())
+    assert len(delivered) == 1
+    assert delivered[0][1].splitlines()[1] == "[!] loop crashed"
+
+
+def test_backpressure_drops_low_priority_first():
+    notifications = NotificationQueue(Recorder(), [1], max_pending=3)
+    for i in range(3):
+        notifications.notify(f"stop {i}", PRIORITY_INFO)
+    notifications.notify("fill", PRIORITY_TRADE)
+    notifications.notify("stop 3", PRIORITY_INFO)
+    pending, dropped = notifications._drain()
+    assert pending[PRIORITY_TRADE] == ["fill"] and pending[PRIORITY_INFO] == ["stop 0", "stop 1"]
+    assert dropped == 2
+    assert "Пропущено при перегрузке: 2" in notifications.build_digest(pending, dropped)[0]
+
+
+def test_per_chat_rate_limit_spaces_messages():
+    sent = Recorder()
+    notifications = NotificationQueue(sent, [1], chat_rate=20.0, chat_burst=1)
+
+    async def scenario():
+        for i in range(4):
+            await notifications._send(1, f"message {i}")
+
+    asyncio.run(scenario())
+    elapsed = sent.messages[-1][2] - sent.messages[0][2]
+    assert len(sent.messages) == 4 and elapsed >= 0.14
+
+
+class FakeApplication:
+    """
+    Заменяет telegram.ext.Application: опрос не запускается, сообщения записываются.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.calls = []
+        self.bot = self
+        self.updater = self
+
+    async def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+    async def initialize(self):
+        self.calls.append('initialize')
+
+    async def start(self):
+        self.calls.append('start')
+
+    async def start_polling(self):
+        self.calls.append('start_polling')
+
+    async def stop(self):
+        self.calls.append('stop')
+
+    async def shutdown(self):
+        self.calls.append('shutdown')
+
+
+def test_bot_loop_keeps_running_and_sends_digests():
+    from bot.telegram_bot import TelegramBot
+
+    bot = TelegramBot('123:TEST', trading_robot=None, admin_chat_id=42, notification_window=0.05)
+    bot.application = FakeApplication()
+    thread = threading.Thread(target=bot.serve, daemon=True)
+    thread.start()
+
+    # События из торгового потока после запуска бота
+    deadline = time.monotonic() + 2.0
+    while bot.loop is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    bot.notify("BTCUSDT: открыта позиция")
+    bot.notify("ETHUSDT: открыта позиция")
+    while not bot.application.sent and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    bot.shutdown()
+    thread.join(2.0)
+    assert not thread.is_alive()
+    assert len(bot.application.sent) == 1
+    chat_id, text = bot.application.sent[0]
+    assert chat_id == 42 and 'BTCUSDT' in text and 'ETHUSDT' in text
+    assert bot.application.calls[-1] == 'shutdown'
+
+
+def test_bot_shutdown_before_start_does_not_hang():
+    from bot.telegram_bot import TelegramBot
+
+    bot = TelegramBot('123:TEST', trading_robot=None)
+    bot.application = FakeApplication()
+    bot.shutdown()
+    thread = threading.Thread(target=bot.serve, daemon=True)
+    thread.start()
+    thread.join(2.0)
+    assert not thread.is_alive()
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+
+from backtest.optimizer import ParameterOptimizer, SharedCandles, grid_search_space, random_search_space
+from exchange.sim_exchange import generate_synthetic_candles
+
+
+def test_shared_candles_attach_without_copy():
+    candles = generate_synthetic_candles(['BTCUSDT'], 100, seed=1)['BTCUSDT']
+    shared = SharedCandles(candles)
+    try:
+        shm, attached = SharedCandles.attach(shared.descriptor)
+        for column, values in candles.items():
+            np.testing.assert_array_equal(attached[column], values)
+        assert attached['close'].base is not None
+        del attached
+        shm.close()
+    finally:
+        shared.close()
+
+
+def test_search_spaces():
+    assert list(grid_search_space({'a': [1, 2], 'b': [3]})) == [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]
+    samples = list(random_search_space({'a': (1, 5), 'b': [0.1, 0.2]}, 10, seed=1))
+    assert len(samples) == 10 and all(1 <= s['a'] <= 5 and isinstance(s['a'], int) for s in samples)
+
+
+def test_optimizer_streams_combinations_and_ranks_results(tmp_path):
+    candles = generate_synthetic_candles(['BTCUSDT'], 2000, seed=2)['BTCUSDT']
+    results_path = tmp_path / 'optimization.jsonl'
+    consumed = []
+
+    def param_sets():
+        for bb_period in (10, 20, 30):
+            consumed.append(bb_period)
+            yield {'bb_period': bb_period}
+
+    optimizer = ParameterOptimizer('ScalpingStrategy2', candles, metric='total_return', processes=2,
+                                   results_path=str(results_path), max_pending=2)
+    results = optimizer.run(param_sets())
+
+    assert consumed == [10, 20, 30]
+    assert sorted(result['params']['bb_period'] for result in results) == [10, 20, 30]
+    assert all('error' not in result for result in results)
+    lines = [json.loads(line) for line in results_path.read_text(encoding='utf-8').splitlines()]
+    assert len(lines) == 3
+    ranked = json.loads((tmp_path / 'optimization_ranked.json').read_text(encoding='utf-8'))
+    returns = [result['metrics']['total_return'] for result in ranked]
+    assert returns == sorted(returns, reverse=True)
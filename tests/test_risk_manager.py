@@ -0,0 +1,120 @@
+import threading
+import time
+
+from models.position import Position
+from utils.risk_manager import ReservationBatcher, RiskManager
+
+
+def test_exposure_index_is_incremental():
+    risk_manager = RiskManager(100, 50, 0.2, max_total_exposure=250, max_symbol_exposure=150)
+    assert risk_manager.try_reserve('BTCUSDT', 'LONG', 100)
+    assert risk_manager.try_reserve('BTCUSDT', 'SHORT', 50)
+    # Лимит по символу
+    assert not risk_manager.try_reserve('BTCUSDT', 'LONG', 10)
+    assert risk_manager.try_reserve('ETHUSDT', 'LONG', 100)
+    # Общий лимит
+    assert not risk_manager.try_reserve('SOLUSDT', 'LONG', 1)
+    assert risk_manager.get_exposure('BTCUSDT') == 150
+    assert risk_manager.get_exposure('BTCUSDT', 'SHORT') == 50
+
+    risk_manager.release('ETHUSDT', 'LONG', 100)
+    risk_manager.update_positions({'BTCUSDT': [Position('BTCUSDT', 'LONG', 2, 30)]})
+    assert risk_manager.get_exposure('BTCUSDT') == 60
+    assert risk_manager.total_exposure == 60
+    assert risk_manager.try_reserve('SOLUSDT', 'LONG', 100)
+
+
+def test_reserve_batch_respects_limits_in_order():
+    risk_manager = RiskManager(100, 50, 0.2, max_total_exposure=200)
+    results = risk_manager.reserve_batch([('A', 'LONG', 80), ('B', 'LONG', 150), ('C', 'SHORT', 100), ('D', 'LONG', 20)])
+    assert results == [True, False, True, True]
+    assert risk_manager.total_exposure == 200
+
+
+def test_batcher_groups_concurrent_reservations():
+    class SlowRiskManager(RiskManager):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.batches = []
+            self.first_batch_started = threading.Event()
+            self.release_first_batch = threading.Event()
+
+        def reserve_batch(self, requests):
+            self.batches.append([symbol for symbol, _, _ in requests])
+            if len(self.batches) == 1:
+                self.first_batch_started.set()
+                self.release_first_batch.wait(5)
+            return super().reserve_batch(requests)
+
+    risk_manager = SlowRiskManager(100, 50, 0.2, max_total_exposure=250)
+    batcher = ReservationBatcher(risk_manager)
+    results = {}
+
+    def reserve(symbol):
+        results[symbol] = batcher.reserve(symbol, 'LONG', 100)
+
+    leader = threading.Thread(target=reserve, args=('A',))
+    leader.start()
+    assert risk_manager.first_batch_started.wait(5)
+    # Пока ведущий проверяет первую пачку, остальные запросы копятся во вторую
+    followers = [threading.Thread(target=reserve, args=(symbol,)) for symbol in ('B', 'C', 'D')]
+    for thread in followers:
+        thread.start()
+    while len(batcher._pending) < 3:
+        time.sleep(0.001)
+    risk_manager.release_first_batch.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert risk_manager.batches[0] == ['A'] and sorted(risk_manager.batches[1]) == ['B', 'C', 'D']
+    assert sum(results.values()) == 2 and results['A']
+    assert risk_manager.total_exposure == 200
+
+
+def test_daily_loss_follows_balance_changes():
+    risk_manager = RiskManager(100, 50, 0.5)
+    risk_manager.update_balance(1000)
+    assert risk_manager.daily_loss == 0
+    # Сделка закрылась на бирже по стоп-лоссу
+    risk_manager.update_balance(970)
+    assert risk_manager.daily_loss == 30
+    assert risk_manager.can_open_position(10)
+    risk_manager.update_balance(980)
+    risk_manager.update_balance(940)
+    assert risk_manager.daily_loss == 60
+    assert not risk_manager.can_open_position(10)
+
+    restored = RiskManager(100, 50, 0.5)
+    restored.load_state(risk_manager.get_state())
+    assert restored.daily_loss == 60
+
+
+def test_concurrent_reservations_never_exceed_limit():
+    risk_manager = RiskManager(10, 50, 0.2, max_total_exposure=1000)
+    granted = []
+
+    def worker(name):
+        granted.append(sum(risk_manager.try_reserve(f'{name}{i}', 'LONG', 10) for i in range(100)))
+
+    threads = [threading.Thread(target=worker, args=(f'T{n}-',)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(granted) == 100
+    assert abs(risk_manager.total_exposure - 1000) < 1e-9
+
+
+def test_limits_and_cached_balance():
+    risk_manager = RiskManager(100, 50, 0.1)
+    risk_manager.update_balance(1000, available_balance=500)
+    assert risk_manager.calculate_position_size(10) == 1.0  # 2% от доступных 500
+    assert not risk_manager.try_reserve('A', 'LONG', 150)
+    risk_manager.update_balance(850)
+    assert not risk_manager.can_open_position(10)
+    risk_manager.update_balance(950)
+    assert risk_manager.can_open_position(10)
+    risk_manager.check_daily_loss(60)
+    assert not risk_manager.can_open_position(10)
+    risk_manager.reset_daily_loss()
+    assert risk_manager.get_state()['peak_balance'] == 1000
@@ -0,0 +1,71 @@
+import multiprocessing as mp
+
+from exchange.sharding import SHARD_EXPOSURE_OFFSET, ShardCoordinator, SharedRiskManager
+from models.position import Position
+
+
+def _reserve(state, shard_id, attempts, results):
+    risk_manager = SharedRiskManager(100, 1000, 0.5, state, shard_id, max_total_exposure=1000)
+    results.put(sum(risk_manager.try_reserve(f'S{i}', 'LONG', 10) for i in range(attempts)))
+
+
+def test_shared_exposure_limit_holds_across_processes():
+    context = mp.get_context('spawn')
+    state = context.Array('d', SHARD_EXPOSURE_OFFSET + 4)
+    results = context.Queue()
+    workers = [context.Process(target=_reserve, args=(state, shard_id, 50, results)) for shard_id in range(4)]
+    for worker in workers:
+        worker.start()
+    granted = sum(results.get(timeout=30) for _ in workers)
+    for worker in workers:
+        worker.join()
+    # 4 x 50 попыток по 10, но общий лимит экспозиции - 1000
+    assert granted == 100
+    assert sum(state[SHARD_EXPOSURE_OFFSET:]) == 1000
+
+
+def test_shared_risk_state_is_global():
+    state = mp.Array('d', SHARD_EXPOSURE_OFFSET + 2)
+    first = SharedRiskManager(100, 50, 0.1, state, 0, max_total_exposure=150)
+    second = SharedRiskManager(100, 50, 0.1, state, 1, max_total_exposure=150)
+    first.update_balance(1000)
+    second.update_balance(880)
+    assert first.peak_balance == 1000 and first.current_balance == 880
+    assert not first.check_drawdown()
+    second.update_balance(950)
+    # Тот же баланс, увиденный другим шардом, не учитывается повторно
+    first.update_balance(950)
+    assert first.check_drawdown()
+    assert first.daily_loss == 50
+    assert second.check_daily_loss(10) is False
+    assert first.daily_loss == 60
+    second.reset_daily_loss()
+
+    assert first.try_reserve('A', 'LONG', 100)
+    assert not second.try_reserve('B', 'SHORT', 60)
+    first.update_positions({'A': [Position('A', 'LONG', 2, 20)]})
+    assert second.try_reserve('B', 'SHORT', 60)
+    assert first.total_exposure == second.total_exposure == 100
+
+
+def test_coordinator_merges_shard_status():
+    coordinator = ShardCoordinator('key', 'secret', ['A', 'B', 'C'], None, 100, 50, 0.1, processes=2)
+    assert coordinator.shards == [['A', 'C'], ['B']]
+    coordinator.shard_status = {
+        0: {'is_running': True, 'unrealized_pnl': 1.5, 'last_cycle_time': 0.2,
+            'open_positions': {'A': [Position('A', 'LONG', 1, 10)], 'C': []}},
+        1: {'is_running': True, 'unrealized_pnl': -0.5, 'last_cycle_time': 0.4, 'open_positions': {'B': []}}
+    }
+    status = coordinator.get_status()
+    assert status['unrealized_pnl'] == 1.0
+    assert set(status['open_positions']) == {'A', 'B', 'C'}
+    assert status['last_cycle_time'] == 0.4
+    assert coordinator.get_unrealized_pnl() == 1.0
+
+
+def test_coordinator_passes_exposure_limits_to_shards():
+    coordinator = ShardCoordinator('key', 'secret', ['A', 'B'], None, 100, 50, 0.1, processes=2,
+                                   max_total_exposure=500, max_symbol_exposure=200)
+    assert coordinator.risk_limits['max_total_exposure'] == 500
+    assert coordinator.risk_limits['max_symbol_exposure'] == 200
+    assert 'max_symbol_exposure' not in coordinator.robot_kwargs
@@ -0,0 +1,125 @@
+import threading
+
+import numpy as np
+import pytest
+
+from exchange.sim_exchange import SimulatedExchange
+from models.order import Order
+
+
+def _exchange(bars, fee_rate=0.0, initial_balance=1000.0):
+    """
+    Симулятор на заданных барах (open, high, low, close); текущий бар - первый.
+    """
+    columns = np.array(bars, dtype=float).T
+    candles = {'BTCUSDT': {
+        'timestamp': np.arange(len(bars), dtype=np.int64) * 60_000,
+        'open': columns[0], 'high': columns[1], 'low': columns[2], 'close': columns[3],
+        'volume': np.ones(len(bars))
+    }}
+    return SimulatedExchange(candles, initial_balance=initial_balance, fee_rate=fee_rate, start_index=1)
+
+
+def test_stop_and_limit_orders_trigger_on_touch():
+    exchange = _exchange([(100, 101, 99, 100), (100, 103, 97, 100), (100, 106, 99, 104), (104, 104, 94, 96)])
+    assert exchange.place_order(Order('BTCUSDT', 'BUY', 'LIMIT', 1, price=95))
+    assert exchange.place_order(Order('BTCUSDT', 'BUY', 'STOP', 1, price=105))
+
+    exchange.advance()
+    assert not exchange.fills and len(exchange.open_orders) == 2
+    exchange.advance()
+    assert [fill.price for fill in exchange.fills] == [105]
+    exchange.advance()
+    assert [fill.price for fill in exchange.fills] == [105, 95]
+    assert not exchange.open_orders
+    position = exchange.get_open_positions('BTCUSDT')[0]
+    assert position.side == 'LONG' and position.amount == 2 and position.entry_price == 100
+
+
+def test_stop_loss_wins_when_bar_touches_both_levels():
+    exchange = _exchange([(100, 100, 100, 100), (100, 106, 94, 100)])
+    assert exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 2, stop_loss=95, take_profit=105))
+    exchange.advance()
+    assert not exchange.positions
+    close_fill = exchange.fills[-1]
+    assert close_fill.side == 'SELL' and close_fill.price == 95 and close_fill.realized_pnl == -10
+    assert exchange.wallet_balance == 990
+
+
+def test_market_order_reverses_position():
+    exchange = _exchange([(100, 100, 100, 100), (110, 110, 110, 110)])
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 1))
+    exchange.advance()
+    assert exchange.place_order(Order('BTCUSDT', 'SELL', 'MARKET', 3, stop_loss=120, take_profit=90))
+
+    assert exchange.fills[-1].realized_pnl == 10
+    position = exchange.get_open_positions('BTCUSDT')[0]
+    assert position.side == 'SHORT' and position.amount == 2 and position.entry_price == 110
+    assert (position.stop_loss, position.take_profit) == (120, 90)
+
+
+def test_reduce_only_is_clamped_to_position():
+    exchange = _exchange([(100, 100, 100, 100)])
+    assert not exchange.place_order(Order('BTCUSDT', 'SELL', 'MARKET', 1, reduce_only=True))
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 1))
+    # Ордер того же направления не может уменьшить позицию
+    assert not exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 1, reduce_only=True))
+    assert exchange.place_order(Order('BTCUSDT', 'SELL', 'MARKET', 5, reduce_only=True))
+    assert exchange.fills[-1].quantity == 1
+    assert not exchange.positions
+
+
+def test_fees_are_charged_to_wallet_balance():
+    exchange = _exchange([(100, 100, 100, 100), (110, 110, 110, 110)], fee_rate=0.001)
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 1))
+    assert exchange.wallet_balance == pytest.approx(1000 - 0.1)
+    assert exchange.get_account_balance() == pytest.approx(1000 - 0.1)
+    exchange.advance()
+    assert exchange.get_account_balance() == pytest.approx(1000 - 0.1 + 10)
+    exchange.place_order(Order('BTCUSDT', 'SELL', 'MARKET', 1))
+    assert exchange.wallet_balance == pytest.approx(1000 + 10 - 0.1 - 0.11)
+    assert sum(fill.fee for fill in exchange.fills) == pytest.approx(0.21)
+
+
+def test_positions_and_orders_are_returned_as_copies():
+    exchange = _exchange([(100, 100, 100, 100)])
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 1, stop_loss=95, take_profit=105))
+    exchange.place_order(Order('BTCUSDT', 'SELL', 'LIMIT', 1, price=120, reduce_only=True))
+
+    position = exchange.get_open_positions('BTCUSDT')[0]
+    assert (position.stop_loss, position.take_profit) == (95, 105)
+    position.amount = 10
+    position.stop_loss = None
+    order = exchange.get_open_orders(['BTCUSDT'])['BTCUSDT'][0]
+    order.price = 50
+    assert exchange.positions['BTCUSDT'].amount == 1 and exchange.positions['BTCUSDT'].stop_loss == 95
+    assert exchange.open_orders[order.order_id].price == 120
+
+
+def test_concurrent_orders_are_not_lost():
+    exchange = _exchange([(100, 100, 100, 100)])
+
+    def worker():
+        for _ in range(200):
+            exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 1))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert exchange.positions['BTCUSDT'].amount == 1600
+    assert len(exchange.fills) == 1600
+    assert len({fill.order_id for fill in exchange.fills}) == 1600
+
+
+def test_stops_fill_at_open_when_bar_gaps_through_level():
+    exchange = _exchange([(100, 100, 100, 100), (90, 92, 88, 91), (120, 122, 118, 121)])
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 1, stop_loss=95))
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'STOP', 1, price=110))
+
+    exchange.advance()
+    assert exchange.fills[-1].side == 'SELL' and exchange.fills[-1].price == 90
+    assert exchange.fills[-1].realized_pnl == -10
+    exchange.advance()
+    assert exchange.fills[-1].side == 'BUY' and exchange.fills[-1].price == 120
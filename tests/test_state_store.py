@@ -0,0 +1,77 @@
+import numpy as np
+
+from exchange.candle_buffer import CandleBuffer
+from exchange.data_fetcher import TradingRobot
+from exchange.sim_exchange import SimulatedExchange, generate_synthetic_candles
+from models.order import Order
+from models.position import Position
+from storage.state_store import StateStore
+from utils import risk_manager as risk_module
+from utils.risk_manager import RiskManager
+
+
+def test_candle_windows_round_trip_through_memory_map(tmp_path):
+    buffer = CandleBuffer(5)
+    buffer.update([[60_000 * i, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0 * i] for i in range(8)])
+    store = StateStore(str(tmp_path))
+    store.save({'risk': {}}, {('BTCUSDT', '1m'): StateStore.candle_window(buffer)})
+
+    assert isinstance(store.load_candles('BTCUSDT', '1m'), np.memmap)
+    restored = CandleBuffer(5)
+    assert restored.load(store.tail('BTCUSDT', '1m', 5)) == 5
+    for column, values in buffer.as_market_data().items():
+        np.testing.assert_array_equal(restored.as_market_data()[column], values)
+    assert store.tail('ETHUSDT', '1m', 5)['close'].size == 0
+    assert not list(tmp_path.glob('**/*.tmp'))
+
+
+def test_daily_loss_survives_restart_only_within_the_day(monkeypatch):
+    saved = RiskManager(100, 50, 0.2)
+    saved.update_balance(1000)
+    saved.check_daily_loss(30)
+
+    restored = RiskManager(100, 50, 0.2)
+    restored.load_state(saved.get_state())
+    assert restored.daily_loss == 30 and restored.peak_balance == 1000
+
+    monkeypatch.setattr(risk_module, '_today', lambda: saved.get_state()['trading_day'] + 1)
+    next_day = RiskManager(100, 50, 0.2)
+    next_day.load_state(saved.get_state())
+    assert next_day.daily_loss == 0 and next_day.peak_balance == 1000
+    # Смена дня сбрасывает убыток и у работающего менеджера
+    assert saved.can_open_position(10) and saved.daily_loss == 0
+
+
+def test_robot_restores_and_reconciles_strategy_state(tmp_path):
+    exchange = SimulatedExchange(generate_synthetic_candles(['BTCUSDT', 'ETHUSDT'], 300, seed=5))
+    exchange.advance()
+
+    def make_robot():
+        return TradingRobot('sim', 'sim', ['BTCUSDT', 'ETHUSDT'], None, 100, 1000, 0.5,
+                            client=exchange, enable_visualizer=False, state_dir=str(tmp_path))
+
+    robot = make_robot()
+    btc = robot.strategies['BTCUSDT']
+    btc.analyze_market(exchange.get_market_data('BTCUSDT'))
+    exchange.place_order(Order('BTCUSDT', 'BUY', 'MARKET', 0.01))
+    stop_order = Order('BTCUSDT', 'SELL', 'STOP', 0.01, price=1.0, reduce_only=True)
+    exchange.place_order(stop_order)
+    robot.refresh_snapshot()
+    btc.update_positions()
+    btc.open_positions[0].stop_loss = 123.0
+    btc.open_positions[0].stop_loss_order_id = stop_order.order_id
+    # Позиция, закрытая за время простоя
+    robot.strategies['ETHUSDT'].open_positions = [Position('ETHUSDT', 'LONG', 1.0, 10.0,
+                                                           stop_loss=9.0, take_profit=11.0)]
+    robot.risk_manager.check_daily_loss(25)
+    robot.save_state()
+    indicator_state = btc.indicators.get_state()
+    robot.engine.executor.shutdown(wait=True)
+
+    restored = make_robot()
+    position = restored.strategies['BTCUSDT'].current_position
+    assert position.stop_loss == 123.0 and position.stop_loss_order_id == stop_order.order_id
+    assert restored.strategies['BTCUSDT'].indicators.get_state() == indicator_state
+    assert restored.strategies['ETHUSDT'].open_positions == []
+    assert restored.risk_manager.daily_loss == 25
+    restored.engine.executor.shutdown(wait=True)
@@ -0,0 +1,65 @@
+import json
+import urllib.request
+
+import pytest
+
+from utils import strategy_visualizer
+from utils.strategy_visualizer import (BaseVisualizer, DashboardVisualizer, StrategyVisualizer, initialize_visualizer,
+                                      update_visualizer)
+
+CONDITIONS = {"RSI": 55.0, "Цена": 100.0, "Объем": 10.0, "Тренд": 0.5, "ATR": 1.0}
+POSITION = {"Позиция": "LONG", "Цена входа": 99.0, "Текущая цена": 100.0}
+
+
+class FakeLabel:
+    def __init__(self):
+        self.calls = 0
+
+    def config(self, **kwargs):
+        self.calls += 1
+
+
+def test_tk_visualizer_coalesces_and_updates_only_changed_labels():
+    visualizer = StrategyVisualizer("ScalpingStrategy1")
+    labels = {key: FakeLabel() for key in strategy_visualizer.CONDITION_LABELS + strategy_visualizer.POSITION_LABELS}
+    visualizer.pair_frames['BTCUSDT'] = {"frame": None, "labels": labels}
+
+    for price in (100.0, 101.0, 102.0):
+        visualizer.publish('BTCUSDT', {**CONDITIONS, "Цена": price}, POSITION)
+    pending = visualizer.drain()
+    assert pending['BTCUSDT'][0]["Цена"] == 102.0
+    visualizer.update_data('BTCUSDT', *pending['BTCUSDT'])
+    assert labels["Цена"].calls == 1 and labels["RSI"].calls == 1
+
+    visualizer.update_data('BTCUSDT', {**CONDITIONS, "Цена": 103.0}, POSITION)
+    assert labels["Цена"].calls == 2
+    assert labels["RSI"].calls == 1 and labels["Текущая цена"].calls == 1
+
+
+def test_visualizer_must_implement_start():
+    class NoStart(BaseVisualizer):
+        pass
+
+    with pytest.raises(TypeError):
+        NoStart('ScalpingStrategy1')
+
+
+def test_headless_mode_disables_updates():
+    assert initialize_visualizer("ScalpingStrategy1", mode='headless') is None
+    assert not strategy_visualizer.visualizer_enabled()
+    update_visualizer('BTCUSDT', CONDITIONS, POSITION)
+
+
+def test_http_dashboard_serves_latest_state():
+    dashboard = initialize_visualizer("ScalpingStrategy1", mode='http', port=0)
+    try:
+        assert isinstance(dashboard, DashboardVisualizer)
+        update_visualizer('BTCUSDT', CONDITIONS, POSITION)
+        update_visualizer('BTCUSDT', {**CONDITIONS, "RSI": 80.0}, POSITION)
+        port = dashboard.httpd.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/state") as response:
+            state = json.loads(response.read())
+        assert state['BTCUSDT']['RSI'] == ["RSI: 80.00", "red"]
+        assert state['BTCUSDT']['Текущая цена'][1] == "green"
+    finally:
+        strategy_visualizer.stop_visualizer()
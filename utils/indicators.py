@@ -0,0 +1,376 @@
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+NAN = float('nan')
+
+
+class StreamingIndicator:
+    """
+    Базовый класс потокового индикатора.
+
+    Индикатор хранит состояние после последнего закрытого бара (_prev) и
+    состояние с учетом текущего, еще формирующегося бара (_state). Новый бар
+    фиксирует текущее состояние, а повторное обновление того же бара
+    пересчитывает его от _prev. Обе операции выполняются за O(1).
+    """
+
+    def __init__(self):
+        self._prev = None
+        self._state = None
+
+    def reset(self):
+        self._prev = None
+        self._state = None
+
+    def get_state(self) -> Dict:
+        """
+        Состояние индикатора в виде, пригодном для JSON.
+        """
+        return {'prev': self._prev, 'state': self._state}
+
+    def set_state(self, state: Dict):
+        self._prev = tuple(state['prev']) if state['prev'] is not None else None
+        self._state = tuple(state['state']) if state['state'] is not None else None
+
+    def update(self, value: float, new_bar: bool = True) -> float:
+        """
+        Обновляет индикатор новым значением.
+
+        :param value: значение (обычно цена закрытия) бара
+        :param new_bar: True для нового бара, False для обновления последнего бара
+        :return: текущее значение индикатора
+        """
+        if new_bar or self._state is None:
+            self._prev = self._state
+        self._state = self._step(self._prev, value)
+        return self.value
+
+    def update_from(self, market_data: Dict, index: int, new_bar: bool = True) -> float:
+        return self.update(float(market_data['close'][index]), new_bar)
+
+    def _step(self, state, value):
+        raise NotImplementedError("Метод должен быть реализован в подклассе")
+
+    @property
+    def value(self) -> float:
+        raise NotImplementedError("Метод должен быть реализован в подклассе")
+
+
+class EMA(StreamingIndicator):
+    """
+    Экспоненциальная скользящая средняя (аналог ta.trend.EMAIndicator).
+    """
+
+    def __init__(self, period: int):
+        super().__init__()
+        self.period = period
+        self.alpha = 2 / (period + 1)
+
+    def _step(self, state, value):
+        if state is None:
+            return value, 1
+        ema, count = state
+        return ema + self.alpha * (value - ema), count + 1
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None and self._state[1] >= self.period
+
+    @property
+    def value(self) -> float:
+        return self._state[0] if self.ready else NAN
+
+
+class RSI(StreamingIndicator):
+    """
+    Индекс относительной силы со сглаживанием Уайлдера (аналог ta.momentum.RSIIndicator).
+    """
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        self.alpha = 1 / period
+
+    def _step(self, state, value):
+        if state is None:
+            return value, 0.0, 0.0, 1
+        prev_close, avg_up, avg_down, count = state
+        diff = value - prev_close
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        avg_up += self.alpha * (up - avg_up)
+        avg_down += self.alpha * (down - avg_down)
+        return value, avg_up, avg_down, count + 1
+
+    @property
+    def value(self) -> float:
+        if self._state is None or self._state[3] < self.period:
+            return NAN
+        _, avg_up, avg_down, _ = self._state
+        if avg_down == 0:
+            return 100.0
+        return 100 - 100 / (1 + avg_up / avg_down)
+
+
+class ATR(StreamingIndicator):
+    """
+    Средний истинный диапазон (аналог ta.volatility.AverageTrueRange).
+
+    Как и в ta, до накопления period баров значение равно 0.
+    """
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+
+    def update(self, high: float, low: float, close: float, new_bar: bool = True) -> float:
+        return super().update((high, low, close), new_bar)
+
+    def update_from(self, market_data: Dict, index: int, new_bar: bool = True) -> float:
+        return self.update(float(market_data['high'][index]), float(market_data['low'][index]),
+                           float(market_data['close'][index]), new_bar)
+
+    def _step(self, state, value):
+        high, low, close = value
+        if state is None:
+            return close, high - low, 0.0, 1
+
+        prev_close, tr_sum, atr, count = state
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        count += 1
+        if count < self.period:
+            return close, tr_sum + true_range, 0.0, count
+        if count == self.period:
+            return close, tr_sum + true_range, (tr_sum + true_range) / self.period, count
+        return close, tr_sum, (atr * (self.period - 1) + true_range) / self.period, count
+
+    @property
+    def value(self) -> float:
+        return self._state[2] if self._state is not None else 0.0
+
+
+class MACD:
+    """
+    MACD, сигнальная линия и гистограмма (аналог ta.trend.MACD).
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal_ema = EMA(signal)
+
+    def reset(self):
+        self.fast.reset()
+        self.slow.reset()
+        self.signal_ema.reset()
+
+    def get_state(self) -> Dict:
+        return {'fast': self.fast.get_state(), 'slow': self.slow.get_state(), 'signal': self.signal_ema.get_state()}
+
+    def set_state(self, state: Dict):
+        self.fast.set_state(state['fast'])
+        self.slow.set_state(state['slow'])
+        self.signal_ema.set_state(state['signal'])
+
+    def update(self, value: float, new_bar: bool = True) -> float:
+        self.fast.update(value, new_bar)
+        self.slow.update(value, new_bar)
+        # Сигнальная линия строится только по определенным значениям MACD
+        if self.slow.ready:
+            self.signal_ema.update(self.macd, new_bar)
+        return self.macd_diff
+
+    def update_from(self, market_data: Dict, index: int, new_bar: bool = True) -> float:
+        return self.update(float(market_data['close'][index]), new_bar)
+
+    @property
+    def macd(self) -> float:
+        if not self.slow.ready:
+            return NAN
+        return self.fast._state[0] - self.slow._state[0]
+
+    @property
+    def signal(self) -> float:
+        return self.signal_ema.value
+
+    @property
+    def macd_diff(self) -> float:
+        return self.macd - self.signal
+
+    @property
+    def value(self) -> float:
+        return self.macd_diff
+
+
+class BollingerBands:
+    """
+    Полосы Боллинджера (аналог ta.volatility.BollingerBands).
+
+    Скользящие сумма и сумма квадратов обновляются за O(1); чтобы не
+    накапливать ошибку округления, они пересчитываются заново раз в window баров.
+    """
+
+    def __init__(self, window: int = 20, window_dev: float = 2):
+        self.window = window
+        self.window_dev = window_dev
+        self.reset()
+
+    def reset(self):
+        self._values = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._shift = None
+        self._bars_since_recompute = 0
+
+    def get_state(self) -> Dict:
+        return {'values': list(self._values), 'sum': self._sum, 'sum_sq': self._sum_sq, 'shift': self._shift,
+                'bars_since_recompute': self._bars_since_recompute}
+
+    def set_state(self, state: Dict):
+        self._values = deque(state['values'])
+        self._sum = state['sum']
+        self._sum_sq = state['sum_sq']
+        self._shift = state['shift']
+        self._bars_since_recompute = state['bars_since_recompute']
+
+    def update(self, value: float, new_bar: bool = True) -> float:
+        if self._shift is None:
+            # Сдвиг к первому значению уменьшает потерю точности при вычислении дисперсии
+            self._shift = value
+        shifted = value - self._shift
+
+        if not new_bar and self._values:
+            old = self._values[-1]
+            self._values[-1] = shifted
+            self._sum += shifted - old
+            self._sum_sq += shifted * shifted - old * old
+            return self.mavg
+
+        self._values.append(shifted)
+        self._sum += shifted
+        self._sum_sq += shifted * shifted
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+
+        self._bars_since_recompute += 1
+        if self._bars_since_recompute >= self.window:
+            self._sum = math.fsum(self._values)
+            self._sum_sq = math.fsum(v * v for v in self._values)
+            self._bars_since_recompute = 0
+        return self.mavg
+
+    def update_from(self, market_data: Dict, index: int, new_bar: bool = True) -> float:
+        return self.update(float(market_data['close'][index]), new_bar)
+
+    @property
+    def ready(self) -> bool:
+        return len(self._values) >= self.window
+
+    @property
+    def mavg(self) -> float:
+        if not self.ready:
+            return NAN
+        return self._shift + self._sum / self.window
+
+    @property
+    def std(self) -> float:
+        if not self.ready:
+            return NAN
+        mean = self._sum / self.window
+        return math.sqrt(max(self._sum_sq / self.window - mean * mean, 0.0))
+
+    @property
+    def hband(self) -> float:
+        return self.mavg + self.window_dev * self.std
+
+    @property
+    def lband(self) -> float:
+        return self.mavg - self.window_dev * self.std
+
+    @property
+    def value(self) -> float:
+        return self.mavg
+
+
+class IndicatorEngine:
+    """
+    Набор потоковых индикаторов одного символа, синхронизированный со свечами.
+
+    По меткам времени в market_data определяет, какие бары новые, а какой
+    бар был лишь обновлен, и передает индикаторам только изменения. При
+    первом вызове или разрыве в данных индикаторы прогреваются по всему окну.
+    """
+
+    def __init__(self, indicators: Dict[str, object]):
+        self.indicators = indicators
+        self.last_timestamp: Optional[int] = None
+
+    def __getitem__(self, name: str):
+        return self.indicators[name]
+
+    def reset(self):
+        for indicator in self.indicators.values():
+            indicator.reset()
+        self.last_timestamp = None
+
+    def get_state(self) -> Dict:
+        """
+        Состояние всех индикаторов и метка времени последнего обработанного бара.
+        """
+        return {'last_timestamp': self.last_timestamp,
+                'indicators': {name: indicator.get_state() for name, indicator in self.indicators.items()}}
+
+    def set_state(self, state: Dict):
+        """
+        Восстанавливает состояние из get_state. Если бар last_timestamp окажется
+        вне окна свечей, при следующем update индикаторы прогреются заново.
+        """
+        if set(state['indicators']) != set(self.indicators):
+            raise ValueError("Набор индикаторов не совпадает с сохраненным состоянием")
+        for name, indicator_state in state['indicators'].items():
+            self.indicators[name].set_state(indicator_state)
+        self.last_timestamp = state['last_timestamp']
+
+    def update(self, market_data: Dict):
+        timestamps = market_data['timestamp']
+        if len(timestamps) == 0:
+            return
+
+        start = 0
+        if self.last_timestamp is not None:
+            start = int(np.searchsorted(timestamps, self.last_timestamp))
+            if start == len(timestamps) or timestamps[start] != self.last_timestamp:
+                # Последний обработанный бар выпал из окна - прогреваемся заново
+                self.reset()
+                start = 0
+
+        for i in range(start, len(timestamps)):
+            new_bar = self.last_timestamp is None or timestamps[i] > self.last_timestamp
+            for indicator in self.indicators.values():
+                indicator.update_from(market_data, i, new_bar)
+            self.last_timestamp = int(timestamps[i])
+
+
+def indicator_series(indicator, market_data: Dict, *attributes: str) -> List[np.ndarray]:
+    """
+    Значения индикатора после каждого бара истории. Расчет тот же, что
+    выполняют стратегии в реальном времени, поэтому сигналы бэктеста
+    совпадают с торговыми.
+
+    :param attributes: свойства индикатора, по умолчанию 'value'
+    :return: по массиву на каждое свойство
+    """
+    attributes = attributes or ('value',)
+    length = len(market_data['close'])
+    series = [np.full(length, np.nan) for _ in attributes]
+    indicator.reset()
+    for i in range(length):
+        indicator.update_from(market_data, i)
+        for values, attribute in zip(series, attributes):
+            values[i] = getattr(indicator, attribute)
+    return series
@@ -1,41 +1,205 @@
+import atexit
+import json
 import logging
-import os
-from logging.handlers import RotatingFileHandler
+import queue
+import re
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Числа в тексте сообщения (цены, задержки, количества) не различают повторы
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+# extra для записей об ордерах и позициях: они не подавляются фильтром повторов
+TRADE_EVENT = {'rate_limit': False}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматтер в JSON Lines: одна запись - один JSON-объект в строке.
+    Поле symbol добавляется, если оно передано через extra.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        symbol = getattr(record, 'symbol', None)
+        if symbol is not None:
+            entry['symbol'] = symbol
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничивает частоту повторяющихся сообщений.
+
+    Одинаковые сообщения (логгер, уровень, текст с замененными числами и символ) пропускаются не чаще
+    burst раз за interval секунд; к следующему пропущенному сообщению
+    добавляется число подавленных повторов. Ограничиваются только записи
+    до max_level (по умолчанию DEBUG и INFO) без extra TRADE_EVENT:
+    предупреждения, ошибки и записи об исполнении ордеров проходят всегда.
+    """
+
+    def __init__(self, interval: float = 60.0, burst: int = 1, max_level: int = logging.INFO,
+                 max_keys: int = 10000):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_level = max_level
+        self.max_keys = max_keys
+        # ключ -> [начало окна, пропущено в окне, подавлено]
+        self._windows: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or not getattr(record, 'rate_limit', True):
+            return True
+        # Сообщения формируются f-строками, поэтому ключ строится по готовому тексту без чисел
+        key = (record.name, record.levelno, _NUMBER.sub('#', record.getMessage()), getattr(record, 'symbol', None))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                if len(self._windows) >= self.max_keys:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (подавлено повторов: {suppressed})"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class SymbolLoggerAdapter(logging.LoggerAdapter):
+    """
+    Добавляет к записям символ (поле symbol в JSON-логах), сохраняя extra вызова.
+    """
+
+    def __init__(self, logger: logging.Logger, symbol: str):
+        super().__init__(logger, {'symbol': symbol})
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = {**self.extra, **kwargs.get('extra', {})}
+        return msg, kwargs
+
+
+def _build_handlers(log_file: Optional[str], json_format: bool) -> List[logging.Handler]:
+    formatter = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+_running_listeners = set()
+_listeners_lock = threading.Lock()
+
+
+def _start_queue_logging(logger: logging.Logger, log_file: Optional[str], json_format: bool,
+                         rate_limit_interval: Optional[float]) -> QueueListener:
+    """
+    Подключает к логгеру QueueHandler, а запись в консоль и файл выполняет
+    фоновый поток QueueListener.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    if rate_limit_interval:
+        queue_handler.addFilter(RateLimitFilter(rate_limit_interval))
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *_build_handlers(log_file, json_format), respect_handler_level=True)
+    listener.start()
+    with _listeners_lock:
+        _running_listeners.add(listener)
+    # При выходе дописываем оставшиеся в очереди записи
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener: QueueListener):
+    # Повторная остановка (например, из atexit после stop) ничего не делает
+    with _listeners_lock:
+        if listener not in _running_listeners:
+            return
+        _running_listeners.discard(listener)
+    listener.stop()
+
+
+_root_listener: Optional[QueueListener] = None
+
+
+def setup_logging(log_file: Optional[str] = 'trading_bot.log', level: int = logging.INFO, json_format: bool = False,
+                  rate_limit_interval: Optional[float] = 60.0) -> QueueListener:
+    """
+    Настраивает корневой логгер приложения.
+
+    Торговые потоки только помещают запись в очередь; форматирование вывода
+    и запись на диск выполняются в фоновом потоке, поэтому задержки диска
+    или терминала не блокируют торговлю.
+
+    :param log_file: файл с ротацией; None - только консоль
+    :param json_format: писать записи в формате JSON Lines
+    :param rate_limit_interval: окно подавления повторяющихся сообщений в секундах; None - без ограничения
+    :return: фоновый обработчик очереди
+    """
+    global _root_listener
+    root = logging.getLogger()
+    if _root_listener is not None:
+        _stop_listener(_root_listener)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    _root_listener = _start_queue_logging(root, log_file, json_format, rate_limit_interval)
+    return _root_listener
+
 
 class CustomLogger:
-    def __init__(self, name, log_file='trading_bot.log', log_level=logging.INFO):
+    def __init__(self, name, log_file='trading_bot.log', log_level=logging.INFO, json_format=False,
+                 rate_limit_interval: Optional[float] = 60.0):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(log_level)
 
-        # Создаем форматтер для логов
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-        # Создаем обработчик для вывода в консоль
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        # Записи передаются через очередь фоновому потоку, который пишет в консоль и в файл с ротацией
+        self.listener = _start_queue_logging(self.logger, log_file, json_format, rate_limit_interval)
 
-        # Создаем обработчик для записи в файл с ротацией
-        file_handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=5)
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+    def debug(self, message, symbol=None):
+        self.logger.debug(message, extra={'symbol': symbol})
 
-    def debug(self, message):
-        self.logger.debug(message)
+    def info(self, message, symbol=None):
+        self.logger.info(message, extra={'symbol': symbol})
 
-    def info(self, message):
-        self.logger.info(message)
+    def warning(self, message, symbol=None):
+        self.logger.warning(message, extra={'symbol': symbol})
 
-    def warning(self, message):
-        self.logger.warning(message)
+    def error(self, message, symbol=None):
+        self.logger.error(message, extra={'symbol': symbol})
 
-    def error(self, message):
-        self.logger.error(message)
+    def critical(self, message, symbol=None):
+        self.logger.critical(message, extra={'symbol': symbol})
 
-    def critical(self, message):
-        self.logger.critical(message)
+    def stop(self):
+        _stop_listener(self.listener)
 
 # Пример использования:
 # logger = CustomLogger(__name__)
 # logger.info("Это информационное сообщение")
-# logger.error("Это сообщение об ошибке")
\ No newline at end of file
+# logger.info("Открыта позиция", symbol="BTCUSDT")
+# logger.error("Это сообщение об ошибке")
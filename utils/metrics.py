@@ -0,0 +1,218 @@
+import bisect
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Границы корзин гистограммы в секундах: от 100 мкс до 30 с
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек с фиксированными корзинами.
+
+    Запись значения - бинарный поиск корзины и увеличение счетчика под
+    коротким замком, без выделения памяти.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class MetricsRegistry:
+    """
+    Реестр гистограмм задержек по этапам цикла и символам.
+
+    Этапы: candle_fetch, indicators, signals, order_round_trip,
+    position_refresh, visualizer_push, cycle.
+    Задержки, относящиеся к эндпоинтам биржи, а не к символам (rate_limit_wait),
+    хранятся отдельно и экспортируются с меткой endpoint.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._endpoint_histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, histograms: Dict[Tuple[str, str], LatencyHistogram], key: Tuple[str, str], seconds: float):
+        histogram = histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = histograms.setdefault(key, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def observe(self, stage: str, seconds: float, symbol: str = ''):
+        self._observe(self._histograms, (stage, symbol), seconds)
+
+    def observe_endpoint(self, stage: str, seconds: float, endpoint: str):
+        self._observe(self._endpoint_histograms, (stage, endpoint), seconds)
+
+    @contextmanager
+    def timer(self, stage: str, symbol: str = ''):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, symbol)
+
+    def histograms(self) -> Dict[Tuple[str, str], LatencyHistogram]:
+        with self._lock:
+            return dict(self._histograms)
+
+    def endpoint_histograms(self) -> Dict[Tuple[str, str], LatencyHistogram]:
+        with self._lock:
+            return dict(self._endpoint_histograms)
+
+    def render_prometheus(self) -> str:
+        """
+        Формирует метрики в текстовом формате Prometheus.
+        """
+        lines = []
+        _render_histograms(lines, 'trading_stage_latency_seconds', 'Latency of trading loop stages',
+                           'symbol', self.histograms())
+        _render_histograms(lines, 'trading_endpoint_latency_seconds', 'Latency of exchange endpoint stages',
+                           'endpoint', self.endpoint_histograms())
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histograms(lines: List[str], name: str, description: str, label: str,
+                       histograms: Dict[Tuple[str, str], LatencyHistogram]):
+    lines.append(f'# HELP {name} {description}')
+    lines.append(f'# TYPE {name} histogram')
+    for (stage, value), histogram in sorted(histograms.items()):
+        counts, total, count = histogram.snapshot()
+        labels = f'stage="{stage}",{label}="{value}"'
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'{name}_sum{{{labels}}} {total}')
+        lines.append(f'{name}_count{{{labels}}} {count}')
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профайлер всех потоков процесса.
+
+    С заданным интервалом снимает стеки через sys._current_frames() и считает
+    их в свернутом формате (folded stacks), пригодном для построения flame graph.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def report(self) -> str:
+        return '\n'.join(f"{stack} {count}" for stack, count in self.samples.most_common()) + '\n'
+
+
+class MetricsServer:
+    """
+    Локальный HTTP-сервер метрик.
+
+    /metrics - гистограммы в формате Prometheus;
+    /profiler/start, /profiler/stop - включение и выключение профайлера;
+    /profiler - накопленные стеки профайлера.
+    """
+
+    def __init__(self, registry: 'MetricsRegistry', port: int = 9100, host: str = '127.0.0.1',
+                 profiler: Optional[SamplingProfiler] = None):
+        self.registry = registry
+        self.profiler = profiler or SamplingProfiler()
+        self.logger = logging.getLogger(__name__)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = server.registry.render_prometheus()
+                elif self.path == '/profiler/start':
+                    server.profiler.start()
+                    body = 'profiler started\n'
+                elif self.path == '/profiler/stop':
+                    server.profiler.stop()
+                    body = 'profiler stopped\n'
+                elif self.path == '/profiler':
+                    body = server.profiler.report()
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.logger.info(f"Сервер метрик запущен на порту {self.httpd.server_address[1]}")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.profiler.stop()
+
+
+# Глобальный реестр метрик процесса
+metrics = MetricsRegistry()
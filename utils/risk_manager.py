@@ -1,35 +1,280 @@
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Индексы полей состояния риска; TRADING_DAY - порядковый номер дня (UTC), к которому относится дневной убыток
+DAILY_LOSS, PEAK_BALANCE, CURRENT_BALANCE, TRADING_DAY = range(4)
+STATE_SIZE = 4
+
+
+def _today() -> int:
+    return datetime.now(timezone.utc).date().toordinal()
+
+
 class RiskManager:
-    def __init__(self, max_position_size: float, max_daily_loss: float, max_drawdown: float):
+    """
+    Потокобезопасный менеджер рисков.
+
+    Все изменения и проверки выполняются под одним RLock, поэтому торговый
+    цикл и поток Telegram-бота видят согласованное состояние. Экспозиция
+    (номинал позиций) хранится в индексе по (символ, сторона) вместе с суммами
+    по символу и по аккаунту, которые обновляются инкрементально. Проверка
+    перед сделкой с резервированием экспозиции (try_reserve) атомарна и
+    выполняется за O(1); reserve_batch проверяет пачку сигналов за один захват замка.
+    Дневной убыток накапливается из изменений баланса
+    между обновлениями (update_balance) и обнуляется при смене дня (UTC).
+    """
+
+    def __init__(self, max_position_size: float, max_daily_loss: float, max_drawdown: float,
+                 max_total_exposure: Optional[float] = None, max_symbol_exposure: Optional[float] = None):
         self.max_position_size = max_position_size
         self.max_daily_loss = max_daily_loss
         self.max_drawdown = max_drawdown
-        self.daily_loss = 0
-        self.peak_balance = 0
-        self.current_balance = 0
+        self.max_total_exposure = max_total_exposure
+        self.max_symbol_exposure = max_symbol_exposure
+        self.available_balance = 0.0
+        self._state = [0.0, 0.0, 0.0, float(_today())]
+        self._lock = threading.RLock()
+        self._exposure: Dict[Tuple[str, str], float] = {}
+        self._symbol_exposure: Dict[str, float] = {}
+        self._total_exposure = 0.0
+
+    @property
+    def daily_loss(self) -> float:
+        return self._state[DAILY_LOSS]
+
+    @property
+    def peak_balance(self) -> float:
+        return self._state[PEAK_BALANCE]
 
-    def calculate_position_size(self, price: float, account_balance: float) -> float:
+    @property
+    def current_balance(self) -> float:
+        return self._state[CURRENT_BALANCE]
+
+    @property
+    def total_exposure(self) -> float:
+        return self._total_exposure
+
+    def calculate_position_size(self, price: float, account_balance: Optional[float] = None) -> float:
+        """
+        :param account_balance: баланс для расчета, по умолчанию последний доступный баланс из update_balance
+        """
+        if account_balance is None:
+            account_balance = self.available_balance
         max_size = min(self.max_position_size, account_balance * 0.02)  # Не более 2% от баланса счета
         return max_size / price
 
-    def update_balance(self, new_balance: float):
-        self.current_balance = new_balance
-        if new_balance > self.peak_balance:
-            self.peak_balance = new_balance
+    def update_balance(self, new_balance: float, available_balance: Optional[float] = None):
+        """
+        Обновляет баланс и учитывает его изменение в дневном убытке: так в убыток попадают
+        и сделки, закрытые на бирже по стоп-лоссу или тейк-профиту, и комиссии.
+        Первое обновление после запуска только запоминает баланс.
+        """
+        with self._lock:
+            previous_balance = self._state[CURRENT_BALANCE]
+            if previous_balance:
+                self.check_daily_loss(previous_balance - new_balance)
+            self._state[CURRENT_BALANCE] = new_balance
+            if new_balance > self._state[PEAK_BALANCE]:
+                self._state[PEAK_BALANCE] = new_balance
+            if available_balance is not None:
+                self.available_balance = available_balance
+
+    def _roll_day(self):
+        # Вызывается под замком
+        today = _today()
+        if self._state[TRADING_DAY] != today:
+            self._state[DAILY_LOSS] = 0.0
+            self._state[TRADING_DAY] = today
 
     def check_daily_loss(self, trade_result: float) -> bool:
-        self.daily_loss += trade_result
-        return self.daily_loss <= self.max_daily_loss
+        """
+        :param trade_result: убыток (положительный) или прибыль (отрицательная)
+        :return: True, если дневной убыток в пределах лимита
+        """
+        with self._lock:
+            self._roll_day()
+            self._state[DAILY_LOSS] += trade_result
+            return self._state[DAILY_LOSS] <= self.max_daily_loss
 
     def check_drawdown(self) -> bool:
-        if self.peak_balance == 0:
+        with self._lock:
+            peak_balance = self._state[PEAK_BALANCE]
+            if peak_balance == 0:
+                return True
+            current_drawdown = (peak_balance - self._state[CURRENT_BALANCE]) / peak_balance
+            return current_drawdown <= self.max_drawdown
+
+    def _allowed(self, trade_size: float, symbol: Optional[str]) -> bool:
+        # Вызывается под замком
+        self._roll_day()
+        if trade_size > self.max_position_size or self._state[DAILY_LOSS] > self.max_daily_loss:
+            return False
+        if not self.check_drawdown():
+            return False
+        if self.max_total_exposure is not None and self.total_exposure + trade_size > self.max_total_exposure:
+            return False
+        if (symbol is not None and self.max_symbol_exposure is not None
+                and self._symbol_exposure.get(symbol, 0.0) + trade_size > self.max_symbol_exposure):
+            return False
+        return True
+
+    def can_open_position(self, trade_size: float, symbol: Optional[str] = None) -> bool:
+        with self._lock:
+            return self._allowed(trade_size, symbol)
+
+    def try_reserve(self, symbol: str, side: str, trade_size: float) -> bool:
+        """
+        Атомарно проверяет лимиты и резервирует экспозицию под новую сделку.
+
+        :param side: 'LONG' или 'SHORT'
+        :return: True, если сделка разрешена и экспозиция зарезервирована
+        """
+        with self._lock:
+            if not self._allowed(trade_size, symbol):
+                return False
+            self._add_exposure(symbol, side, trade_size)
             return True
-        current_drawdown = (self.peak_balance - self.current_balance) / self.peak_balance
-        return current_drawdown <= self.max_drawdown
 
-    def can_open_position(self, trade_size: float) -> bool:
-        return (trade_size <= self.max_position_size and
-                self.check_daily_loss(0) and
-                self.check_drawdown())
+    def reserve_batch(self, requests: Iterable[Tuple[str, str, float]]) -> List[bool]:
+        """
+        Проверяет и резервирует пачку сделок (символ, сторона, номинал) за один захват замка.
+        Сделки обрабатываются по порядку, каждая видит резервы предыдущих.
+        """
+        with self._lock:
+            return [self.try_reserve(symbol, side, trade_size) for symbol, side, trade_size in requests]
+
+    def release(self, symbol: str, side: str, trade_size: float):
+        """
+        Снимает резерв, например если ордер не был размещен.
+        """
+        with self._lock:
+            self._add_exposure(symbol, side, -trade_size)
+
+    def _add_exposure(self, symbol: str, side: str, delta: float):
+        # Вызывается под замком
+        key = (symbol, side)
+        old = self._exposure.get(key, 0.0)
+        new = max(0.0, old + delta)
+        self._exposure[key] = new
+        self._symbol_exposure[symbol] = self._symbol_exposure.get(symbol, 0.0) + new - old
+        self._total_exposure += new - old
+
+    def set_exposure(self, symbol: str, side: str, notional: float):
+        with self._lock:
+            self._add_exposure(symbol, side, notional - self._exposure.get((symbol, side), 0.0))
+
+    def update_positions(self, positions: Dict[str, List]):
+        """
+        Заменяет экспозицию символов фактическими позициями (например, из снимка цикла).
+        Резервы по этим символам при этом снимаются.
+
+        :param positions: словарь {символ: список позиций}
+        """
+        with self._lock:
+            for symbol, symbol_positions in positions.items():
+                notionals = {'LONG': 0.0, 'SHORT': 0.0}
+                for position in symbol_positions:
+                    notionals[position.side] += position.amount * position.entry_price
+                for side, notional in notionals.items():
+                    self.set_exposure(symbol, side, notional)
+
+    def get_exposure(self, symbol: str, side: Optional[str] = None) -> float:
+        with self._lock:
+            if side is None:
+                return self._symbol_exposure.get(symbol, 0.0)
+            return self._exposure.get((symbol, side), 0.0)
+
+    def get_state(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'daily_loss': self.daily_loss,
+                'peak_balance': self.peak_balance,
+                'current_balance': self.current_balance,
+                'available_balance': self.available_balance,
+                'total_exposure': self.total_exposure,
+                'trading_day': int(self._state[TRADING_DAY])
+            }
+
+    def load_state(self, state: Dict):
+        """
+        Восстанавливает пиковый баланс и дневной убыток из сохраненного get_state,
+        например после перезапуска. Убыток прошлого дня не восстанавливается.
+        """
+        with self._lock:
+            self._roll_day()
+            self._state[PEAK_BALANCE] = max(self._state[PEAK_BALANCE], state.get('peak_balance', 0.0))
+            if state.get('trading_day') == self._state[TRADING_DAY]:
+                self._state[DAILY_LOSS] = state.get('daily_loss', 0.0)
 
     def reset_daily_loss(self):
-        self.daily_loss = 0
\ No newline at end of file
+        with self._lock:
+            self._state[DAILY_LOSS] = 0
+            self._state[TRADING_DAY] = _today()
+
+
+class _Reservation:
+    __slots__ = ('symbol', 'side', 'trade_size', 'result', 'done')
+
+    def __init__(self, symbol: str, side: str, trade_size: float):
+        self.symbol = symbol
+        self.side = side
+        self.trade_size = trade_size
+        self.result = False
+        self.done = threading.Event()
+
+
+class ReservationBatcher:
+    """
+    Объединяет одновременные запросы резервирования от стратегий в пачки reserve_batch.
+
+    Стратегии цикла выполняются в пуле потоков. Поток, пришедший с запросом
+    первым, становится ведущим: забирает все накопившиеся запросы и проверяет
+    их одним вызовом reserve_batch в порядке поступления, остальные потоки
+    ждут результата. Запросы, пришедшие во время проверки, попадают
+    в следующую пачку того же ведущего.
+    """
+
+    def __init__(self, risk_manager: RiskManager):
+        self.risk_manager = risk_manager
+        self.batches = 0
+        self._pending: List[_Reservation] = []
+        self._leader_active = False
+        self._lock = threading.Lock()
+
+    def reserve(self, symbol: str, side: str, trade_size: float) -> bool:
+        """
+        :return: True, если сделка разрешена и экспозиция зарезервирована
+        """
+        request = _Reservation(symbol, side, trade_size)
+        with self._lock:
+            self._pending.append(request)
+            leader = not self._leader_active
+            self._leader_active = True
+        if not leader:
+            request.done.wait()
+            return request.result
+
+        batch: List[_Reservation] = []
+        try:
+            while True:
+                with self._lock:
+                    batch, self._pending = self._pending, []
+                    if not batch:
+                        self._leader_active = False
+                        break
+                results = self.risk_manager.reserve_batch(
+                    [(item.symbol, item.side, item.trade_size) for item in batch])
+                self.batches += 1
+                for item, result in zip(batch, results):
+                    item.result = result
+                    item.done.set()
+        except BaseException:
+            # Ожидающие потоки не должны зависнуть: их сделки считаются неразрешенными
+            with self._lock:
+                batch, self._pending = batch + self._pending, []
+                self._leader_active = False
+            for item in batch:
+                item.done.set()
+            raise
+        return request.result
@@ -1,15 +1,126 @@
-import tkinter as tk
-from tkinter import ttk
+import importlib.util
+import json
+import logging
+import os
+import sys
 import threading
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from utils.metrics import metrics
 
-class StrategyVisualizer:
-    def __init__(self, strategy_name):
+# tkinter импортируется только при создании окна
+tk = ttk = None
+
+# Режимы визуализатора
+MODE_TK = 'tk'
+MODE_HTTP = 'http'
+MODE_HEADLESS = 'headless'
+
+CONDITION_LABELS = ["RSI", "Цена", "Объем", "Тренд", "ATR"]
+POSITION_LABELS = ["Позиция", "SL", "TP", "Цена входа", "Текущая цена", "Цена добора", "Частичное закрытие"]
+
+
+def _format_value(key, value) -> str:
+    if isinstance(value, float):
+        return f"{key}: {value:.2f}"
+    return f"{key}: {value}"
+
+
+def format_labels(conditions: Dict, position_data: Dict) -> Dict[str, Tuple[str, str]]:
+    """
+    Текст и цвет меток пары.
+
+    :return: словарь {название метки: (текст, цвет)}
+    """
+    labels = {}
+    for condition, value in conditions.items():
+        if condition not in CONDITION_LABELS:
+            continue
+        # Цвет в зависимости от условия
+        if condition == "RSI":
+            color = "green" if 30 <= value <= 70 else "red"
+        elif condition == "Тренд":
+            color = "green" if value > 0 else "red"
+        else:
+            color = "black"
+        labels[condition] = (_format_value(condition, value), color)
+
+    for key, value in position_data.items():
+        if key not in POSITION_LABELS:
+            continue
+        color = "black"
+        # Цвет текущей цены относительно цены входа
+        if key == "Текущая цена":
+            entry_price = position_data.get("Цена входа", 0)
+            position_type = position_data.get("Позиция", "Нет")
+            if position_type == "LONG":
+                color = "green" if value > entry_price else "red"
+            elif position_type == "SHORT":
+                color = "green" if value < entry_price else "red"
+        labels[key] = (_format_value(key, value), color)
+    return labels
+
+
+class BaseVisualizer(ABC):
+    """
+    Общая часть визуализаторов: торговые потоки только сохраняют последние
+    данные символа (повторные обновления до отрисовки объединяются), а
+    форматирование и отрисовка выполняются в потоке визуализатора не чаще
+    одного раза за frame_interval секунд.
+    """
+
+    def __init__(self, strategy_name: str, frame_interval: float = 0.5):
         self.strategy_name = strategy_name
+        self.frame_interval = frame_interval
+        self.logger = logging.getLogger(__name__)
+        self._pending: Dict[str, Tuple[Dict, Dict]] = {}
+        self._pending_lock = threading.Lock()
+
+    def publish(self, symbol: str, conditions: Dict, position_data: Dict):
+        with self._pending_lock:
+            self._pending[symbol] = (conditions, position_data)
+
+    def drain(self) -> Dict[str, Tuple[Dict, Dict]]:
+        """
+        Забирает накопленные с прошлой отрисовки обновления.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    @abstractmethod
+    def start(self):
+        """
+        Запускает поток отрисовки.
+        """
+
+    def stop(self):
+        pass
+
+
+class StrategyVisualizer(BaseVisualizer):
+    """
+    Окно Tk с состоянием условий и позиций по парам.
+
+    Отрисовка выполняется таймером окна: за кадр применяются только
+    последние данные каждого символа и меняются только метки, текст или
+    цвет которых изменился.
+    """
+
+    def __init__(self, strategy_name, frame_interval: float = 0.5):
+        super().__init__(strategy_name, frame_interval)
         self.window = None
         self.pair_frames = {}
         self.column_frames = []
+        # (символ, метка) -> (текст, цвет), показанные в окне
+        self._rendered: Dict[Tuple[str, str], Tuple[str, str]] = {}
 
     def create_window(self):
+        global tk, ttk
+        import tkinter as tk
+        from tkinter import ttk
+
         self.window = tk.Tk()
         self.window.title(f"Визуализация стратегии: {self.strategy_name}")
         self.window.geometry("1800x800")  # Увеличиваем ширину окна
@@ -45,7 +156,7 @@ class StrategyVisualizer:
     def create_pair_frame(self, symbol):
         # Выбираем колонку с наименьшим количеством пар
         column_frame = min(self.column_frames, key=lambda f: len(f.winfo_children()))
-        
+
         frame = ttk.LabelFrame(column_frame, text=symbol)
         frame.pack(padx=5, pady=5, fill=tk.X)
 
@@ -55,86 +166,177 @@ class StrategyVisualizer:
         position_frame = ttk.Frame(frame)
         position_frame.pack(side=tk.RIGHT, padx=5, pady=5)
 
-        conditions = ["RSI", "Цена", "Объем", "Тренд", "ATR"]
         labels = {}
-        for condition in conditions:
+        for condition in CONDITION_LABELS:
             label = ttk.Label(conditions_frame, text=f"{condition}: ")
             label.pack(anchor="w")
             labels[condition] = label
-
-        position_labels = ["Позиция", "SL", "TP", "Цена входа", "Текущая цена", "Цена добора", "Частичное закрытие"]
-        position_info = {}
-        for label in position_labels:
-            info = ttk.Label(position_frame, text=f"{label}: ")
-            info.pack(anchor="w")
-            position_info[label] = info
+        for key in POSITION_LABELS:
+            label = ttk.Label(position_frame, text=f"{key}: ")
+            label.pack(anchor="w")
+            labels[key] = label
 
         self.pair_frames[symbol] = {
             "frame": frame,
-            "conditions": labels,
-            "position": position_info
+            "labels": labels
         }
 
     def update_data(self, symbol, conditions, position_data):
         if symbol not in self.pair_frames:
             self.create_pair_frame(symbol)
 
-        frame_data = self.pair_frames[symbol]
+        labels = self.pair_frames[symbol]["labels"]
+        for key, (text, color) in format_labels(conditions, position_data).items():
+            if self._rendered.get((symbol, key)) == (text, color):
+                continue
+            labels[key].config(text=text, foreground=color)
+            self._rendered[(symbol, key)] = (text, color)
 
-        for condition, value in conditions.items():
-            if condition in frame_data["conditions"]:
-                label = frame_data["conditions"][condition]
-                if isinstance(value, float):
-                    text = f"{condition}: {value:.2f}"
-                else:
-                    text = f"{condition}: {value}"
-                label.config(text=text)
-                
-                # Устанавливаем цвет в зависимости от условия
-                if condition == "RSI":
-                    color = "green" if 30 <= value <= 70 else "red"
-                elif condition == "Тренд":
-                    color = "green" if value > 0 else "red"
-                else:
-                    color = "black"
-                label.config(foreground=color)
-
-        for key, value in position_data.items():
-            if key in frame_data["position"]:
-                label = frame_data["position"][key]
-                if isinstance(value, float):
-                    text = f"{key}: {value:.2f}"
-                else:
-                    text = f"{key}: {value}"
-                label.config(text=text)
-                
-                # Устанавливаем цвет для текущей цены
-                if key == "Текущая цена":
-                    entry_price = position_data.get("Цена входа", 0)
-                    position_type = position_data.get("Позиция", "Нет")
-                    if position_type == "LONG":
-                        color = "green" if value > entry_price else "red"
-                    elif position_type == "SHORT":
-                        color = "green" if value < entry_price else "red"
-                    else:
-                        color = "black"
-                    label.config(foreground=color)
+    def _render(self):
+        try:
+            for symbol, (conditions, position_data) in self.drain().items():
+                self.update_data(symbol, conditions, position_data)
+        except Exception as e:
+            self.logger.error(f"Ошибка отрисовки визуализатора: {str(e)}")
+        self.window.after(int(self.frame_interval * 1000), self._render)
 
     def run(self):
         if self.window is None:
             self.create_window()
+        self._render()
         self.window.mainloop()
 
     def start(self):
-        threading.Thread(target=self.run, daemon=True).start()
+        threading.Thread(target=self.run, name="visualizer", daemon=True).start()
 
-visualizer = None
+    def stop(self):
+        if self.window is not None:
+            self.window.after(0, self.window.quit)
 
-def initialize_visualizer(strategy_name):
+
+DASHBOARD_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{font-family:monospace}} td{{padding:2px 8px;vertical-align:top}}</style></head>
+<body><h3>{title}</h3><table id="pairs"></table>
+<script>
+async function refresh() {{
+  const state = await (await fetch('/state')).json();
+  const rows = Object.keys(state).sort().map(symbol =>
+    '<tr><td><b>' + symbol + '</b></td>' + Object.values(state[symbol]).map(
+      ([text, color]) => '<td style="color:' + color + '">' + text + '</td>').join('') + '</tr>');
+  document.getElementById('pairs').innerHTML = rows.join('');
+}}
+refresh(); setInterval(refresh, {interval_ms});
+</script></body></html>
+"""
+
+
+class DashboardVisualizer(BaseVisualizer):
+    """
+    Легкая HTTP-панель вместо окна Tk, например для сервера без дисплея.
+
+    / - страница, которая раз в frame_interval запрашивает /state;
+    /state - текст и цвет меток всех пар в JSON. Накопленные обновления
+    форматируются при запросе, поэтому без открытой страницы затрат нет.
+    """
+
+    def __init__(self, strategy_name: str, port: int = 8050, host: str = '127.0.0.1', frame_interval: float = 1.0):
+        super().__init__(strategy_name, frame_interval)
+        self._state: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self._state_lock = threading.Lock()
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/state':
+                    body = json.dumps(dashboard.get_state(), ensure_ascii=False)
+                    content_type = 'application/json'
+                elif self.path == '/':
+                    body = DASHBOARD_PAGE.format(title=f"Визуализация стратегии: {dashboard.strategy_name}",
+                                                 interval_ms=int(dashboard.frame_interval * 1000))
+                    content_type = 'text/html'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="visualizer-dashboard", daemon=True)
+
+    def get_state(self) -> Dict[str, Dict[str, Tuple[str, str]]]:
+        with self._state_lock:
+            for symbol, (conditions, position_data) in self.drain().items():
+                self._state.setdefault(symbol, {}).update(format_labels(conditions, position_data))
+            return {symbol: dict(labels) for symbol, labels in self._state.items()}
+
+    def start(self):
+        self.thread.start()
+        self.logger.info(f"Панель визуализации доступна на http://{self.httpd.server_address[0]}:"
+                         f"{self.httpd.server_address[1]}/")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _display_available() -> bool:
+    if importlib.util.find_spec('tkinter') is None:
+        return False
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+
+visualizer: Optional[BaseVisualizer] = None
+
+
+def initialize_visualizer(strategy_name, mode: str = MODE_TK, port: int = 8050,
+                          frame_interval: float = 0.5) -> Optional[BaseVisualizer]:
+    """
+    Запускает визуализатор стратегии.
+
+    :param mode: 'tk' - окно Tk, 'http' - HTTP-панель на port, 'headless' - без визуализации.
+                 Без дисплея режим 'tk' заменяется на 'headless'.
+    :param frame_interval: минимальный интервал между отрисовками в секундах
+    """
     global visualizer
-    visualizer = StrategyVisualizer(strategy_name)
+    if mode == MODE_TK and not _display_available():
+        logging.getLogger(__name__).warning("Дисплей недоступен, визуализатор отключен")
+        mode = MODE_HEADLESS
+    if mode == MODE_TK:
+        visualizer = StrategyVisualizer(strategy_name, frame_interval)
+    elif mode == MODE_HTTP:
+        visualizer = DashboardVisualizer(strategy_name, port, frame_interval=frame_interval)
+    elif mode == MODE_HEADLESS:
+        visualizer = None
+        return None
+    else:
+        raise ValueError(f"Неизвестный режим визуализатора: {mode}")
     visualizer.start()
+    return visualizer
+
+
+def stop_visualizer():
+    global visualizer
+    if visualizer is not None:
+        visualizer.stop()
+        visualizer = None
+
+
+def visualizer_enabled() -> bool:
+    return visualizer is not None
+
 
 def update_visualizer(symbol, conditions, position_data):
-    if visualizer:
-        visualizer.window.after(0, visualizer.update_data, symbol, conditions, position_data)
\ No newline at end of file
+    # В режиме headless - только проверка ссылки
+    if visualizer is not None:
+        with metrics.timer('visualizer_push', symbol):
+            visualizer.publish(symbol, conditions, position_data)